@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, CandidateProfile, CompanyProfile, ExpertAssignment
+from .models import Application, CustomUser, CandidateProfile, CompanyProfile, ExpertAssignment
 
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
@@ -18,4 +18,11 @@ class CompanyProfileAdmin(admin.ModelAdmin):
     list_display = ('company_name', 'gstin', 'user')
     search_fields = ('company_name', 'gstin')
 
+@admin.register(Application)
+class ApplicationAdmin(admin.ModelAdmin):
+    list_display = ('candidate', 'job_posting', 'status', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('candidate__user__email', 'job_posting__title')
+    raw_id_fields = ('candidate', 'job_posting')
+
 admin.register(ExpertAssignment)
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_applied_jobs(apps, schema_editor):
+    """One Application per existing applied_jobs row (the time applied was never recorded)."""
+    CandidateProfile = apps.get_model('authentication_usertype', 'CandidateProfile')
+    Application = apps.get_model('authentication_usertype', 'Application')
+    AppliedJob = CandidateProfile.applied_jobs.through
+    rows = AppliedJob.objects.order_by('pk').values_list('candidateprofile_id', 'jobposting_id')
+    batch = []
+    for candidate_id, job_posting_id in rows.iterator(chunk_size=1000):
+        batch.append(Application(candidate_id=candidate_id, job_posting_id=job_posting_id))
+        if len(batch) >= 1000:
+            Application.objects.bulk_create(batch)
+            batch = []
+    Application.objects.bulk_create(batch)
+
+
+def copy_applications_back(apps, schema_editor):
+    CandidateProfile = apps.get_model('authentication_usertype', 'CandidateProfile')
+    Application = apps.get_model('authentication_usertype', 'Application')
+    AppliedJob = CandidateProfile.applied_jobs.through
+    AppliedJob.objects.bulk_create(
+        [
+            AppliedJob(candidateprofile_id=candidate_id, jobposting_id=job_posting_id)
+            for candidate_id, job_posting_id in Application.objects.values_list('candidate_id', 'job_posting_id')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication_usertype', '0002_initial'),
+        ('company_dashboard', '0003_jobposting_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Application',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('shortlisted', 'Shortlisted'), ('rejected', 'Rejected'), ('hired', 'Hired'), ('withdrawn', 'Withdrawn')], default='applied', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='authentication_usertype.candidateprofile')),
+                ('job_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='company_dashboard.jobposting')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job_posting', 'status', '-created_at', '-id'], name='application_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['candidate', '-created_at', '-id'], name='application_candidate_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='application',
+            constraint=models.UniqueConstraint(fields=('candidate', 'job_posting'), name='application_candidate_job_uniq'),
+        ),
+        migrations.RunPython(copy_applied_jobs, copy_applications_back),
+        # Point applied_jobs at Application and drop the auto-created table
+        # (Django cannot alter a many-to-many to add a through model).
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RemoveField(model_name='candidateprofile', name='applied_jobs'),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='candidateprofile',
+                    name='applied_jobs',
+                    field=models.ManyToManyField(blank=True, related_name='candidates_applied', through='authentication_usertype.Application', to='company_dashboard.jobposting'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication_usertype', '0003_application'),
+        ('company_dashboard', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job_posting', '-created_at', '-id'], name='application_job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'name'], name='customuser_role_name_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 class UserManager(BaseUserManager):
@@ -42,6 +43,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     objects = UserManager()
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']    
+
+    class Meta:
+        indexes = [
+            # Users of a role by name, e.g. the job search's company choices
+            models.Index(fields=['role', 'name'], name='customuser_role_name_idx'),
+        ]
+
     def __str__(self):
         return self.email
     
@@ -53,11 +61,73 @@ class CandidateProfile(models.Model):
     image = models.ImageField(upload_to='candidate_images/', null=True, blank=True)
     company = models.CharField(max_length=250, null=True, blank=True)
     is_expert = models.BooleanField(default=False)
-    applied_jobs = models.ManyToManyField('company_dashboard.JobPosting', related_name='candidates_applied', blank=True)
+    applied_jobs = models.ManyToManyField(
+        'company_dashboard.JobPosting', through='Application', related_name='candidates_applied', blank=True,
+    )
     
     def __str__(self):
         return self.user.email
     
+class ApplicationQuerySet(models.QuerySet):
+    def set_status(self, status):
+        """Move every application in the queryset to `status` in one UPDATE. Returns the number changed."""
+        return self.exclude(status=status).update(status=status, updated_at=timezone.now())
+
+
+class ApplicationManager(models.Manager.from_queryset(ApplicationQuerySet)):
+    def apply(self, candidate, job_posting):
+        """
+        Apply `candidate` to `job_posting`, or return their existing
+        application: applying twice changes nothing, except that a withdrawn
+        application is reopened. Returns (application, created).
+        """
+        application, created = self.get_or_create(candidate=candidate, job_posting=job_posting)
+        if not created and application.status == Application.WITHDRAWN:
+            application.status = Application.APPLIED
+            application.save(update_fields=['status', 'updated_at'])
+        return application, created
+
+
+class Application(models.Model):
+    """A candidate's application to a job posting (the CandidateProfile.applied_jobs through model)."""
+    APPLIED = 'applied'
+    SHORTLISTED = 'shortlisted'
+    REJECTED = 'rejected'
+    HIRED = 'hired'
+    WITHDRAWN = 'withdrawn'
+    STATUS_CHOICES = [
+        (APPLIED, 'Applied'),
+        (SHORTLISTED, 'Shortlisted'),
+        (REJECTED, 'Rejected'),
+        (HIRED, 'Hired'),
+        (WITHDRAWN, 'Withdrawn'),
+    ]
+
+    candidate = models.ForeignKey(CandidateProfile, on_delete=models.CASCADE, related_name='applications')
+    job_posting = models.ForeignKey('company_dashboard.JobPosting', on_delete=models.CASCADE, related_name='applications')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=APPLIED)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ApplicationManager()
+
+    class Meta:
+        constraints = [
+            # One application per candidate and job; re-applying reuses it
+            models.UniqueConstraint(fields=['candidate', 'job_posting'], name='application_candidate_job_uniq'),
+        ]
+        indexes = [
+            # A job's applicants by status, or all of them, newest first (keyset-paginated)
+            models.Index(fields=['job_posting', 'status', '-created_at', '-id'], name='application_job_status_idx'),
+            models.Index(fields=['job_posting', '-created_at', '-id'], name='application_job_created_idx'),
+            # A candidate's applications, newest first
+            models.Index(fields=['candidate', '-created_at', '-id'], name='application_candidate_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate} - {self.job_posting} ({self.status})"
+
+
 class CompanyProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='company_profile')
     company_name = models.CharField(max_length=250)
@@ -0,0 +1,170 @@
+"""
+Read-only JSON API for open job postings (/api/v1/jobs/), for partner job
+boards that poll instead of scraping job_listings.
+
+- The list takes the job_listings search parameters (q, experience,
+  minimum_salary, company), is keyset-paginated with opaque `cursor`s
+  (newest first) and `fields` picks the fields returned (comma-separated).
+- Responses carry a strong ETag and Last-Modified, read from the database
+  so every process (and changes made by commands) agree on them. For the
+  list they come from the listings version (see
+  candidate_dashboard.caching, one read by primary key) and the request's
+  parameters, so a poll with If-None-Match/If-Modified-Since is answered
+  304 without running the search. For a posting they come from its
+  updated_at, read alone by primary key, and the listings version (the
+  company name lives outside the posting). Changes made with
+  queryset.update() must call invalidate_job_postings().
+- Public and read-only: open postings only, no authentication.
+"""
+import hashlib
+
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from company_dashboard.models import JobPosting
+from core.pagination import DEFAULT_KEYS, paginate
+
+from .caching import listings_version
+from .forms import JobSearchForm
+
+# Postings per page, by default and at most (?limit=)
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Parameters that shape a list response, and so its ETag
+LIST_PARAMETERS = ('q', 'experience', 'minimum_salary', 'company', 'fields', 'cursor', 'limit')
+
+
+class JobPostingSerializer(serializers.ModelSerializer):
+    company = serializers.SerializerMethodField()
+
+    class Meta:
+        model = JobPosting
+        fields = [
+            'id', 'title', 'description', 'required_skills', 'minimum_experience', 'minimum_salary', 'company',
+            'created_at', 'updated_at',
+        ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_company(self, job_posting):
+        profile = getattr(job_posting.company, 'company_profile', None)
+        return profile.company_name if profile else job_posting.company.name
+
+
+def selected_fields(request):
+    """The serializer fields asked for with ?fields=, or all of them; raises ValidationError."""
+    available = JobPostingSerializer.Meta.fields
+    requested = request.query_params.get('fields')
+    if not requested:
+        return available
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(available))
+    if unknown:
+        raise ValidationError({'fields': [f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}."]})
+    return fields
+
+
+def fetch(job_postings, fields):
+    """Narrow a JobPosting queryset to the columns the fields need."""
+    columns = {name for name in fields if name != 'company'} | {'id', 'created_at'}  # created_at: the cursor key
+    if 'company' in fields:
+        return job_postings.select_related('company__company_profile').only(
+            *columns, 'company__name', 'company__company_profile__company_name',
+        )
+    return job_postings.only(*columns)
+
+
+def strong_etag(*parts):
+    return '"%s"' % hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def conditional(request, etag, last_modified, build):
+    """
+    A 304 if the client's copy is current; otherwise build() the response
+    and tag it. `last_modified` is a datetime.
+    """
+    timestamp = int(last_modified.timestamp())
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        return not_modified
+    response = build()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def job_list(request):
+    """Open job postings, newest first: {'results': [...], 'next': url, 'previous': url}."""
+    fields = selected_fields(request)
+    try:
+        limit = min(int(request.query_params.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValidationError({'limit': ["Must be an integer."]})
+    if limit < 1:
+        raise ValidationError({'limit': ["Must be at least 1."]})
+
+    # The same search as job_listings, over open postings only
+    params = request.query_params.copy()
+    params['status'] = 'active'
+    form = JobSearchForm(params)
+    if not form.is_valid():
+        raise ValidationError(form.errors)
+    job_postings = form.filter(JobPosting.objects.all())
+
+    version = listings_version()
+    query = sorted((name, value) for name in LIST_PARAMETERS for value in request.query_params.getlist(name))
+    etag = strong_etag('jobs', version.number, query)
+
+    def build():
+        page = paginate(fetch(job_postings, fields), request.query_params.get('cursor'), limit, keys=DEFAULT_KEYS, count=False)
+        return Response({
+            'results': JobPostingSerializer(page.object_list, many=True, fields=fields).data,
+            'next': _page_url(request, page.next_cursor),
+            'previous': _page_url(request, page.previous_cursor),
+        })
+
+    return conditional(request, etag, version.updated_at, build)
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def job_detail(request, job_posting_id):
+    """One open job posting."""
+    fields = selected_fields(request)
+    open_postings = JobPosting.objects.filter(is_active=True)
+    updated_at = get_object_or_404(open_postings.values_list('updated_at', flat=True), pk=job_posting_id)
+    version = listings_version()
+    etag = strong_etag('job', job_posting_id, updated_at.isoformat(), version.number, request.query_params.get('fields', ''))
+
+    def build():
+        job_posting = get_object_or_404(fetch(open_postings, fields), pk=job_posting_id)
+        return Response(JobPostingSerializer(job_posting, fields=fields).data)
+
+    return conditional(request, etag, max(updated_at, version.updated_at), build)
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.query_params.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api_v1'
+
+urlpatterns = [
+    path('jobs/', api.job_list, name='job_list'),
+    path('jobs/<int:job_posting_id>/', api.job_detail, name='job_detail'),
+]
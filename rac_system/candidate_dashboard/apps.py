@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CandidateDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'candidate_dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401  Connect the recommendation signals
@@ -0,0 +1,102 @@
+"""
+Cached fragments of the candidate job pages.
+
+The pages themselves are per user (navigation, CSRF token), so what is
+cached is the rendered part every candidate sees the same way: the results
+of a job_listings query (table and pager) and each posting's detail card.
+
+Invalidation, wired up in candidate_dashboard.signals (postings saved or
+deleted, bulk imports, company renames) and company_dashboard.archive:
+- Listing results are keyed by the query string and the listings version,
+  a counter in the database (ListingsVersion, read by primary key) bumped
+  by invalidate_job_postings(), so every cached page goes stale at once,
+  in every process, without enumerating keys or counting rows.
+- A posting's detail card is keyed by its id and the listings version too
+  (it shows the company name, which lives outside the posting).
+Changes made with queryset.update() send no signals: call
+invalidate_job_postings() after them.
+
+Hits and misses are counted per fragment in the cache (see the
+cache_stats command) to tune JOB_CACHE_TIMEOUT.
+"""
+import datetime
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ListingsVersion
+
+FRAGMENTS = ('job_listings', 'job_detail')
+
+# The ListingsVersion row
+VERSION_PK = 1
+
+# The listings version and when it was last bumped
+Version = namedtuple('Version', ['number', 'updated_at'])
+
+
+def listings_version():
+    """The current Version: one read by primary key, whatever the number of postings."""
+    row = ListingsVersion.objects.filter(pk=VERSION_PK).values_list('version', 'updated_at').first()
+    if row is None:
+        return Version(0, datetime.datetime.fromtimestamp(0, tz=datetime.timezone.utc))
+    return Version(*row)
+
+
+def invalidate_job_postings():
+    """Make every cached job page, and every jobs API validator, stale."""
+    now = timezone.now()
+    if not ListingsVersion.objects.filter(pk=VERSION_PK).update(version=F('version') + 1, updated_at=now):
+        ListingsVersion.objects.get_or_create(pk=VERSION_PK, defaults={'version': 1, 'updated_at': now})
+
+
+def listings_key(query_dict):
+    """Key of a job_listings results fragment for a request's GET parameters."""
+    query = '&'.join(f'{name}={value}' for name, values in sorted(query_dict.lists()) for value in values)
+    return f'job_listings:{listings_version().number}:{hashlib.sha1(query.encode()).hexdigest()}'
+
+
+def detail_key(job_posting_id):
+    return f'job_detail:{listings_version().number}:{job_posting_id}'
+
+
+def cached_fragment(fragment, key, render):
+    """The cached HTML under `key`, or render() it and cache it (counting hits and misses)."""
+    html = cache.get(key)
+    if html is not None:
+        _count(fragment, 'hits')
+        return html
+    _count(fragment, 'misses')
+    html = render()
+    cache.set(key, html, settings.JOB_CACHE_TIMEOUT)
+    return html
+
+
+def _stats_key(fragment, outcome):
+    return f'cache_stats:{fragment}:{outcome}'
+
+
+def _count(fragment, outcome):
+    key = _stats_key(fragment, outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:  # Evicted in between
+            cache.set(key, 1, None)
+
+
+def cache_stats():
+    """{fragment: {'hits': n, 'misses': n}} since the last reset."""
+    counts = cache.get_many([_stats_key(fragment, outcome) for fragment in FRAGMENTS for outcome in ('hits', 'misses')])
+    return {
+        fragment: {outcome: counts.get(_stats_key(fragment, outcome), 0) for outcome in ('hits', 'misses')}
+        for fragment in FRAGMENTS
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([_stats_key(fragment, outcome) for fragment in FRAGMENTS for outcome in ('hits', 'misses')])
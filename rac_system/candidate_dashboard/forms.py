@@ -0,0 +1,57 @@
+from django import forms
+from django.db.models import Q
+from django.contrib.auth import get_user_model
+
+from company_dashboard.search import search_job_postings
+
+
+class CompanyChoiceField(forms.ModelChoiceField):
+    def label_from_instance(self, obj):
+        return obj.name
+
+
+class JobSearchForm(forms.Form):
+    """Search and filters for the job listings (all optional, read from GET)."""
+    STATUS_CHOICES = [
+        ('active', 'Open positions'),
+        ('inactive', 'Closed positions'),
+        ('all', 'All positions'),
+    ]
+
+    q = forms.CharField(
+        required=False, max_length=200, label="Search",
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Title, description or skills'}),
+    )
+    experience = forms.IntegerField(
+        min_value=0, required=False, label="My experience (years)",
+        help_text="Only jobs asking for at most this much experience.",
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    minimum_salary = forms.IntegerField(
+        min_value=0, required=False, label="Salary at least",
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    status = forms.ChoiceField(
+        choices=STATUS_CHOICES, required=False, label="Status",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    company = CompanyChoiceField(
+        queryset=get_user_model().objects.filter(role='COMPANY').order_by('name'), required=False,
+        empty_label="Any company", label="Company", widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def filter(self, job_postings):
+        """Apply the valid filters to a JobPosting queryset (search last)."""
+        data = self.cleaned_data if self.is_valid() else {}
+        status = data.get('status') or 'active'
+        if status != 'all':
+            job_postings = job_postings.filter(is_active=status == 'active')
+        if data.get('experience') is not None:
+            job_postings = job_postings.filter(
+                Q(minimum_experience__isnull=True) | Q(minimum_experience__lte=data['experience'])
+            )
+        if data.get('minimum_salary') is not None:
+            job_postings = job_postings.filter(minimum_salary__gte=data['minimum_salary'])
+        if data.get('company') is not None:
+            job_postings = job_postings.filter(company=data['company'])
+        return search_job_postings(job_postings, data.get('q', ''))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from candidate_dashboard.caching import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hits and misses of the cached job page fragments, to tune JOB_CACHE_TIMEOUT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after showing them.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Backend: {settings.CACHES['default']['BACKEND']}, timeout {settings.JOB_CACHE_TIMEOUT}s")
+        if settings.CACHE_BACKEND == 'locmem':
+            self.stdout.write(self.style.WARNING(
+                "The local-memory cache is per process: these are this command's counters, not the web workers'. "
+                "Use the file or db backend to share them."
+            ))
+        for fragment, counts in cache_stats().items():
+            total = counts['hits'] + counts['misses']
+            ratio = f"{counts['hits'] / total:.1%}" if total else "-"
+            self.stdout.write(f"{fragment:<13} hits={counts['hits']:<8} misses={counts['misses']:<8} hit ratio={ratio}")
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
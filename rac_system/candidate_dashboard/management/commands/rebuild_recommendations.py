@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from candidate_dashboard.recommendations import rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the job and candidate skill indexes and every job recommendation, "
+        "e.g. after deploying recommendations or changing postings with queryset.update()."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_recommendations()
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} job recommendations."))
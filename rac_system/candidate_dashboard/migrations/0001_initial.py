@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('authentication_usertype', '0002_initial'),
+        ('company_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(db_index=True, max_length=255)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='authentication_usertype.candidateprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(db_index=True, max_length=255)),
+                ('job_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='company_dashboard.jobposting')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='authentication_usertype.candidateprofile')),
+                ('job_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='company_dashboard.jobposting')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['candidate', '-score', 'job_posting'], name='cand_dash_rec_ranked_idx')],
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'job_posting'), name='candidate_dashboard_recommendation_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='candidateskill',
+            name='skill',
+            field=models.TextField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='jobskill',
+            name='skill',
+            field=models.TextField(db_index=True),
+        ),
+    ]
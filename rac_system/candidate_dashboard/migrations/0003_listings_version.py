@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:18
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_version(apps, schema_editor):
+    # The single row candidate_dashboard.caching reads and bumps
+    apps.get_model('candidate_dashboard', 'ListingsVersion').objects.create(pk=1, updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidate_dashboard', '0002_skill_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
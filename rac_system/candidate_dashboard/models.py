@@ -1,3 +1,64 @@
 from django.db import models
 
 # Create your models here.
+from authentication_usertype.models import CandidateProfile
+from company_dashboard.models import JobPosting  # Import JobPosting
+
+
+class JobSkill(models.Model):
+    """
+    Inverted skill index over job postings: one row per (skill, posting),
+    from JobPosting.required_skills. Kept current by the signals in
+    candidate_dashboard.signals.
+    """
+    skill = models.TextField(db_index=True)
+    job_posting = models.ForeignKey(JobPosting, on_delete=models.CASCADE, related_name='skills')
+
+    def __str__(self):
+        return f"{self.skill} - {self.job_posting.title}"
+
+
+class CandidateSkill(models.Model):
+    """Inverted skill index over candidate profiles, from CandidateProfile.expertise."""
+    skill = models.TextField(db_index=True)
+    candidate = models.ForeignKey(CandidateProfile, on_delete=models.CASCADE, related_name='skills')
+
+    def __str__(self):
+        return f"{self.skill} - {self.candidate}"
+
+
+class JobRecommendation(models.Model):
+    """
+    A precomputed recommendation of an active posting to a candidate who
+    meets its minimum experience and has not applied to it yet, scored on
+    shared skills out of 10. The dashboard reads these ranked by score.
+    """
+    candidate = models.ForeignKey(CandidateProfile, on_delete=models.CASCADE, related_name='recommendations')
+    job_posting = models.ForeignKey(JobPosting, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'job_posting'], name='candidate_dashboard_recommendation_uniq'),
+        ]
+        indexes = [
+            # A candidate's recommendations, best first, straight off the index
+            models.Index(fields=['candidate', '-score', 'job_posting'], name='cand_dash_rec_ranked_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_posting.title} for {self.candidate} ({self.score:.2f})"
+
+
+class ListingsVersion(models.Model):
+    """
+    A single row (pk 1) counting changes to the job postings as candidates
+    see them. Read by primary key to key the cached job pages and the jobs
+    API validators, and bumped by invalidate_job_postings(); see
+    candidate_dashboard.caching.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Job postings version {self.version}"
@@ -0,0 +1,229 @@
+"""
+Skill-based job recommendations for candidates.
+
+Postings and candidate profiles are indexed by skill (JobSkill,
+CandidateSkill). When either side changes, only the pairs sharing a skill
+with it are rescored, and the results are stored as JobRecommendation rows
+so the dashboard never scores anything itself.
+
+A posting is recommended to a candidate when it is active, the candidate
+has not applied to it, the candidate's experience meets its
+minimum_experience, and they share at least one skill. The score is the
+same as the matching relevancy: shared skills / all skills, out of 10.
+Only each candidate's RECOMMENDATIONS_PER_CANDIDATE best postings are
+stored (ranked by score, then posting id, as the dashboard shows them):
+when a stored one drops out, the candidate is rescored so the next best
+takes its place. Deleted postings leave a gap until the candidate's next
+refresh or rebuild_recommendations().
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from core.matching import parse_skills
+from company_dashboard.models import JobPosting
+from authentication_usertype.models import CandidateProfile
+
+from .models import CandidateSkill, JobRecommendation, JobSkill
+
+# Rows per INSERT
+BATCH_SIZE = 1000
+
+
+def skills_of(text):
+    """Skills in a free-text, comma-separated list, compared case-insensitively."""
+    return frozenset(skill.lower() for skill in parse_skills(text) if skill)
+
+
+def relevancy(job_skills, candidate_skills):
+    """Shared skills over all skills, out of 10 (0 when either side has none)."""
+    union = job_skills | candidate_skills
+    if not union:
+        return 0
+    return len(job_skills & candidate_skills) / len(union) * 10
+
+
+def _meets_experience(job_posting, candidate):
+    return (job_posting.minimum_experience or 0) <= (candidate.experience or 0)
+
+
+@transaction.atomic
+def refresh_job_posting(job_posting):
+    """Re-index a posting's skills and rescore it against every candidate sharing one."""
+    skills = skills_of(job_posting.required_skills)
+    JobSkill.objects.filter(job_posting=job_posting).delete()
+    JobSkill.objects.bulk_create([JobSkill(skill=skill, job_posting=job_posting) for skill in skills])
+    previous = dict(JobRecommendation.objects.filter(job_posting=job_posting).values_list('candidate_id', 'score'))
+    JobRecommendation.objects.filter(job_posting=job_posting).delete()
+
+    scores = {}
+    if job_posting.is_active and skills:
+        candidate_ids = CandidateSkill.objects.filter(skill__in=skills).values('candidate_id')
+        candidates = (
+            CandidateProfile.objects.filter(pk__in=candidate_ids)
+            .exclude(applied_jobs=job_posting)
+            .only('pk', 'experience', 'expertise')
+        )
+        scores = {
+            candidate.pk: relevancy(skills, skills_of(candidate.expertise))
+            for candidate in candidates.iterator(chunk_size=BATCH_SIZE)
+            if _meets_experience(job_posting, candidate)
+        }
+
+    # Where the posting now scores lower (or not at all), a posting that
+    # missed the cut may take its place: rescore those candidates in full.
+    dropped = {pk for pk, score in previous.items() if scores.get(pk, 0) < score}
+    stored = sum(
+        _rescore(candidate, skills_of(candidate.expertise))
+        for candidate in CandidateProfile.objects.filter(pk__in=dropped).only('pk', 'experience', 'expertise')
+    )
+    return stored + _merge({pk: [(score, -job_posting.pk)] for pk, score in scores.items() if pk not in dropped})
+
+
+@transaction.atomic
+def refresh_candidate(candidate):
+    """Re-index a candidate's skills and rescore every active posting sharing one."""
+    skills = skills_of(candidate.expertise)
+    CandidateSkill.objects.filter(candidate=candidate).delete()
+    CandidateSkill.objects.bulk_create([CandidateSkill(skill=skill, candidate=candidate) for skill in skills])
+    return _rescore(candidate, skills)
+
+
+def remove_applied(recommendations):
+    """
+    Delete the recommendations (a queryset) of jobs just applied to, and
+    refill those candidates' lists from the postings that missed the cut.
+    """
+    candidate_ids = set(recommendations.values_list('candidate_id', flat=True))
+    recommendations.delete()
+    for candidate in CandidateProfile.objects.filter(pk__in=candidate_ids):
+        refresh_candidate(candidate)
+
+
+def index_new_job_postings(job_postings):
+    """
+    Index and score postings that were just created without signals
+    (bulk_create): like refresh_job_posting() for each of them, with one
+    pass over the candidates sharing any of their skills. Returns the number
+    of recommendations stored.
+    """
+    job_skills = {job_posting.pk: skills_of(job_posting.required_skills) for job_posting in job_postings}
+    JobSkill.objects.bulk_create(
+        (JobSkill(skill=skill, job_posting_id=pk) for pk, skills in job_skills.items() for skill in skills),
+        batch_size=BATCH_SIZE,
+    )
+    all_skills = set().union(*job_skills.values())
+    if not all_skills:
+        return 0
+
+    candidate_ids = CandidateSkill.objects.filter(skill__in=all_skills).values('candidate_id')
+    candidates = {
+        candidate.pk: (candidate, skills_of(candidate.expertise))
+        for candidate in CandidateProfile.objects.filter(pk__in=candidate_ids).only('pk', 'experience', 'expertise')
+    }
+    candidates_by_skill = {}
+    for pk, (candidate, skills) in candidates.items():
+        for skill in skills & all_skills:
+            candidates_by_skill.setdefault(skill, []).append(pk)
+
+    # Only each candidate's best postings are kept as they are scored, so
+    # memory stays bounded however many pairs share a skill.
+    limit = settings.RECOMMENDATIONS_PER_CANDIDATE
+    best = defaultdict(list)
+    for job_posting in job_postings:
+        if not job_posting.is_active:
+            continue
+        skills = job_skills[job_posting.pk]
+        for pk in {pk for skill in skills for pk in candidates_by_skill.get(skill, ())}:
+            if _meets_experience(job_posting, candidates[pk][0]):
+                _push(best[pk], job_posting.pk, relevancy(skills, candidates[pk][1]), limit)
+    return _merge(best)
+
+
+def rebuild_recommendations():
+    """
+    Rebuild both skill indexes and every recommendation from scratch, for
+    existing data or after changes made without signals (queryset.update()).
+    Returns the number of recommendations stored.
+    """
+    with transaction.atomic():
+        JobRecommendation.objects.all().delete()
+        JobSkill.objects.all().delete()
+        CandidateSkill.objects.all().delete()
+        JobSkill.objects.bulk_create(
+            (
+                JobSkill(skill=skill, job_posting_id=pk)
+                for pk, required_skills in JobPosting.objects.values_list('pk', 'required_skills').iterator(chunk_size=BATCH_SIZE)
+                for skill in skills_of(required_skills)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    return sum(refresh_candidate(candidate) for candidate in CandidateProfile.objects.iterator(chunk_size=BATCH_SIZE))
+
+
+def _push(best, job_posting_id, score, limit):
+    """
+    Offer a posting to a candidate's `best`: a min-heap of at most `limit`
+    (score, -job_posting_id) entries, so the worst (in dashboard order:
+    score, then lower posting ids first) is at the top.
+    """
+    entry = (score, -job_posting_id)
+    if len(best) < limit:
+        heapq.heappush(best, entry)
+    elif entry > best[0]:
+        heapq.heapreplace(best, entry)
+
+
+def _rescore(candidate, skills):
+    """Replace a candidate's recommendations with their best postings. Returns how many were stored."""
+    JobRecommendation.objects.filter(candidate=candidate).delete()
+    if not skills:
+        return 0
+
+    job_posting_ids = JobSkill.objects.filter(skill__in=skills).values('job_posting_id')
+    job_postings = (
+        JobPosting.objects.filter(pk__in=job_posting_ids, is_active=True)
+        .exclude(candidates_applied=candidate)
+        .only('pk', 'minimum_experience', 'required_skills')
+        .order_by()
+    )
+    best = []
+    for job_posting in job_postings.iterator(chunk_size=BATCH_SIZE):
+        if _meets_experience(job_posting, candidate):
+            _push(best, job_posting.pk, relevancy(skills_of(job_posting.required_skills), skills),
+                  settings.RECOMMENDATIONS_PER_CANDIDATE)
+    JobRecommendation.objects.bulk_create(
+        [JobRecommendation(candidate=candidate, job_posting_id=-key, score=score) for score, key in best],
+        batch_size=BATCH_SIZE,
+    )
+    return len(best)
+
+
+def _merge(best):
+    """
+    Store new recommendations, given as {candidate pk: heap of _push()
+    entries}, keeping the RECOMMENDATIONS_PER_CANDIDATE best of them and of
+    the candidate's stored ones. Returns the number of recommendations added.
+    """
+    limit = settings.RECOMMENDATIONS_PER_CANDIDATE
+    stored = {}
+    candidate_ids = list(best)
+    for start in range(0, len(candidate_ids), BATCH_SIZE):
+        existing = JobRecommendation.objects.filter(candidate_id__in=candidate_ids[start:start + BATCH_SIZE])
+        for pk, candidate_id, job_posting_id, score in existing.values_list('pk', 'candidate_id', 'job_posting_id', 'score'):
+            stored[(candidate_id, job_posting_id)] = pk
+            _push(best[candidate_id], job_posting_id, score, limit)
+
+    added = []
+    for candidate_id, entries in best.items():
+        for score, key in entries:
+            if stored.pop((candidate_id, -key), None) is None:
+                added.append(JobRecommendation(candidate_id=candidate_id, job_posting_id=-key, score=score))
+    # What is left of the stored recommendations lost its place
+    evicted = list(stored.values())
+    for start in range(0, len(evicted), BATCH_SIZE):
+        JobRecommendation.objects.filter(pk__in=evicted[start:start + BATCH_SIZE]).delete()
+    JobRecommendation.objects.bulk_create(added, batch_size=BATCH_SIZE)
+    return len(added)
@@ -0,0 +1,74 @@
+"""
+Keep the job recommendations and cached job pages in step with postings,
+profiles and applications.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from authentication_usertype.models import Application, CandidateProfile, CompanyProfile
+from company_dashboard.models import JobPosting
+from company_dashboard.signals import job_postings_created
+
+from .caching import invalidate_job_postings
+from .models import JobRecommendation
+from .recommendations import index_new_job_postings, refresh_candidate, refresh_job_posting, remove_applied
+
+
+@receiver(post_save, sender=JobPosting)
+def job_posting_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_job_posting(instance)
+
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_delete, sender=JobPosting)
+def job_posting_changed(sender, instance, **kwargs):
+    invalidate_job_postings()
+
+
+@receiver(job_postings_created)
+def job_postings_bulk_created(sender, job_postings, **kwargs):
+    invalidate_job_postings()
+    index_new_job_postings(job_postings)
+
+
+@receiver(post_save, sender=CompanyProfile)
+def company_profile_saved(sender, instance, **kwargs):
+    # Listings and detail cards show the company name
+    invalidate_job_postings()
+
+
+@receiver(post_save, sender=CandidateProfile)
+def candidate_profile_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_candidate(instance)
+
+
+@receiver(m2m_changed, sender=Application)
+def applied_jobs_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # applied_jobs.add() bulk-creates applications without post_save.
+    if action == 'post_add':
+        if reverse:
+            remove_applied(JobRecommendation.objects.filter(job_posting=instance, candidate_id__in=pk_set))
+        else:
+            remove_applied(JobRecommendation.objects.filter(candidate=instance, job_posting_id__in=pk_set))
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, raw=False, **kwargs):
+    # Jobs applied to are no longer recommended.
+    if created:
+        remove_applied(
+            JobRecommendation.objects.filter(candidate_id=instance.candidate_id, job_posting_id=instance.job_posting_id)
+        )
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, origin=None, **kwargs):
+    # Without the application the job is recommendable again (this also
+    # covers applied_jobs.remove() and clear()). Not when the posting or
+    # profile is being deleted and takes its applications with it.
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is Application:
+        refresh_candidate(instance.candidate)
@@ -1,3 +1,377 @@
-from django.test import TestCase
+import base64
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication_usertype.models import CandidateProfile, CompanyProfile
+from company_dashboard.models import JobPosting
+from company_dashboard.signals import job_postings_created
+
+from .caching import VERSION_PK, cache_stats, invalidate_job_postings
+from .models import JobRecommendation, ListingsVersion
+from .recommendations import index_new_job_postings, rebuild_recommendations
+
+
+class JobRecommendationTests(TestCase):
+    """Recommendations are kept current as postings, profiles and applications change."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        self.candidate = CandidateProfile.objects.create(user=user, experience=3, expertise="Python, Django, SQL")
+        self.client.force_login(user)
+
+    def post_job(self, title, required_skills, **fields):
+        return JobPosting.objects.create(
+            company=self.company, title=title, description="", required_skills=required_skills, **fields,
+        )
+
+    def recommended(self):
+        return list(
+            self.candidate.recommendations.order_by('-score', 'job_posting_id').values_list('job_posting__title', flat=True)
+        )
+
+    def test_ranked_by_shared_skills(self):
+        self.post_job("Backend", "python,django,sql")
+        self.post_job("Data", "python,pandas")
+        self.post_job("Frontend", "react")
+        self.assertEqual(self.recommended(), ["Backend", "Data"])
+        self.assertEqual(JobRecommendation.objects.get(job_posting__title="Backend").score, 10)
+
+    def test_experience_and_inactive_postings_filtered(self):
+        self.post_job("Senior", "python", minimum_experience=5)
+        inactive = self.post_job("Closed", "python", is_active=False)
+        self.assertEqual(self.recommended(), [])
+
+        self.candidate.experience = 6
+        self.candidate.save()
+        self.assertEqual(self.recommended(), ["Senior"])
+
+        inactive.is_active = True
+        inactive.save()
+        self.assertEqual(self.recommended(), ["Senior", "Closed"])
+
+    def test_profile_and_posting_edits_rescore(self):
+        job = self.post_job("Backend", "go")
+        self.assertEqual(self.recommended(), [])
+        job.required_skills = "go, sql"
+        job.save()
+        self.assertEqual(self.recommended(), ["Backend"])
+        self.candidate.expertise = "Rust"
+        self.candidate.save()
+        self.assertEqual(self.recommended(), [])
+
+    def test_applying_removes_recommendation(self):
+        job = self.post_job("Backend", "python")
+        self.candidate.applied_jobs.add(job)
+        self.assertEqual(self.recommended(), [])
+        job.save()
+        self.assertEqual(self.recommended(), [])
+        self.candidate.applied_jobs.remove(job)
+        self.assertEqual(self.recommended(), ["Backend"])
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.post_job("Backend", "python,django")
+        self.post_job("Data", "sql,pandas", minimum_experience=1)
+        expected = sorted(JobRecommendation.objects.values_list('candidate_id', 'job_posting_id', 'score'))
+        JobRecommendation.objects.all().delete()
+        self.assertEqual(rebuild_recommendations(), len(expected))
+        self.assertEqual(sorted(JobRecommendation.objects.values_list('candidate_id', 'job_posting_id', 'score')), expected)
+
+    @override_settings(RECOMMENDATIONS_PER_CANDIDATE=2)
+    def test_only_the_best_postings_stored(self):
+        first = self.post_job("First", "python,django,sql")
+        second = self.post_job("Second", "python,django")
+        self.post_job("Third", "python")
+        self.post_job("Fourth", "python,go")
+        self.assertEqual(self.recommended(), ["First", "Second"])
+
+        # A posting dropping out makes room for the next best
+        second.required_skills = "go"
+        second.save()
+        self.assertEqual(self.recommended(), ["First", "Third"])
+        self.candidate.applied_jobs.add(first)
+        self.assertEqual(self.recommended(), ["Third", "Fourth"])
+        second.required_skills = "python,django,sql"
+        second.save()
+        self.assertEqual(self.recommended(), ["Second", "Third"])
+
+    @override_settings(RECOMMENDATIONS_PER_CANDIDATE=2)
+    def test_bulk_created_postings_keep_the_best(self):
+        user = get_user_model().objects.create_user('other@example.com', 'password', name='Other', role='CANDIDATE')
+        CandidateProfile.objects.create(user=user, experience=1, expertise="sql, pandas")
+        self.post_job("Backend", "python,django")
+        job_postings = JobPosting.objects.bulk_create([
+            JobPosting(company=self.company, title=title, description="", required_skills=skills)
+            for title, skills in [("Full", "python,django,sql"), ("Data", "sql,pandas"), ("Script", "python")]
+        ])
+        index_new_job_postings(job_postings)
+        self.assertEqual(self.recommended(), ["Full", "Backend"])
+        incremental = sorted(JobRecommendation.objects.values_list('candidate_id', 'job_posting_id', 'score'))
+        self.assertEqual(len(incremental), 4)
+        rebuild_recommendations()
+        self.assertEqual(sorted(JobRecommendation.objects.values_list('candidate_id', 'job_posting_id', 'score')), incremental)
+
+    def test_long_skills(self):
+        skill = "x" * 300
+        self.candidate.expertise = f"python, {skill}"
+        self.candidate.save()
+        self.post_job("Long", skill)
+        self.assertEqual(self.recommended(), ["Long"])
+
+    def test_dashboard_reads_ranked_recommendations(self):
+        self.post_job("Data", "python,pandas")
+        self.post_job("Backend", "python,django,sql")
+        response = self.client.get(reverse('candidate_dashboard:dashboard'))
+        self.assertEqual(
+            [recommendation.job_posting.title for recommendation in response.context['recommended_jobs']],
+            ["Backend", "Data"],
+        )
+
+
+class JobSearchTests(TestCase):
+    """job_listings searches through the full-text index and applies the filters."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing counts
+        User = get_user_model()
+        self.acme = User.objects.create_user('acme@example.com', 'password', name='Acme', role='COMPANY')
+        self.globex = User.objects.create_user('globex@example.com', 'password', name='Globex', role='COMPANY')
+        user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        self.client.force_login(user)
+        self.url = reverse('candidate_dashboard:job_listings')
+
+    def post_job(self, title, company=None, description="", required_skills="", **fields):
+        return JobPosting.objects.create(
+            company=company or self.acme, title=title, description=description, required_skills=required_skills, **fields,
+        )
+
+    def titles(self, **params):
+        response = self.client.get(self.url, params)
+        return sorted(job.title for job in response.context['job_postings'])
+
+    def test_search_title_description_and_skills(self):
+        self.post_job("Backend Engineer", required_skills="python, django")
+        self.post_job("Data Analyst", description="SQL reporting for the finance team")
+        self.post_job("Closed Role", required_skills="python", is_active=False)
+        self.assertEqual(self.titles(q="pyth"), ["Backend Engineer"])
+        self.assertEqual(self.titles(q="finance sql"), ["Data Analyst"])
+        self.assertEqual(self.titles(q="finance python"), [])
+        # FTS5 syntax in the query is treated as plain words
+        self.assertEqual(self.titles(q='"engineer* ('), ["Backend Engineer"])
+        self.assertEqual(self.titles(q="python", status="all"), ["Backend Engineer", "Closed Role"])
+
+    def test_index_follows_edits_and_deletes(self):
+        job = self.post_job("Backend Engineer", required_skills="python")
+        job.required_skills = "golang"
+        job.save()
+        self.assertEqual(self.titles(q="python"), [])
+        self.assertEqual(self.titles(q="golang"), ["Backend Engineer"])
+        job.delete()
+        self.assertEqual(self.titles(q="golang"), [])
+
+    def test_structured_filters(self):
+        self.post_job("Junior", minimum_experience=0, minimum_salary=30000)
+        self.post_job("Senior", minimum_experience=8, minimum_salary=90000)
+        self.post_job("Open", company=self.globex)
+        self.assertEqual(self.titles(experience=2), ["Junior", "Open"])
+        self.assertEqual(self.titles(minimum_salary=50000), ["Senior"])
+        self.assertEqual(self.titles(company=self.globex.pk), ["Open"])
+        self.assertEqual(self.titles(experience=-1), ["Junior", "Open", "Senior"])  # Invalid filters are ignored
+
+    def test_page_links_keep_the_search(self):
+        for index in range(12):
+            self.post_job(f"Python job {index}", required_skills="python")
+        response = self.client.get(self.url, {'q': 'python'})
+        next_cursor = response.context['job_postings'].next_cursor
+        self.assertContains(response, f'href="?q=python&cursor={next_cursor}"')
+        response = self.client.get(self.url, {'q': 'python', 'cursor': next_cursor})
+        self.assertEqual(len(response.context['job_postings']), 2)
+        self.assertContains(response, "12 job postings")
+
+
+class JobPageCacheTests(TestCase):
+    """Listing results and posting cards are rendered once, until a posting changes."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.company = User.objects.create_user('acme@example.com', 'password', name='Acme', role='COMPANY')
+        user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        self.client.force_login(user)
+        self.job = JobPosting.objects.create(company=self.company, title="Backend Engineer", description="APIs")
+        self.listings = reverse('candidate_dashboard:job_listings')
+        self.detail = reverse('candidate_dashboard:job_detail', args=[self.job.pk])
+
+    def test_listing_results_cached_until_a_posting_changes(self):
+        self.assertContains(self.client.get(self.listings, {'q': 'backend'}), "Backend Engineer")
+        # Session, user, the listings version and the form's company choices
+        with self.assertNumQueries(4):
+            self.assertContains(self.client.get(self.listings, {'q': 'backend'}), "Backend Engineer")
+
+        self.job.title = "Platform Engineer"
+        self.job.save()
+        self.assertContains(self.client.get(self.listings), "Platform Engineer")
+        JobPosting.objects.create(company=self.company, title="Data Engineer", description="")
+        self.assertContains(self.client.get(self.listings), "Data Engineer")
+        self.job.delete()
+        self.assertNotContains(self.client.get(self.listings), "Platform Engineer")
+
+    def test_detail_card_cached_until_the_posting_changes(self):
+        self.client.get(self.detail)
+        with self.assertNumQueries(3):  # Session, user and the listings version
+            self.assertContains(self.client.get(self.detail), "Backend Engineer")
+        self.job.description = "GraphQL APIs"
+        self.job.save()
+        self.assertContains(self.client.get(self.detail), "GraphQL APIs")
+        self.job.delete()
+        self.assertEqual(self.client.get(self.detail).status_code, 404)
+
+    def test_version_read_from_the_database(self):
+        # As another process (or a command) would: nothing cached reset here
+        self.client.get(self.listings)
+        self.client.get(self.detail)
+        JobPosting.objects.filter(pk=self.job.pk).update(title="Site Reliability Engineer")
+        self.assertNotContains(self.client.get(self.listings), "Site Reliability Engineer")  # No signals sent
+        ListingsVersion.objects.filter(pk=VERSION_PK).update(version=F('version') + 1)
+        self.assertContains(self.client.get(self.listings), "Site Reliability Engineer")
+        self.assertContains(self.client.get(self.detail), "Site Reliability Engineer")
+
+    def test_bulk_import(self):
+        self.client.get(self.listings)
+        job_postings = JobPosting.objects.bulk_create([JobPosting(company=self.company, title="Data Engineer", description="")])
+        job_postings_created.send(sender=JobPosting, job_postings=job_postings)
+        self.assertContains(self.client.get(self.listings), "Data Engineer")
+
+    def test_company_rename(self):
+        self.client.get(self.listings)
+        self.client.get(self.detail)
+        CompanyProfile.objects.create(user=self.company, company_name="Acme Labs", address="", description="", gstin="1")
+        self.assertContains(self.client.get(self.listings), "Acme Labs")
+        self.assertContains(self.client.get(self.detail), "Acme Labs")
+        # The postings themselves are untouched: their archive clock keeps running
+        self.assertEqual(JobPosting.objects.get(pk=self.job.pk).updated_at, self.job.updated_at)
+
+    def test_hits_and_misses_counted(self):
+        for _ in range(3):
+            self.client.get(self.detail)
+        self.client.get(self.listings)
+        self.assertEqual(cache_stats(), {
+            'job_listings': {'hits': 0, 'misses': 1},
+            'job_detail': {'hits': 2, 'misses': 1},
+        })
+
+
+class JobApiTests(TestCase):
+    """The public jobs API answers unchanged polls with 304 Not Modified."""
+
+    def setUp(self):
+        cache.clear()  # Listings version
+        self.company = get_user_model().objects.create_user(
+            'company@example.com', 'password', name='Company', role='COMPANY',
+        )
+        self.job = JobPosting.objects.create(
+            company=self.company, title="Backend Engineer", description="Django APIs", minimum_salary=5000,
+        )
+        JobPosting.objects.create(company=self.company, title="Closed Role", description="", is_active=False)
+        self.list = reverse('api_v1:job_list')
+        self.detail = reverse('api_v1:job_detail', args=[self.job.pk])
+
+    def test_list_of_open_postings(self):
+        response = self.client.get(self.list)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([job['title'] for job in data['results']], ["Backend Engineer"])
+        self.assertEqual(data['results'][0]['company'], "Company")
+        self.assertIsNone(data['next'])
+        self.assertTrue(response['ETag'].startswith('"'))  # Strong
+        self.assertIn('Last-Modified', response)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get(self.list, {'q': 'django'})['ETag']
+        with self.assertNumQueries(1):  # The listings version, no search
+            response = self.client.get(self.list, {'q': 'django'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Other parameters, other ETag
+        self.assertEqual(self.client.get(self.list, {'q': 'python'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.job.title = "Platform Engineer"
+        self.job.save()
+        response = self.client.get(self.list, {'q': 'django'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['title'], "Platform Engineer")
+
+    def test_changes_outside_this_process_modify_the_list(self):
+        # Made by a command or another web process: the version is in the database
+        etag = self.client.get(self.list)['ETag']
+        JobPosting.objects.filter(pk=self.job.pk).update(title="Platform Engineer")
+        invalidate_job_postings()
+        response = self.client.get(self.list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['results'][0]['title'], "Platform Engineer")
+
+        etag = response['ETag']
+        job_postings = JobPosting.objects.bulk_create([JobPosting(company=self.company, title="Data Engineer", description="")])
+        job_postings_created.send(sender=JobPosting, job_postings=job_postings)
+        response = self.client.get(self.list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+        etag = response['ETag']
+        JobPosting.objects.filter(pk=self.job.pk).delete()
+        response = self.client.get(self.list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual([job['title'] for job in response.json()['results']], ["Data Engineer"])
+
+    def test_field_selection(self):
+        response = self.client.get(self.list, {'fields': 'id,title'})
+        self.assertEqual(response.json()['results'], [{'id': self.job.pk, 'title': "Backend Engineer"}])
+        response = self.client.get(self.list, {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['fields'][0])
+
+    def test_cursor_pagination(self):
+        for number in range(3):
+            JobPosting.objects.create(company=self.company, title=f"Job {number}", description="")
+        first = self.client.get(self.list, {'limit': 2, 'fields': 'title'}).json()
+        self.assertEqual([job['title'] for job in first['results']], ["Job 2", "Job 1"])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([job['title'] for job in second['results']], ["Job 0", "Backend Engineer"])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(second['previous']).json()['results'], first['results'])
+        # A tampered cursor gives the first page
+        tampered = base64.urlsafe_b64encode(b'["n",["notadate",{"a":1}]]').decode()
+        response = self.client.get(self.list, {'limit': 2, 'fields': 'title', 'cursor': tampered})
+        self.assertEqual(response.json()['results'], first['results'])
+
+    def test_detail(self):
+        response = self.client.get(self.detail)
+        self.assertEqual(response.json()['title'], "Backend Engineer")
+        with self.assertNumQueries(2):  # updated_at and the listings version, both by primary key
+            self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.detail, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+        )
+
+        self.job.minimum_salary = 6000
+        self.job.save()
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['minimum_salary'], 6000)
+        # The company name lives outside the posting
+        CompanyProfile.objects.create(user=self.company, company_name="Acme Labs", address="", description="", gstin="1")
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['company'], "Acme Labs")
+
+        self.job.is_active = False
+        self.job.save()
+        self.assertEqual(self.client.get(self.detail).status_code, 404)
+
+    def test_invalid_fields_refused_before_the_conditional_check(self):
+        last_modified = self.client.get(self.detail)['Last-Modified']
+        for url in (self.list, self.detail):
+            self.assertEqual(self.client.get(url, {'fields': 'password'}, HTTP_IF_NONE_MATCH='*').status_code, 400)
+            response = self.client.get(url, {'fields': 'password'}, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 400)
@@ -1,10 +1,14 @@
 from company_dashboard.models import JobPosting  # Import JobPosting
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from core.pagination import paginate
+from django.db.models import Prefetch, Q
 from company_dashboard.models import JobPosting
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.contrib.auth.decorators import login_required, user_passes_test
-from authentication_usertype.models import CandidateProfile  # Import your models
+from authentication_usertype.models import Application, CandidateProfile  # Import your models
+from .caching import cached_fragment, detail_key, listings_key
+from .forms import JobSearchForm
 from django.contrib.auth import get_user_model
 
 
@@ -17,6 +21,9 @@ from django.core.exceptions import ObjectDoesNotExist
 
 User = get_user_model()  #  Get your CustomUser model
 
+# Recommendations best first; the (candidate, -score, job_posting) index order
+RECOMMENDATION_KEYS = ('-score', 'job_posting_id')
+
 def is_candidate_user(user):
     return user.role == 'CANDIDATE'
 
@@ -32,25 +39,35 @@ def dashboard(request):
     except AttributeError:
         return render(request, 'candidate_dashboard/dashboard.html', {'no_profile': True})
 
-    # Get the jobs the candidate has applied for.
-    applications = candidate_profile.applied_jobs.all()
-
-    # Get recommended jobs
-    recommended_jobs = JobPosting.objects.exclude(id__in=candidate_profile.applied_jobs.values_list('id', flat=True)).order_by('-created_at')
-
-    # Pagination
-    paginator = Paginator(recommended_jobs, 5)
-    page = request.GET.get('page')
-    try:
-        recommended_jobs_page = paginator.page(page)
-    except PageNotAnInteger:
-        recommended_jobs_page = paginator.page(1)
-    except EmptyPage:
-        recommended_jobs_page = paginator.page(paginator.num_pages)
+    # Get the candidate's applications, newest first.
+    applications = (
+        candidate_profile.applications.select_related('job_posting__company__company_profile')
+        .prefetch_related('job_posting__tests').order_by('-created_at', '-id')
+    )
+
+    # Applications to postings archived since, with the candidate's attempts
+    # on their tests (company_dashboard.archive moves both out of the live tables)
+    archived_applications = (
+        candidate_profile.archived_applications.select_related('job_posting__company__company_profile')
+        .prefetch_related(Prefetch(
+            'job_posting__attempts', queryset=candidate_profile.archived_test_attempts.order_by('start_time', 'pk'),
+            to_attr='candidate_attempts',
+        ))
+        .order_by('-created_at', '-id')
+    )
+
+    # Get recommended jobs: precomputed and ranked, one indexed query per page
+    recommended_jobs = (
+        candidate_profile.recommendations.select_related('job_posting__company__company_profile')
+    )
+
+    # Keyset pagination in rank order, 5 per page
+    recommended_jobs_page = paginate(recommended_jobs, request.GET.get('cursor'), 5, keys=RECOMMENDATION_KEYS)
 
     context = {
         'candidate_profile': candidate_profile,
         'applications': applications,
+        'archived_applications': archived_applications,
         'recommended_jobs': recommended_jobs_page,
     }
     return render(request, 'candidate_dashboard/dashboard.html', context)
@@ -61,28 +78,35 @@ def dashboard(request):
 @user_passes_test(is_candidate_user, login_url='home')
 def job_listings(request):
     """
-    View to display all job listings for candidates.
+    View to display job listings for candidates, with full-text search and filters.
     """
-    job_postings = JobPosting.objects.all().order_by('-created_at')
+    form = JobSearchForm(request.GET or None)
 
-    paginator = Paginator(job_postings, 10)
-    page = request.GET.get('page')
-    try:
-        job_postings_page = paginator.page(page)
-    except PageNotAnInteger:
-        job_postings_page = paginator.page(1)
-    except EmptyPage:
-        job_postings_page = paginator.page(paginator.num_pages)
+    def render_results():
+        job_postings = form.filter(JobPosting.objects.select_related('company__company_profile'))
+        # Page links keep the search and filters
+        query = request.GET.copy()
+        query.pop('cursor', None)
+        return render_to_string('candidate_dashboard/job_listings_results.html', {
+            'job_postings': paginate(job_postings, request.GET.get('cursor'), 10),
+            'query': query.urlencode(),
+        })
 
-    return render(request, 'candidate_dashboard/job_listings.html', {'job_postings': job_postings_page})
+    # The results are the same for every candidate: render them once per query
+    results = cached_fragment('job_listings', listings_key(request.GET), render_results)
+    return render(request, 'candidate_dashboard/job_listings.html', {'form': form, 'results': mark_safe(results)})
 
 
 @login_required
 @user_passes_test(is_candidate_user, login_url='home')
 def job_detail(request, job_posting_id):
     """View to display the details of a single job posting."""
-    job_posting = get_object_or_404(JobPosting, id=job_posting_id)
-    return render(request, 'candidate_dashboard/job_detail.html', {'job_posting': job_posting})
+    def render_card():
+        job_posting = get_object_or_404(JobPosting.objects.select_related('company__company_profile'), id=job_posting_id)
+        return render_to_string('candidate_dashboard/job_detail_card.html', {'job_posting': job_posting})
+
+    card = cached_fragment('job_detail', detail_key(job_posting_id), render_card)
+    return render(request, 'candidate_dashboard/job_detail.html', {'card': mark_safe(card)})
 
 
 
@@ -101,8 +125,8 @@ def apply_for_job(request, job_posting_id):
 
     if request.method == 'POST':
         # Handle the application:
-        # 1. Add the job to the candidate's applied_jobs ManyToManyField.
-        candidate_profile.applied_jobs.add(job_posting)
+        # 1. Apply (applying again keeps the existing application).
+        Application.objects.apply(candidate_profile, job_posting)
         # 2. Redirect to a confirmation page.
         return redirect('candidate_dashboard:application_confirmation', job_posting_id=job_posting.id)  # Create this URL and template
 
@@ -6,6 +6,7 @@ from django.http import Http404
 from django.db.models import Sum
 
 from .models import Test, Question, Choice, CandidateTestAttempt, CandidateAnswer
+from company_dashboard.counters import attempt_completed
 from company_dashboard.models import JobPosting
 from authentication_usertype.models import CandidateProfile
 from .forms import TestForm, QuestionFormSet
@@ -71,7 +72,7 @@ def create_test(request):
                     question_formset.save_m2m()
                     
                     messages.success(request, f'Test "{test_instance.title}" and its questions were successfully created and linked to the job!')
-                    return redirect('test_success', test_id=test_instance.id)
+                    return redirect('candidate_test:test_success', test_id=test_instance.id)
 
             except Exception as e:
                 messages.error(request, f"An error occurred during test creation: {e}")
@@ -121,7 +122,7 @@ def take_test(request, test_id):
     # Check if the user has already completed the test
     if attempt.is_completed:
         messages.info(request, "You have already completed this test.")
-        return redirect('test_results', attempt_id=attempt.id)
+        return redirect('candidate_test:test_results', attempt_id=attempt.id)
     
     questions = test.questions.prefetch_related('choices').all()
 
@@ -161,9 +162,10 @@ def take_test(request, test_id):
                 attempt.end_time = timezone.now()
                 attempt.is_completed = True
                 attempt.save()
+                attempt_completed(attempt)
 
                 messages.success(request, f"Test submitted successfully! Your score: {total_score} points.")
-                return redirect('test_results', attempt_id=attempt.id)
+                return redirect('candidate_test:test_results', attempt_id=attempt.id)
 
         except Exception as e:
             messages.error(request, f"An error occurred while submitting the test: {e}")
@@ -192,7 +194,7 @@ def test_results(request, attempt_id):
 
     if not attempt.is_completed:
         messages.warning(request, "This test attempt is not yet completed.")
-        return redirect('take_test', test_id=attempt.test.id)
+        return redirect('candidate_test:take_test', test_id=attempt.test.id)
 
     # Fetch answers for review
     answers = CandidateAnswer.objects.filter(attempt=attempt).select_related(
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import JobPosting
+from .models import ArchivedApplication, ArchivedJobPosting, ArchivedTestAttempt, JobPosting
 
 @admin.register(JobPosting)
 class JobPostingAdmin(admin.ModelAdmin):
@@ -25,4 +25,37 @@ class JobPostingAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
     )
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """The archive is only written by company_dashboard.archive."""
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedJobPosting)
+class ArchivedJobPostingAdmin(ReadOnlyAdmin):
+    list_display = ('title', 'company', 'created_at', 'archived_at', 'applicant_count', 'completed_attempts')
+    list_filter = ('archived_at',)
+    search_fields = ('title', 'company__email')
+    ordering = ('-archived_at',)
+
+
+@admin.register(ArchivedApplication)
+class ArchivedApplicationAdmin(ReadOnlyAdmin):
+    list_display = ('candidate', 'job_posting', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('candidate__user__email', 'job_posting__title')
+
+
+@admin.register(ArchivedTestAttempt)
+class ArchivedTestAttemptAdmin(ReadOnlyAdmin):
+    list_display = ('candidate', 'job_posting', 'test_title', 'score', 'is_completed')
+    search_fields = ('candidate__user__email', 'job_posting__title')
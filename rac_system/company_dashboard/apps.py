@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CompanyDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'company_dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401  Connect the job counter signals
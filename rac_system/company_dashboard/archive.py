@@ -0,0 +1,133 @@
+"""
+Archival of expired job postings.
+
+Postings that match the expiry rules (closed and not edited for
+JOB_ARCHIVE_INACTIVE_DAYS, or created JOB_ARCHIVE_MAX_AGE_DAYS ago) are
+moved, a batch per transaction, into the archive tables: ArchivedJobPosting
+(same id, counters and a snapshot of its tests), ArchivedApplication and
+ArchivedTestAttempt (with the answers). Then they are deleted from the hot
+tables along with everything that cascades from them: tests, questions,
+choices, attempts, answers, applications, recommendations and expert
+assignments (the counter signals skip that cascade, see
+company_dashboard.signals), and the listings version is bumped so the
+cached job pages go stale. Listings, their indexes and the FTS table only
+hold live postings, and the archive is only ever read: the company's
+history pages, the candidate's past applications on their dashboard, and
+the admin.
+
+Run by the archive_job_postings command, e.g. daily.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .models import ArchivedApplication, ArchivedJobPosting, ArchivedTestAttempt, JobPosting
+
+# Postings moved per transaction
+BATCH_SIZE = 200
+
+
+def expired_job_postings(inactive_days=None, max_age_days=None, now=None):
+    """
+    The postings due for archival; days default to the JOB_ARCHIVE_* settings,
+    0 disables a rule.
+    """
+    if inactive_days is None:
+        inactive_days = settings.JOB_ARCHIVE_INACTIVE_DAYS
+    if max_age_days is None:
+        max_age_days = settings.JOB_ARCHIVE_MAX_AGE_DAYS
+    now = now or timezone.now()
+
+    expired = Q(pk__in=[])
+    if inactive_days:
+        expired |= Q(is_active=False, updated_at__lt=now - datetime.timedelta(days=inactive_days))
+    if max_age_days:
+        expired |= Q(created_at__lt=now - datetime.timedelta(days=max_age_days))
+    return JobPosting.objects.filter(expired)
+
+
+def archive_job_postings(job_postings, batch_size=BATCH_SIZE):
+    """
+    Move the postings of a JobPosting queryset to the archive, `batch_size`
+    per transaction, oldest first. Returns the number archived.
+    """
+    archived = 0
+    while True:
+        pks = list(job_postings.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return archived
+        with transaction.atomic():
+            archived += _archive_batch(job_postings.filter(pk__in=pks))
+
+
+def _archive_batch(job_postings):
+    from authentication_usertype.models import Application
+    from candidate_dashboard.caching import invalidate_job_postings
+    from candidate_test.models import CandidateAnswer, CandidateTestAttempt, Test
+
+    # Locked and re-checked against the rules: one may have been reopened since
+    job_postings = list(
+        job_postings.select_for_update().prefetch_related(
+            Prefetch('tests', queryset=Test.objects.prefetch_related('questions__choices').order_by('pk')),
+        )
+    )
+    pks = [job.pk for job in job_postings]
+    ArchivedJobPosting.objects.bulk_create([
+        ArchivedJobPosting(
+            id=job.pk, company_id=job.company_id, title=job.title, description=job.description,
+            required_skills=job.required_skills, minimum_experience=job.minimum_experience,
+            minimum_salary=job.minimum_salary, is_active=job.is_active, created_at=job.created_at,
+            updated_at=job.updated_at, applicant_count=job.applicant_count,
+            completed_attempts=job.completed_attempts, score_total=job.score_total, max_score=job.max_score,
+            tests=[_test_snapshot(test) for test in job.tests.all()],
+        )
+        for job in job_postings
+    ])
+    ArchivedApplication.objects.bulk_create([
+        ArchivedApplication(
+            job_posting_id=application.job_posting_id, candidate_id=application.candidate_id,
+            status=application.status, created_at=application.created_at, updated_at=application.updated_at,
+        )
+        for application in Application.objects.filter(job_posting_id__in=pks).order_by('pk')
+    ])
+    # Attempts go with their test (deleting the posting cascades through it)
+    attempts = CandidateTestAttempt.objects.filter(test__job_post_id__in=pks).select_related('test').prefetch_related(
+        Prefetch('answers', queryset=CandidateAnswer.objects.select_related('question', 'selected_choice').order_by('pk')),
+    )
+    ArchivedTestAttempt.objects.bulk_create([
+        ArchivedTestAttempt(
+            job_posting_id=attempt.test.job_post_id, candidate_id=attempt.candidate_id, test_title=attempt.test.title,
+            start_time=attempt.start_time, end_time=attempt.end_time, score=attempt.score,
+            is_completed=attempt.is_completed,
+            answers=[
+                {
+                    'question': answer.question.text,
+                    'choice': answer.selected_choice.text if answer.selected_choice else None,
+                    'is_correct': answer.is_correct,
+                }
+                for answer in attempt.answers.all()
+            ],
+        )
+        for attempt in attempts.order_by('pk')
+    ])
+    JobPosting.objects.filter(pk__in=pks).delete()
+    invalidate_job_postings()
+    return len(job_postings)
+
+
+def _test_snapshot(test):
+    return {
+        'title': test.title,
+        'description': test.description,
+        'questions': [
+            {
+                'text': question.text,
+                'points': question.points,
+                'choices': [{'text': choice.text, 'is_correct': choice.is_correct} for choice in question.choices.all()],
+            }
+            for question in test.questions.all()
+        ],
+    }
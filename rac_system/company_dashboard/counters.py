@@ -0,0 +1,88 @@
+"""
+Denormalized per-posting counters shown on the company dashboard.
+
+JobPosting.applicant_count, completed_attempts, score_total and max_score
+are updated with F() expressions in the same transaction as the
+application or test attempt that changes them, so the dashboard reads the
+stats of a whole page of postings from the posting rows alone instead of
+COUNT/AVG queries per row:
+- applications: company_dashboard.signals (created, added through
+  applied_jobs, deleted)
+- test submissions: attempt_completed(), called by candidate_test.take_test
+- deleted completed attempts: company_dashboard.signals
+
+max_score only ever grows until reconcile_counters() recomputes it, e.g.
+after attempts are deleted; the reconcile_job_counters command runs it.
+"""
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import JobPosting
+
+# Postings recomputed per UPDATE by reconcile_counters()
+BATCH_SIZE = 1000
+
+
+def applications_added(job_posting_ids, count=1):
+    """Count `count` new applications on each of the postings (negative for removals)."""
+    JobPosting.objects.filter(pk__in=job_posting_ids).update(applicant_count=F('applicant_count') + count)
+
+
+def attempt_completed(attempt):
+    """Count a test attempt that was just completed with attempt.score points."""
+    if attempt.job_post_id is None:
+        return
+    score = attempt.score or 0
+    JobPosting.objects.filter(pk=attempt.job_post_id).update(
+        completed_attempts=F('completed_attempts') + 1,
+        score_total=F('score_total') + score,
+        max_score=Greatest(Coalesce(F('max_score'), Value(score)), Value(score)),
+    )
+
+
+def attempt_deleted(attempt):
+    """Uncount a completed test attempt (max_score is left to reconcile_counters())."""
+    if attempt.job_post_id is None or not attempt.is_completed:
+        return
+    JobPosting.objects.filter(pk=attempt.job_post_id).update(
+        completed_attempts=F('completed_attempts') - 1,
+        score_total=F('score_total') - (attempt.score or 0),
+    )
+
+
+def reconcile_counters(batch_size=BATCH_SIZE):
+    """
+    Recompute every posting's counters from the applications and test
+    attempts, one UPDATE per batch of postings. Returns the number of
+    postings updated.
+    """
+    from authentication_usertype.models import Application
+    from candidate_test.models import CandidateTestAttempt
+
+    def per_posting(queryset, aggregate):
+        return Subquery(
+            queryset.filter(job_post=OuterRef('pk')).order_by().values('job_post').annotate(value=aggregate).values('value'),
+            output_field=IntegerField(),
+        )
+
+    applications = Application.objects.filter(job_posting=OuterRef('pk')).order_by().values('job_posting')
+    attempts = CandidateTestAttempt.objects.filter(is_completed=True)
+    counters = {
+        'applicant_count': Coalesce(
+            Subquery(applications.annotate(value=Count('pk')).values('value'), output_field=IntegerField()), 0,
+        ),
+        'completed_attempts': Coalesce(per_posting(attempts, Count('pk')), 0),
+        'score_total': Coalesce(per_posting(attempts, Sum(Coalesce('score', 0))), 0),
+        'max_score': per_posting(attempts, Max('score')),
+    }
+
+    updated = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            JobPosting.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return updated
+        updated += JobPosting.objects.filter(pk__in=pks).update(**counters)
+        last_pk = pks[-1]
@@ -1,4 +1,6 @@
 from django import forms
+from authentication_usertype.models import Application
+from candidate_test.models import Test
 from .models import JobPosting
 
 class JobPostingForm(forms.ModelForm):
@@ -23,3 +25,49 @@ class JobPostingForm(forms.ModelForm):
             'minimum_experience': 'Minimum Experience (Years)',
         }
 
+
+
+class JobPostingImportForm(forms.Form):
+    """Upload of a CSV or JSON file of job postings (see company_dashboard.imports)."""
+    file = forms.FileField(
+        label="CSV or JSON file", widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}),
+    )
+    test_template = forms.ModelChoiceField(
+        queryset=Test.objects.none(), required=False, empty_label="No test",
+        label="Attach a copy of this test to every posting", widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    skip_invalid = forms.BooleanField(required=False, label="Import the valid rows and skip the invalid ones")
+
+    def __init__(self, *args, company, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the company's own tests can be copied
+        self.fields['test_template'].queryset = Test.objects.filter(job_post__company=company).order_by('title', 'pk')
+
+    def clean_file(self):
+        from .imports import FORMATS, file_format  # imports uses JobPostingForm
+
+        upload = self.cleaned_data['file']
+        if file_format(upload.name) is None:
+            raise forms.ValidationError(f"Upload a file ending in {' or '.join('.' + fmt for fmt in FORMATS)}.")
+        return upload
+
+
+class ApplicationStatusForm(forms.Form):
+    """Bulk status change for a job posting's applications: the ticked ones, or all shown."""
+    status = forms.ChoiceField(
+        choices=Application.STATUS_CHOICES, label="Set status to",
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'}),
+    )
+    applications = forms.ModelMultipleChoiceField(queryset=Application.objects.none(), required=False)
+    select_all = forms.BooleanField(required=False, label="Every application in this list, not just the ticked ones")
+
+    def __init__(self, *args, job_posting, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only this posting's applications can be changed
+        self.fields['applications'].queryset = job_posting.applications.all()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('select_all') and not cleaned_data.get('applications'):
+            raise forms.ValidationError("Select the applications to change.")
+        return cleaned_data
@@ -0,0 +1,136 @@
+"""
+Bulk import of job postings from a CSV or JSON file.
+
+Every row is validated with JobPostingForm, exactly as add_job_posting
+would, in one pass and without touching the database. The valid rows are
+then inserted with bulk_create in one transaction, optionally with a copy
+of a test (questions and choices) attached to each new posting. Nothing is
+imported when a row is invalid, unless skip_invalid is set.
+
+CSV files have a header row naming the columns; JSON files hold a list of
+objects. Columns/keys are JobPostingForm's fields (title, description,
+required_skills, minimum_experience, minimum_salary); others are ignored.
+Row numbers in errors count postings from 1 (the line after a CSV header).
+
+bulk_create sends no post_save, so the job_postings_created signal is
+sent instead: candidate_dashboard's receiver bumps the listings version
+(making the cached job pages and jobs API validators stale) and adds the
+new postings to the skill index and recommendations. The full-text index
+is kept by database triggers as usual.
+"""
+import csv
+import io
+import json
+from collections import namedtuple
+
+from django.db import transaction
+
+from .forms import JobPostingForm
+from .models import JobPosting
+from .signals import job_postings_created
+
+# Rows per INSERT
+BATCH_SIZE = 1000
+
+FORMATS = ('csv', 'json')
+
+
+class ImportFileError(ValueError):
+    """Raised for a file that is not a readable CSV or JSON list of postings."""
+
+
+# `fields` is {field: [{'message', 'code'}]} as in form.errors.get_json_data()
+RowErrors = namedtuple('RowErrors', ['row', 'fields'])
+ImportResult = namedtuple('ImportResult', ['imported', 'errors'])
+
+
+def file_format(name):
+    """'csv' or 'json' from a file name's extension, or None."""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return extension if extension in FORMATS else None
+
+
+def read_rows(data, fmt):
+    """The rows of an uploaded file's bytes as a list of dicts."""
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ImportFileError("The file is not UTF-8 encoded.")
+
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ImportFileError("The CSV file has no header row.")
+        try:
+            return list(reader)
+        except csv.Error as e:
+            raise ImportFileError(f"Malformed CSV: {e}")
+    if fmt == 'json':
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise ImportFileError(f"Malformed JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ImportFileError("The JSON file must hold a list of objects.")
+        return rows
+    raise ImportFileError(f"Unsupported format {fmt!r}; use one of {', '.join(FORMATS)}.")
+
+
+def validate_rows(rows, company):
+    """(unsaved JobPostings for the valid rows, errors for the others)."""
+    job_postings, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        data = {name: '' if value is None else value for name, value in row.items() if name in JobPostingForm._meta.fields}
+        form = JobPostingForm(data)
+        if form.is_valid():
+            job_posting = form.save(commit=False)
+            job_posting.company = company
+            job_postings.append(job_posting)
+        else:
+            errors.append(RowErrors(number, form.errors.get_json_data()))
+    return job_postings, errors
+
+
+def import_job_postings(rows, company, test_template=None, skip_invalid=False, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Validate `rows` (dicts) and create the valid ones as postings of
+    `company`, each with a copy of `test_template` if given. Returns an
+    ImportResult; nothing is created if any row is invalid and not
+    skip_invalid, or with dry_run.
+    """
+    job_postings, errors = validate_rows(rows, company)
+    if dry_run or (errors and not skip_invalid) or not job_postings:
+        return ImportResult(0, errors)
+
+    with transaction.atomic():
+        job_postings = JobPosting.objects.bulk_create(job_postings, batch_size=batch_size)
+        if test_template is not None:
+            attach_test(test_template, job_postings, batch_size=batch_size)
+        job_postings_created.send(sender=JobPosting, job_postings=job_postings)
+    return ImportResult(len(job_postings), errors)
+
+
+def attach_test(template, job_postings, batch_size=BATCH_SIZE):
+    """Give every posting its own copy of the `template` Test, with its questions and choices."""
+    from candidate_test.models import Choice, Question, Test
+
+    questions = list(template.questions.prefetch_related('choices').order_by('pk'))
+    tests = Test.objects.bulk_create(
+        [Test(job_post=job_posting, title=template.title, description=template.description) for job_posting in job_postings],
+        batch_size=batch_size,
+    )
+    copies = Question.objects.bulk_create(
+        [Question(test=test, text=question.text, points=question.points) for test in tests for question in questions],
+        batch_size=batch_size,
+    )
+    # copies are in (test, question) order
+    originals = questions * len(tests)
+    Choice.objects.bulk_create(
+        [
+            Choice(question=copy, text=choice.text, is_correct=choice.is_correct)
+            for copy, question in zip(copies, originals)
+            for choice in question.choices.all()
+        ],
+        batch_size=batch_size,
+    )
+    return tests
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from company_dashboard.archive import BATCH_SIZE, archive_job_postings, expired_job_postings
+
+
+class Command(BaseCommand):
+    help = (
+        "Move expired job postings (closed and stale, or too old) with their applications, tests and attempts "
+        "into the read-only archive tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inactive-days', type=int, default=settings.JOB_ARCHIVE_INACTIVE_DAYS,
+            help="Archive closed postings not edited for this many days (0 to skip).",
+        )
+        parser.add_argument(
+            '--max-age-days', type=int, default=settings.JOB_ARCHIVE_MAX_AGE_DAYS,
+            help="Archive postings created this many days ago, open or not (0 to skip).",
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Postings moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the postings that would be archived.")
+
+    def handle(self, *args, **options):
+        expired = expired_job_postings(options['inactive_days'], options['max_age_days'])
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} job postings would be archived.")
+            return
+        count = archive_job_postings(expired, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {count} job postings."))
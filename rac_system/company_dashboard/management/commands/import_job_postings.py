@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from candidate_test.models import Test
+from company_dashboard.imports import BATCH_SIZE, FORMATS, ImportFileError, file_format, import_job_postings, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import job postings for a company from a CSV or JSON file, validated with the job posting form's rules "
+        "and inserted in bulk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row, or JSON list of objects.")
+        parser.add_argument('--company', required=True, help="Email of the company user the postings belong to.")
+        parser.add_argument('--format', choices=FORMATS, help="File format (default: from the file extension).")
+        parser.add_argument('--test-template', type=int, help="Id of one of the company's tests to copy to every posting.")
+        parser.add_argument('--skip-invalid', action='store_true', help="Import the valid rows even if some are invalid.")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the rows.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Rows per INSERT.")
+
+    def handle(self, *args, **options):
+        try:
+            company = get_user_model().objects.get(email=options['company'], role='COMPANY')
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No company user with email {options['company']}")
+        test_template = None
+        if options['test_template'] is not None:
+            try:
+                test_template = Test.objects.get(pk=options['test_template'], job_post__company=company)
+            except Test.DoesNotExist:
+                raise CommandError(f"The company has no test with id {options['test_template']}")
+
+        path = Path(options['path'])
+        fmt = options['format'] or file_format(path.name)
+        if fmt is None:
+            raise CommandError(f"Can't tell the format of {path.name}; pass --format")
+        try:
+            rows = read_rows(path.read_bytes(), fmt)
+        except (OSError, ImportFileError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        result = import_job_postings(
+            rows, company, test_template=test_template, skip_invalid=options['skip_invalid'],
+            dry_run=options['dry_run'], batch_size=options['batch_size'],
+        )
+        for error in result.errors:
+            messages = '; '.join(
+                f"{field}: {field_error['message']}" for field, field_errors in error.fields.items()
+                for field_error in field_errors
+            )
+            self.stderr.write(f"Row {error.row}: {messages}")
+
+        valid = len(rows) - len(result.errors)
+        if options['dry_run']:
+            self.stdout.write(f"{valid} of {len(rows)} rows are valid.")
+        elif result.imported:
+            self.stdout.write(self.style.SUCCESS(f"Imported {result.imported} job postings."))
+        elif result.errors:
+            raise CommandError(f"{len(result.errors)} invalid rows; nothing imported (use --skip-invalid to import the rest).")
+        else:
+            self.stdout.write("No job postings to import.")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from company_dashboard.counters import BATCH_SIZE, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every job posting's applicant and test counters from the applications and attempts, "
+        "e.g. after bulk changes that bypass the counters or to reset max scores after deletions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Postings recomputed per UPDATE.")
+
+    def handle(self, *args, **options):
+        count = reconcile_counters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled the counters of {count} job postings."))
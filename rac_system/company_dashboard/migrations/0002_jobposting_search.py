@@ -0,0 +1,81 @@
+from django.db import migrations, models
+
+FTS_TABLE = 'company_dashboard_jobposting_fts'
+JOB_TABLE = 'company_dashboard_jobposting'
+GIN_INDEX = 'company_das_search_gin_idx'
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, required_skills, content='{JOB_TABLE}', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {JOB_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {JOB_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+    END
+    """,
+    # Only edits to the searched columns touch the index.
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, description, required_skills ON {JOB_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END
+    """,
+    # Index the postings that already exist.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    elif schema_editor.connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        # The same expression company_dashboard.search queries with.
+        JobPosting = apps.get_model('company_dashboard', 'JobPosting')
+        schema_editor.add_index(JobPosting, GinIndex(
+            SearchVector('title', 'description', 'required_skills', config='english'), name=GIN_INDEX,
+        ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+    elif schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['is_active', '-created_at'], name='company_das_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_dashboard', '0002_jobposting_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobposting',
+            name='company_das_active_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='company_das_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['company', '-created_at', '-id'], name='company_das_owner_created_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:14
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+from company_dashboard.search import create_sqlite_triggers
+
+
+def count_existing(apps, schema_editor):
+    JobPosting = apps.get_model('company_dashboard', 'JobPosting')
+    Application = apps.get_model('authentication_usertype', 'Application')
+    CandidateTestAttempt = apps.get_model('candidate_test', 'CandidateTestAttempt')
+
+    counters = {}
+    for row in Application.objects.values('job_posting').annotate(count=Count('pk')):
+        counters.setdefault(row['job_posting'], {})['applicant_count'] = row['count']
+    attempts = (
+        CandidateTestAttempt.objects.filter(is_completed=True, job_post__isnull=False)
+        .values('job_post').annotate(count=Count('pk'), total=Sum('score'), best=Max('score'))
+    )
+    for row in attempts:
+        counters.setdefault(row['job_post'], {}).update(
+            completed_attempts=row['count'], score_total=row['total'] or 0, max_score=row['best'],
+        )
+    for pk, fields in counters.items():
+        JobPosting.objects.filter(pk=pk).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_dashboard', '0003_jobposting_keyset_indexes'),
+        ('authentication_usertype', '0003_application'),
+        ('candidate_test', '0001_initial'),
+    ]
+
+    operations = [
+        # Removing the columns again rebuilds the table too
+        migrations.RunPython(migrations.RunPython.noop, create_sqlite_triggers),
+        migrations.AddField(
+            model_name='jobposting',
+            name='applicant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='completed_attempts',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='max_score',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='score_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # Adding the columns rebuilt the table on SQLite, dropping the search triggers
+        migrations.RunPython(create_sqlite_triggers, migrations.RunPython.noop),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_dashboard', '0004_jobposting_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['-created_at', '-id'], name='company_das_closed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['-created_at', '-id'], name='company_das_created_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication_usertype', '0004_hot_path_indexes'),
+        ('company_dashboard', '0005_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJobPosting',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('required_skills', models.TextField(blank=True, null=True)),
+                ('minimum_experience', models.IntegerField(blank=True, null=True)),
+                ('minimum_salary', models.IntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('applicant_count', models.PositiveIntegerField(default=0)),
+                ('completed_attempts', models.PositiveIntegerField(default=0)),
+                ('score_total', models.PositiveIntegerField(default=0)),
+                ('max_score', models.IntegerField(blank=True, null=True)),
+                ('tests', models.JSONField(default=list)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_job_postings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to='authentication_usertype.candidateprofile')),
+                ('job_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='company_dashboard.archivedjobposting')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTestAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('test_title', models.CharField(max_length=255)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('score', models.IntegerField(blank=True, null=True)),
+                ('is_completed', models.BooleanField()),
+                ('answers', models.JSONField(default=list)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_test_attempts', to='authentication_usertype.candidateprofile')),
+                ('job_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='company_dashboard.archivedjobposting')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedjobposting',
+            index=models.Index(fields=['company', '-archived_at', '-id'], name='company_das_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedapplication',
+            index=models.Index(fields=['candidate', '-created_at', '-id'], name='company_das_arch_app_cand_idx'),
+        ),
+    ]
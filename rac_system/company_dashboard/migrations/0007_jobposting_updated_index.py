@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_dashboard', '0006_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['updated_at'], name='company_das_updated_idx'),
+        ),
+    ]
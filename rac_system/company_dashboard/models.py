@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
 
+# Maintained with F() updates only, see company_dashboard.counters
+COUNTER_FIELDS = ('applicant_count', 'completed_attempts', 'score_total', 'max_score')
+
 class JobPosting(models.Model):
     """
     Model representing a job posting created by a company.
@@ -16,10 +19,129 @@ class JobPosting(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Dashboard stats, maintained by company_dashboard.counters
+    applicant_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_attempts = models.PositiveIntegerField(default=0, editable=False)
+    score_total = models.PositiveIntegerField(default=0, editable=False)
+    max_score = models.IntegerField(null=True, blank=True, editable=False)
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Editing a posting must not write back counters it loaded earlier.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_score(self):
+        """Mean score of the completed test attempts, or None without any."""
+        if not self.completed_attempts:
+            return None
+        return self.score_total / self.completed_attempts
+
     class Meta:
         #  Order job postings by creation date in descending order
         ordering = ['-created_at']
+        indexes = [
+            # Open listings and a company's postings, newest first, in the
+            # (-created_at, -id) order core.pagination pages them by. Partial,
+            # since SQLite cannot seek on a bare boolean "WHERE is_active".
+            # Full-text search is indexed separately, see company_dashboard.search.
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='company_das_active_created_idx',
+            ),
+            models.Index(fields=['company', '-created_at', '-id'], name='company_das_owner_created_idx'),
+            # Closed listings, and all listings regardless of status
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_active=False), name='company_das_closed_created_idx',
+            ),
+            models.Index(fields=['-created_at', '-id'], name='company_das_created_idx'),
+            # Closed postings by last edit, for the archive's inactivity rule
+            models.Index(fields=['updated_at'], name='company_das_updated_idx'),
+        ]
 
+
+
+# --- Archive (read-only; written by company_dashboard.archive) ---
+
+class ArchivedJobPosting(models.Model):
+    """
+    An expired job posting moved out of JobPosting, keeping its id. Its
+    tests are kept as a snapshot in `tests`:
+    [{'title', 'description', 'questions': [{'text', 'points', 'choices': [{'text', 'is_correct'}]}]}].
+    """
+    id = models.BigIntegerField(primary_key=True)
+    company = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_job_postings')
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    required_skills = models.TextField(blank=True, null=True)
+    minimum_experience = models.IntegerField(null=True, blank=True)
+    minimum_salary = models.IntegerField(null=True, blank=True)
+    is_active = models.BooleanField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    applicant_count = models.PositiveIntegerField(default=0)
+    completed_attempts = models.PositiveIntegerField(default=0)
+    score_total = models.PositiveIntegerField(default=0)
+    max_score = models.IntegerField(null=True, blank=True)
+    tests = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            # A company's history, newest archived first (keyset-paginated)
+            models.Index(fields=['company', '-archived_at', '-id'], name='company_das_archived_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def average_score(self):
+        if not self.completed_attempts:
+            return None
+        return self.score_total / self.completed_attempts
+
+
+class ArchivedApplication(models.Model):
+    """An Application to an archived posting."""
+    job_posting = models.ForeignKey(ArchivedJobPosting, on_delete=models.CASCADE, related_name='applications')
+    candidate = models.ForeignKey(
+        'authentication_usertype.CandidateProfile', on_delete=models.CASCADE, related_name='archived_applications',
+    )
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['candidate', '-created_at', '-id'], name='company_das_arch_app_cand_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate} - {self.job_posting} ({self.status})"
+
+
+class ArchivedTestAttempt(models.Model):
+    """
+    A CandidateTestAttempt on one of an archived posting's tests, with its
+    answers as [{'question', 'choice', 'is_correct'}].
+    """
+    job_posting = models.ForeignKey(ArchivedJobPosting, on_delete=models.CASCADE, related_name='attempts')
+    candidate = models.ForeignKey(
+        'authentication_usertype.CandidateProfile', on_delete=models.CASCADE, related_name='archived_test_attempts',
+    )
+    test_title = models.CharField(max_length=255)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField(null=True, blank=True)
+    score = models.IntegerField(null=True, blank=True)
+    is_completed = models.BooleanField()
+    answers = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.candidate} on '{self.test_title}'"
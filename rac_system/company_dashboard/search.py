@@ -0,0 +1,97 @@
+"""
+Full-text search over job postings (title, description, required_skills).
+
+Backed by an index the database maintains itself, created in migration
+0002_jobposting_search:
+- SQLite: an external-content FTS5 table, company_dashboard_jobposting_fts,
+  kept in step with company_dashboard_jobposting by triggers.
+- PostgreSQL: a GIN index on search_vector(), which queries must use
+  unchanged for the planner to pick the index.
+
+SQLite rebuilds the posting table for most schema changes (adding a NOT
+NULL column, for one), which drops its triggers: migrations that do must
+run create_sqlite_triggers() afterwards.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'company_dashboard_jobposting_fts'
+JOB_TABLE = 'company_dashboard_jobposting'
+SEARCH_FIELDS = ('title', 'description', 'required_skills')
+SEARCH_CONFIG = 'english'
+
+# Words of a query; everything else (FTS5 operators, quotes) is dropped.
+WORD_RE = re.compile(r'\w+')
+
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {JOB_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {JOB_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+    END
+    """,
+    # Only edits to the searched columns touch the index.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF title, description, required_skills ON {JOB_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END
+    """,
+]
+
+
+def create_sqlite_triggers(apps, schema_editor):
+    """
+    RunPython operation (re)creating the triggers that keep the FTS5 table in
+    step with the posting table, after SQLite rebuilt the table.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def search_vector():
+    """The indexed tsvector expression over SEARCH_FIELDS (PostgreSQL only)."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def fts5_query(text):
+    """
+    An FTS5 MATCH expression requiring every word of the user's query, each
+    as a quoted prefix ("pyth" finds "python"). '' when there are no words.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text))
+
+
+def search_job_postings(job_postings, text):
+    """
+    Narrow a JobPosting queryset to postings matching every word of `text`
+    through the full-text index. An empty query returns the queryset as is.
+    """
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery
+        if not WORD_RE.search(text):
+            return job_postings
+        return job_postings.annotate(search=search_vector()).filter(
+            search=SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch'),
+        )
+
+    query = fts5_query(text)
+    if not query:
+        return job_postings
+    return job_postings.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [query]),
+    )
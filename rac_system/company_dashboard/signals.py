@@ -0,0 +1,55 @@
+"""
+Keep the per-posting counters (see company_dashboard.counters) in step with
+applications and test attempts, and announce postings created in bulk.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from authentication_usertype.models import Application
+from candidate_test.models import CandidateTestAttempt
+
+from .counters import applications_added, attempt_deleted
+from .models import JobPosting
+
+# Sent with job_postings=[...] after postings are created with bulk_create(),
+# which sends no post_save (see company_dashboard.imports).
+job_postings_created = Signal()
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        applications_added([instance.job_posting_id])
+
+
+@receiver(m2m_changed, sender=Application)
+def applied_jobs_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # applied_jobs.add() bulk-creates applications without post_save
+    # (removals come through post_delete).
+    if action == 'post_add' and pk_set:
+        if reverse:
+            applications_added([instance.pk], len(pk_set))
+        else:
+            applications_added(pk_set)
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, origin=None, **kwargs):
+    if not _posting_deleted(origin):
+        applications_added([instance.job_posting_id], -1)
+
+
+@receiver(post_delete, sender=CandidateTestAttempt)
+def test_attempt_deleted(sender, instance, origin=None, **kwargs):
+    if not _posting_deleted(origin):
+        attempt_deleted(instance)
+
+
+def _posting_deleted(origin):
+    """
+    Whether a delete cascades from postings (deleted or archived), whose
+    counters go with them: no UPDATE per application or attempt.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is JobPosting
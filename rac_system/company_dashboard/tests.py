@@ -1,3 +1,498 @@
+import base64
+import datetime
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication_usertype.models import Application, CandidateProfile
+from candidate_dashboard.caching import listings_version
+from candidate_dashboard.models import JobRecommendation
+from candidate_test.models import CandidateAnswer, CandidateTestAttempt, Choice, Question, Test
+
+from .archive import archive_job_postings, expired_job_postings
+from .models import ArchivedJobPosting, JobPosting
+
+
+class ApplicationTests(TestCase):
+    """Applications carry a status, re-applying is idempotent and companies change statuses in bulk."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.job = JobPosting.objects.create(company=self.company, title="Backend", description="", required_skills="python")
+        self.candidates = [
+            CandidateProfile.objects.create(
+                user=User.objects.create_user(f'candidate{i}@example.com', 'password', name=f'Candidate {i}', role='CANDIDATE'),
+                experience=3, expertise="Python",
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.company)
+
+    def applicants_url(self, job=None):
+        return reverse('job_postings:job_applicants', args=[(job or self.job).id])
+
+    def test_apply_is_idempotent_and_reopens_withdrawn(self):
+        candidate = self.candidates[0]
+        self.assertTrue(JobRecommendation.objects.filter(candidate=candidate, job_posting=self.job).exists())
+        application, created = Application.objects.apply(candidate, self.job)
+        self.assertTrue(created)
+        self.assertFalse(JobRecommendation.objects.filter(candidate=candidate, job_posting=self.job).exists())
+
+        self.assertEqual(Application.objects.apply(candidate, self.job), (application, False))
+        Application.objects.filter(pk=application.pk).set_status(Application.WITHDRAWN)
+        application, created = Application.objects.apply(candidate, self.job)
+        self.assertFalse(created)
+        self.assertEqual(application.status, Application.APPLIED)
+        self.assertEqual(Application.objects.count(), 1)
+        self.assertEqual(list(candidate.applied_jobs.all()), [self.job])
+
+    def test_set_status_updates_in_one_query(self):
+        for candidate in self.candidates:
+            Application.objects.apply(candidate, self.job)
+        Application.objects.filter(candidate=self.candidates[0]).set_status(Application.REJECTED)
+        with self.assertNumQueries(1):
+            changed = self.job.applications.set_status(Application.REJECTED)
+        self.assertEqual(changed, 2)
+        self.assertEqual(set(self.job.applications.values_list('status', flat=True)), {Application.REJECTED})
+
+    def test_bulk_status_change_ticked_or_all(self):
+        applications = [Application.objects.apply(candidate, self.job)[0] for candidate in self.candidates]
+        response = self.client.post(
+            self.applicants_url() + '?status=applied',
+            {'status': Application.SHORTLISTED, 'applications': [applications[0].pk]},
+        )
+        self.assertRedirects(response, self.applicants_url() + '?status=applied')
+        self.assertEqual(Application.objects.filter(status=Application.SHORTLISTED).count(), 1)
+
+        # "All" covers the filtered list only: the shortlisted one is left alone
+        self.client.post(self.applicants_url() + '?status=applied', {'status': Application.REJECTED, 'select_all': 'on'})
+        self.assertEqual(
+            sorted(Application.objects.values_list('status', flat=True)),
+            [Application.REJECTED, Application.REJECTED, Application.SHORTLISTED],
+        )
+
+    def test_applicants_paginated_and_scoped_to_owner(self):
+        User = get_user_model()
+        for candidate in self.candidates:
+            Application.objects.apply(candidate, self.job)
+        response = self.client.get(self.applicants_url())
+        self.assertEqual(len(response.context['applications']), 3)
+        self.assertEqual(response.context['applications'].object_list[0].candidate, self.candidates[-1])
+
+        other = User.objects.create_user('other@example.com', 'password', name='Other', role='COMPANY')
+        other_job = JobPosting.objects.create(company=other, title="Other", description="", required_skills="go")
+        self.assertEqual(self.client.get(self.applicants_url(other_job)).status_code, 404)
+        # Applications of another posting can't be ticked either
+        foreign, _ = Application.objects.apply(self.candidates[0], other_job)
+        self.client.post(self.applicants_url(), {'status': Application.HIRED, 'applications': [foreign.pk]})
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, Application.APPLIED)
+
+
+class JobCounterTests(TestCase):
+    """Per-posting counters follow applications and test submissions, and reconcile recomputes them."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.job = JobPosting.objects.create(company=self.company, title="Backend", description="", required_skills="python")
+        self.users = [
+            User.objects.create_user(f'candidate{i}@example.com', 'password', name=f'Candidate {i}', role='CANDIDATE')
+            for i in range(2)
+        ]
+        self.candidates = [
+            CandidateProfile.objects.create(user=user, experience=3, expertise="Python") for user in self.users
+        ]
+        self.test = Test.objects.create(job_post=self.job, title="Python")
+        self.questions = []
+        for points in (2, 3):
+            question = Question.objects.create(test=self.test, text="?", points=points)
+            self.questions.append((
+                question,
+                Choice.objects.create(question=question, text="Right", is_correct=True),
+                Choice.objects.create(question=question, text="Wrong"),
+            ))
+
+    def counters(self):
+        self.job.refresh_from_db()
+        return (self.job.applicant_count, self.job.completed_attempts, self.job.score_total, self.job.max_score)
+
+    def submit(self, user, right):
+        """Take the test as `user`, answering the first `right` questions correctly."""
+        self.client.force_login(user)
+        answers = {
+            f'question_{question.id}': (correct if i < right else wrong).id
+            for i, (question, correct, wrong) in enumerate(self.questions)
+        }
+        return self.client.post(reverse('candidate_test:take_test', args=[self.test.id]), answers)
+
+    def test_applications_counted(self):
+        Application.objects.apply(self.candidates[0], self.job)
+        Application.objects.apply(self.candidates[0], self.job)
+        self.candidates[1].applied_jobs.add(self.job)
+        self.assertEqual(self.counters()[0], 2)
+        self.candidates[1].applied_jobs.remove(self.job)
+        self.assertEqual(self.counters()[0], 1)
+
+    def test_submissions_counted(self):
+        response = self.submit(self.users[0], right=2)
+        attempt = CandidateTestAttempt.objects.get(candidate=self.candidates[0])
+        self.assertRedirects(response, reverse('candidate_test:test_results', args=[attempt.id]))
+        self.submit(self.users[1], right=1)
+        self.assertEqual(self.counters(), (0, 2, 7, 5))
+        self.assertEqual(self.job.average_score, 3.5)
+
+        attempt.delete()
+        self.assertEqual(self.counters(), (0, 1, 2, 5))
+
+    def test_reconcile_recomputes_counters(self):
+        Application.objects.apply(self.candidates[0], self.job)
+        self.submit(self.users[0], right=1)
+        self.submit(self.users[1], right=2)
+        expected = self.counters()
+        CandidateTestAttempt.objects.filter(candidate=self.candidates[1]).delete()
+        JobPosting.objects.update(applicant_count=9)
+
+        out = StringIO()
+        call_command('reconcile_job_counters', batch_size=1, stdout=out)
+        self.assertIn("1 job postings", out.getvalue())
+        self.assertEqual(self.counters(), (1, 1, 2, 2))
+        self.assertEqual(expected, (1, 2, 7, 5))
+
+    def test_dashboard_stats_in_one_query(self):
+        self.submit(self.users[0], right=2)
+        for i in range(5):
+            JobPosting.objects.create(company=self.company, title=f"Job {i}", description="")
+        self.client.force_login(self.company)
+        self.client.get(reverse('job_postings:company_dashboard'))  # Warm the cached count
+        # Session, user, and the page of postings with their stats
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('job_postings:company_dashboard'))
+        self.assertContains(response, "5.0 / 5")
+
+
+class QueryPlanTests(TestCase):
+    """
+    Every statement the job pages run is answered from an index: EXPLAIN
+    QUERY PLAN shows no full table scan and no temporary sort.
+    """
+
+    def setUp(self):
+        cache.clear()  # Cached listing pages and counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        self.candidate = CandidateProfile.objects.create(user=self.user, experience=3, expertise="Python, SQL")
+        self.jobs = [
+            JobPosting.objects.create(
+                company=self.company, title=f"Job {i}", description="", required_skills="python", is_active=i % 2 == 0,
+            )
+            for i in range(4)
+        ]
+        self.application, _ = Application.objects.apply(self.candidate, self.jobs[0])
+        self.test = Test.objects.create(job_post=self.jobs[0], title="Python")
+        question = Question.objects.create(test=self.test, text="?")
+        self.choice = Choice.objects.create(question=question, text="Right", is_correct=True)
+        self.question = question
+
+    def assertIndexed(self, user, method, url, data=None):
+        """
+        Request `url` as `user` and check the plan of every statement it ran:
+        a SCAN must go through an index and be bounded, by a LIMIT or by a
+        SEARCH it drives, or be a full-text MATCH. Returns the statements
+        checked.
+        """
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data or {})
+        self.assertLess(response.status_code, 400, url)
+        checked = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            bounded = ' LIMIT ' in sql or any(step.startswith('SEARCH ') for step in plan)
+            for step in plan:
+                match = ' VIRTUAL TABLE INDEX ' in step and ':M' in step  # FTS5 MATCH
+                scan = step.startswith('SCAN ') and not step.startswith('SCAN subquery') and not match
+                full_scan = scan and (' USING ' not in step or not bounded)
+                self.assertFalse(full_scan or 'TEMP B-TREE' in step, f"{url}: {step}\n{sql}")
+            checked.append(sql)
+        return checked
+    def test_company_pages(self):
+        applicants = reverse('job_postings:job_applicants', args=[self.jobs[0].id])
+        self.assertIndexed(self.company, 'get', reverse('job_postings:company_dashboard'))
+        self.assertIndexed(self.company, 'get', reverse('job_postings:job_history'))
+        self.assertIndexed(self.company, 'get', applicants)
+        self.assertIndexed(self.company, 'get', applicants, {'status': 'all'})
+        self.assertIndexed(self.company, 'post', applicants, {'status': Application.SHORTLISTED, 'select_all': 'on'})
+
+    def test_candidate_pages(self):
+        listings = reverse('candidate_dashboard:job_listings')
+        self.assertIndexed(self.user, 'get', reverse('candidate_dashboard:dashboard'))
+        for status in ('active', 'inactive', 'all'):
+            checked = self.assertIndexed(self.user, 'get', listings, {'status': status})
+            self.assertTrue(any('candidate_dashboard_listingsversion' in sql for sql in checked))
+        self.assertIndexed(self.user, 'get', listings, {'company': self.company.id, 'experience': 2, 'minimum_salary': 1})
+        self.assertIndexed(self.user, 'get', reverse('candidate_dashboard:job_detail', args=[self.jobs[0].id]))
+        self.assertIndexed(self.user, 'post', reverse('candidate_dashboard:apply_for_job', args=[self.jobs[2].id]))
+        self.assertIndexed(self.user, 'get', reverse('api_v1:job_list'))
+        self.assertIndexed(self.user, 'get', reverse('api_v1:job_detail', args=[self.jobs[0].id]))
+
+    def test_assessment_pages(self):
+        take_test = reverse('candidate_test:take_test', args=[self.test.id])
+        self.assertIndexed(self.user, 'get', take_test)
+        self.assertIndexed(self.user, 'post', take_test, {f'question_{self.question.id}': self.choice.id})
+        attempt = CandidateTestAttempt.objects.get(candidate=self.candidate)
+        self.assertIndexed(self.user, 'get', reverse('candidate_test:test_results', args=[attempt.id]))
+
+
+def tampered_cursor(payload):
+    """A cursor carrying `payload` (JSON text), in encode_cursor()'s format."""
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+# Well-formed cursors no page ever hands out
+TAMPERED_CURSORS = [
+    tampered_cursor(payload) for payload in (
+        '["n",["notadate","x"]]', '["p",[null,null]]', '["n",[{"a":1},1]]', '["n",[[1],1]]',
+        '["n",[true,1]]', '["n",[NaN,1]]', '["n",["2024-01-01T00:00:00",1]]',
+        '["n",["2024-01-01T00:00:00+00:00",99999999999999999999999]]', '["n",[1]]', '["x",[1,1]]',
+    )
+]
+
+
+class TamperedCursorTests(TestCase):
+    """A tampered cursor gives the first page of every paginated view, not a server error."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing pages and counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        candidate = CandidateProfile.objects.create(user=self.user, experience=3, expertise="Python")
+        self.job = JobPosting.objects.create(company=self.company, title="Job", description="", required_skills="python")
+        Application.objects.apply(candidate, self.job)
+        JobPosting.objects.create(company=self.company, title="Other", description="", required_skills="python")
+
+    def assertFirstPage(self, user, url, page_key=None):
+        if user:
+            self.client.force_login(user)
+        first = self.client.get(url)
+        for cursor in TAMPERED_CURSORS:
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 200, cursor)
+            if page_key:
+                self.assertEqual(list(response.context[page_key]), list(first.context[page_key]), cursor)
+
+    def test_company_pages(self):
+        self.assertFirstPage(self.company, reverse('job_postings:company_dashboard'), 'job_postings')
+        self.assertFirstPage(self.company, reverse('job_postings:job_history'), 'job_postings')
+        self.assertFirstPage(self.company, reverse('job_postings:job_applicants', args=[self.job.id]), 'applications')
+
+    def test_candidate_pages(self):
+        self.assertFirstPage(self.user, reverse('candidate_dashboard:dashboard'), 'recommended_jobs')
+        # The results are a cached fragment, so compare the rendered pages' status only
+        self.assertFirstPage(self.user, reverse('candidate_dashboard:job_listings'))
+
+    def test_api(self):
+        url = reverse('api_v1:job_list')
+        first = self.client.get(url).json()
+        for cursor in TAMPERED_CURSORS:
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 200, cursor)
+            self.assertEqual(response.json()['results'], first['results'], cursor)
+
+
+class ArchiveTests(TestCase):
+    """Expired postings move to the archive tables with their applications and attempts."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing pages and counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        self.candidate = CandidateProfile.objects.create(user=user, experience=3, expertise="Python")
+        self.closed = self.post_job("Closed", is_active=False, days_old=100)
+        self.recent = self.post_job("Recently closed", is_active=False, days_old=10)
+        self.open = self.post_job("Open", is_active=True, days_old=400)
+
+        Application.objects.apply(self.candidate, self.closed)
+        test = Test.objects.create(job_post=self.closed, title="Python")
+        question = Question.objects.create(test=test, text="Best language?", points=2)
+        choice = Choice.objects.create(question=question, text="Python", is_correct=True)
+        attempt = CandidateTestAttempt.objects.create(
+            candidate=self.candidate, test=test, job_post=self.closed, score=2, is_completed=True, end_time=timezone.now(),
+        )
+        CandidateAnswer.objects.create(attempt=attempt, question=question, selected_choice=choice, is_correct=True)
+        call_command('reconcile_job_counters', stdout=StringIO())
+
+    def post_job(self, title, is_active, days_old):
+        job = JobPosting.objects.create(company=self.company, title=title, description="", is_active=is_active)
+        timestamp = timezone.now() - datetime.timedelta(days=days_old)
+        JobPosting.objects.filter(pk=job.pk).update(created_at=timestamp, updated_at=timestamp)
+        return job
+
+    def test_expiry_rules(self):
+        self.assertEqual(list(expired_job_postings(inactive_days=30, max_age_days=0)), [self.closed])
+        self.assertEqual(
+            set(expired_job_postings(inactive_days=30, max_age_days=365)), {self.closed, self.open},
+        )
+        self.assertEqual(list(expired_job_postings(inactive_days=0, max_age_days=0)), [])
+
+    def test_postings_moved_with_their_history(self):
+        version = listings_version().number
+        out = StringIO()
+        call_command('archive_job_postings', inactive_days=30, max_age_days=0, batch_size=1, stdout=out)
+        self.assertIn("Archived 1 job postings", out.getvalue())
+
+        self.assertFalse(JobPosting.objects.filter(pk=self.closed.pk).exists())
+        self.assertGreater(listings_version().number, version)  # Cached job pages gone stale
+        self.assertFalse(Test.objects.exists())
+        self.assertFalse(CandidateTestAttempt.objects.exists())
+        self.assertFalse(Application.objects.exists())
+        self.assertEqual(JobPosting.objects.count(), 2)
+
+        archived = ArchivedJobPosting.objects.get(pk=self.closed.pk)
+        self.assertEqual((archived.title, archived.applicant_count, archived.max_score), ("Closed", 1, 2))
+        self.assertEqual(archived.tests[0]['questions'][0]['choices'], [{'text': "Python", 'is_correct': True}])
+        self.assertEqual(archived.applications.get().candidate, self.candidate)
+        self.assertEqual(
+            archived.attempts.get().answers, [{'question': "Best language?", 'choice': "Python", 'is_correct': True}],
+        )
+        # Gone from the search index too
+        self.client.force_login(self.candidate.user)
+        response = self.client.get(reverse('candidate_dashboard:job_listings'), {'q': 'closed', 'status': 'all'})
+        self.assertEqual(len(response.context['form'].filter(JobPosting.objects.all())), 1)
+
+    def test_no_counter_updates_while_archiving(self):
+        User = get_user_model()
+        for index in range(5):
+            user = User.objects.create_user(f'candidate{index}@example.com', 'password', name='Candidate', role='CANDIDATE')
+            Application.objects.apply(CandidateProfile.objects.create(user=user, expertise="Go"), self.closed)
+        with CaptureQueriesContext(connection) as queries:
+            archive_job_postings(expired_job_postings(inactive_days=30, max_age_days=0))
+        self.assertEqual(ArchivedJobPosting.objects.get().applications.count(), 6)
+        # No counter decrement per application or attempt
+        counter_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "company_dashboard_jobposting"')]
+        self.assertEqual(counter_updates, [])
+
+    def test_candidates_see_their_archived_applications(self):
+        archive_job_postings(expired_job_postings(inactive_days=30, max_age_days=0))
+        self.client.force_login(self.candidate.user)
+        response = self.client.get(reverse('candidate_dashboard:dashboard'))
+        self.assertEqual([application.job_posting.title for application in response.context['archived_applications']], ["Closed"])
+        self.assertContains(response, "Past Applications")
+        self.assertContains(response, "Python:\n")
+        self.assertContains(response, "2 points")
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('archive_job_postings', inactive_days=30, max_age_days=365, dry_run=True, stdout=out)
+        self.assertIn("2 job postings would be archived", out.getvalue())
+        self.assertFalse(ArchivedJobPosting.objects.exists())
+
+    def test_history_pages_read_only(self):
+        archive_job_postings(expired_job_postings(inactive_days=30, max_age_days=0))
+        self.client.force_login(self.company)
+        response = self.client.get(reverse('job_postings:job_history'))
+        self.assertEqual([job.title for job in response.context['job_postings']], ["Closed"])
+        response = self.client.get(reverse('job_postings:archived_job_posting', args=[self.closed.pk]))
+        self.assertContains(response, "Candidate")
+
+        other = get_user_model().objects.create_user('other@example.com', 'password', name='Other', role='COMPANY')
+        self.client.force_login(other)
+        self.assertEqual(
+            self.client.get(reverse('job_postings:archived_job_posting', args=[self.closed.pk])).status_code, 404,
+        )
+
+
+class JobPostingImportTests(TestCase):
+    """Bulk import validates rows like JobPostingForm and inserts them with bulk_create."""
+
+    def setUp(self):
+        cache.clear()  # Cached listing pages and counts
+        User = get_user_model()
+        self.company = User.objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        user = User.objects.create_user('candidate@example.com', 'password', name='Candidate', role='CANDIDATE')
+        self.candidate = CandidateProfile.objects.create(user=user, experience=3, expertise="Python, Go")
+        template_job = JobPosting.objects.create(company=self.company, title="Template", description="")
+        self.template = Test.objects.create(job_post=template_job, title="Python basics")
+        question = Question.objects.create(test=self.template, text="Is Python typed?", points=2)
+        Choice.objects.create(question=question, text="Dynamically", is_correct=True)
+        Choice.objects.create(question=question, text="No")
+        self.client.force_login(self.company)
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post(reverse('job_postings:import_job_postings'), {'file': upload, **data})
+
+    def test_invalid_rows_block_the_import_unless_skipped(self):
+        content = (
+            "title,description,required_skills,minimum_experience\n"
+            "Backend,Build APIs,\"python, sql\",2\n"
+            ",No title,,\n"
+            "Frontend,Build UIs,react,lots\n"
+        )
+        response = self.upload('jobs.csv', content)
+        self.assertEqual([error.row for error in response.context['errors']], [2, 3])
+        self.assertContains(response, "Enter a whole number.")
+        self.assertEqual(JobPosting.objects.count(), 1)
+
+        response = self.upload('jobs.csv', content, skip_invalid='on')
+        self.assertEqual(list(JobPosting.objects.filter(title="Backend").values_list('minimum_experience', flat=True)), [2])
+        self.assertEqual(len(response.context['errors']), 2)
+
+    def test_unreadable_files_rejected(self):
+        self.assertFormError(self.upload('jobs.txt', "title\nA\n").context['form'], 'file', "Upload a file ending in .csv or .json.")
+        response = self.upload('jobs.json', '{"title": "Not a list"}')
+        self.assertFormError(response.context['form'], 'file', "The JSON file must hold a list of objects.")
+
+    def test_command_imports_json_with_test_template(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'jobs.json'
+        path.write_text(json.dumps([
+            {'title': f"Go developer {i}", 'description': "Services", 'required_skills': "go", 'minimum_salary': 1000}
+            for i in range(30)
+        ]))
+        self.client.force_login(self.candidate.user)
+        self.client.get(reverse('candidate_dashboard:job_listings'))  # Cache the listings
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                'import_job_postings', str(path), company=self.company.email, test_template=self.template.pk, stdout=out,
+            )
+        self.assertIn("Imported 30 job postings", out.getvalue())
+        self.assertLess(len(queries), 30)  # Bulk inserts, not a query per row
 
-# Create your tests here.
+        job = JobPosting.objects.get(title="Go developer 7")
+        test = job.tests.get()
+        self.assertEqual(test.title, "Python basics")
+        self.assertEqual(
+            [(choice.text, choice.is_correct) for choice in Choice.objects.filter(question__test=test).order_by('pk')],
+            [("Dynamically", True), ("No", False)],
+        )
+        # Recommended, searchable and in the (invalidated) listings
+        self.assertEqual(self.candidate.recommendations.count(), 30)
+        response = self.client.get(reverse('candidate_dashboard:job_listings'), {'q': 'services'})
+        self.assertContains(response, "Go developer")
+        self.assertContains(self.client.get(reverse('candidate_dashboard:job_listings')), "Go developer")
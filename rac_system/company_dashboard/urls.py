@@ -6,8 +6,12 @@ app_name = 'job_postings'  # Define the app namespace
 urlpatterns = [
     path('dashboard/', views.company_dashboard, name='company_dashboard'),
     path('add/', views.add_job_posting, name='add_job_posting'),
+    path('import/', views.import_job_postings, name='import_job_postings'),
     path('edit/<int:job_posting_id>/', views.edit_job_posting, name='edit_job_posting'),
     path('delete/<int:job_posting_id>/', views.delete_job_posting, name='delete_job_posting'),
+    path('applicants/<int:job_posting_id>/', views.job_applicants, name='job_applicants'),
+    path('history/', views.job_history, name='job_history'),
+    path('history/<int:job_posting_id>/', views.archived_job_posting, name='archived_job_posting'),
     path('assign-expert/<int:job_posting_id>/', views.assign_expert_by_email, name='assign_expert_by_email'),
 ]
 
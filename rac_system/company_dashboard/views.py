@@ -1,26 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from .forms import JobPostingForm
-from .models import JobPosting
+from . import imports
+from .forms import ApplicationStatusForm, JobPostingForm, JobPostingImportForm
+from .models import ArchivedJobPosting, JobPosting
 from django.http import HttpResponseForbidden
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from core.pagination import paginate
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 # Assuming 'authentication_usertype' is the correct app name where these models reside
-from authentication_usertype.models import CompanyProfile, ExpertAssignment 
+from authentication_usertype.models import Application, CompanyProfile, ExpertAssignment
 from django.contrib import messages
 from django.urls import reverse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.sites.shortcuts import get_current_site
 import uuid  # Import uuid
+from urllib.parse import urlencode
 
 
 
 User = get_user_model()  # Get your CustomUser model
 
+# Archived postings, most recently archived first
+ARCHIVE_KEYS = ('-archived_at', '-id')
+
+# Invalid rows listed on the import page; the rest are only counted
+MAX_SHOWN_ERRORS = 50
+
 def is_company_user(user):
     return user.role == 'COMPANY'
 
@@ -31,20 +39,11 @@ def company_dashboard(request):
     View for the company dashboard, showing the company's job postings.
     (No changes here)
     """
-    # Use select_related to optimize database queries.
-    job_postings = JobPosting.objects.filter(company=request.user).order_by('-created_at')
-
-    # Pagination
-    paginator = Paginator(job_postings, 10)  # Show 10 job postings per page
-    page = request.GET.get('page')
-    try:
-        job_postings_page = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        job_postings_page = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        job_postings_page = paginator.page(paginator.num_pages)
+    # Applicant and test stats are counters on the posting rows: no per-row queries
+    job_postings = JobPosting.objects.filter(company=request.user)
+
+    # Keyset pagination: 10 job postings per page, newest first
+    job_postings_page = paginate(job_postings, request.GET.get('cursor'), 10)
     context = {
         'job_postings': job_postings_page,
     }
@@ -76,7 +75,7 @@ def add_job_posting(request):
             
             # Option 1: Redirect to a URL with the job ID (recommended)
             # Assuming 'create_test' is in the assessment app (assessment:create_test)
-            return redirect(reverse('create_test') + f'?job_id={job_posting.id}')
+            return redirect(reverse('candidate_test:create_test') + f'?job_id={job_posting.id}')
             
             # Option 2 (If you prefer the original dashboard redirect):
             # return redirect('job_postings:company_dashboard')
@@ -89,6 +88,108 @@ def add_job_posting(request):
     return render(request, 'job_postings/add_job_posting.html', {'form': form})
 
 
+@login_required
+@user_passes_test(is_company_user, login_url='home')
+def job_applicants(request, job_posting_id):
+    """
+    Applicants for one of the company's job postings, by status and newest
+    first (keyset-paginated on the (job_posting, status, created_at) index),
+    with bulk status changes.
+    """
+    job_posting = get_object_or_404(JobPosting, id=job_posting_id, company=request.user)
+    status = request.GET.get('status', Application.APPLIED)
+    applications = job_posting.applications.select_related('candidate__user')
+    if status in dict(Application.STATUS_CHOICES):
+        applications = applications.filter(status=status)
+    else:
+        status = 'all'
+
+    if request.method == 'POST':
+        form = ApplicationStatusForm(request.POST, job_posting=job_posting)
+        if form.is_valid():
+            selected = applications if form.cleaned_data['select_all'] else form.cleaned_data['applications']
+            changed = Application.objects.filter(pk__in=selected.values('pk')).set_status(form.cleaned_data['status'])
+            messages.success(request, f"{changed} application(s) moved to {form.cleaned_data['status']}.")
+            return redirect(f"{reverse('job_postings:job_applicants', args=[job_posting.id])}?status={status}")
+        messages.error(request, " ".join(form.non_field_errors()) or "Could not change the applications.")
+    form = ApplicationStatusForm(job_posting=job_posting)
+
+    context = {
+        'job_posting': job_posting,
+        'applications': paginate(applications, request.GET.get('cursor'), 25),
+        'status': status,
+        'statuses': Application.STATUS_CHOICES,
+        'form': form,
+        'query': urlencode({'status': status}),
+    }
+    return render(request, 'job_postings/job_applicants.html', context)
+
+
+@login_required
+@user_passes_test(is_company_user, login_url='home')
+def import_job_postings(request):
+    """
+    Create many job postings at once from an uploaded CSV or JSON file,
+    validated row by row with JobPostingForm's rules.
+    """
+    result = None
+    if request.method == 'POST':
+        form = JobPostingImportForm(request.POST, request.FILES, company=request.user)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                rows = imports.read_rows(upload.read(), imports.file_format(upload.name))
+            except imports.ImportFileError as e:
+                form.add_error('file', str(e))
+            else:
+                result = imports.import_job_postings(
+                    rows, request.user, test_template=form.cleaned_data['test_template'],
+                    skip_invalid=form.cleaned_data['skip_invalid'],
+                )
+                if result.imported:
+                    messages.success(request, f"Imported {result.imported} job posting(s).")
+                    if not result.errors:
+                        return redirect('job_postings:company_dashboard')
+                elif result.errors:
+                    messages.error(request, "Nothing was imported: correct the rows below and upload the file again.")
+                else:
+                    messages.info(request, "The file has no job postings.")
+    else:
+        form = JobPostingImportForm(company=request.user)
+
+    context = {
+        'form': form,
+        'result': result,
+        'errors': result.errors[:MAX_SHOWN_ERRORS] if result else [],
+        'max_shown_errors': MAX_SHOWN_ERRORS,
+    }
+    return render(request, 'job_postings/import_job_postings.html', context)
+
+
+@login_required
+@user_passes_test(is_company_user, login_url='home')
+def job_history(request):
+    """The company's archived job postings, most recently archived first."""
+    archived = ArchivedJobPosting.objects.filter(company=request.user)
+    context = {
+        'job_postings': paginate(archived, request.GET.get('cursor'), 10, keys=ARCHIVE_KEYS),
+    }
+    return render(request, 'job_postings/job_history.html', context)
+
+
+@login_required
+@user_passes_test(is_company_user, login_url='home')
+def archived_job_posting(request, job_posting_id):
+    """An archived posting with its applications and test attempts (read-only)."""
+    job_posting = get_object_or_404(ArchivedJobPosting, id=job_posting_id, company=request.user)
+    context = {
+        'job_posting': job_posting,
+        'applications': job_posting.applications.select_related('candidate__user').order_by('-created_at', '-id'),
+        'attempts': job_posting.attempts.select_related('candidate__user').order_by('-start_time', '-id'),
+    }
+    return render(request, 'job_postings/archived_job_posting.html', context)
+
+
 @login_required
 @user_passes_test(is_company_user, login_url='home')
 def edit_job_posting(request, job_posting_id):
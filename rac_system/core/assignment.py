@@ -0,0 +1,158 @@
+"""
+Capacity-constrained expert assignment.
+
+Instead of sending every candidate to their single best expert, each expert
+takes at most `capacity` candidates and the total relevancy is maximized.
+The solver is Bertsekas' auction algorithm with epsilon-scaling (a dual,
+Hungarian-style method) over the sparse candidate/expert graph from
+SkillIndex (or TfidfIndex): only pairs sharing a skill are edges, and each candidate can
+always fall back to "no expert" at value 0.
+
+The result is within (candidates + expert slots) * epsilon of the optimal total.
+"""
+import heapq
+import itertools
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from .matching import SkillIndex
+from .tfidf import TfidfIndex
+
+# Final bid increment; the total is optimal up to (bidders * EPSILON).
+EPSILON = 1e-4
+
+# Factor epsilon shrinks by between auction phases.
+EPSILON_SCALING = 5
+
+# Bids (and candidates scored) between on_progress() calls.
+PROGRESS_EVERY = 1024
+
+AssignmentResult = namedtuple('AssignmentResult', ['matches', 'objective', 'solve_time'])
+
+
+def assign_with_capacity(experts, candidates, capacity, engine=None, epsilon=EPSILON, on_progress=None):
+    """
+    Assign candidates to experts, at most `capacity` candidates per expert,
+    maximizing the sum of relevancy scores. on_progress(), if given, is
+    called every PROGRESS_EVERY candidates scored or bids made, so a long
+    solve can report that it is alive.
+
+    Returns an AssignmentResult whose matches are (expert, relevancy_score)
+    in candidate order, (None, 0) for unassigned candidates.
+    """
+    experts = list(experts)
+    candidates = list(candidates)
+    started = time.perf_counter()
+
+    # Any engine with per-candidate sparse scores works (e.g. TfidfIndex).
+    if engine is None or not isinstance(engine, (SkillIndex, TfidfIndex)):
+        engine = SkillIndex([expert.expertise for expert in experts])
+    edges = []
+    for candidate in candidates:
+        edges.append(engine.scores(getattr(candidate, engine.input_field)))
+        if on_progress and not len(edges) % PROGRESS_EVERY:
+            on_progress()
+
+    rows = _auction(edges, len(experts), capacity, epsilon, on_progress)
+
+    matches = []
+    objective = 0.0
+    for (columns, values), row in zip(edges, rows):
+        if row is None:
+            matches.append((None, 0))
+            continue
+        score = float(values[np.searchsorted(columns, row)])
+        matches.append((experts[row], score))
+        objective += score
+    return AssignmentResult(matches, objective, time.perf_counter() - started)
+
+
+def _auction(edges, expert_count, capacity, epsilon, on_progress=None):
+    """
+    Run the auction over `edges` (per candidate: sorted expert rows and their
+    values). Returns the assigned expert row (or None) per candidate.
+
+    The problem is made symmetric so epsilon-scaling stays valid: besides the
+    expert slots there is a "no expert" group with one slot per bidding
+    candidate, and one zero-value dummy bidder per expert slot. A dummy can
+    take any slot, a candidate any slot it has an edge to or a "no expert" one.
+    """
+    assigned = [None] * len(edges)
+    bidders = [index for index, (columns, _) in enumerate(edges) if len(columns)]
+    if not bidders or capacity < 1:
+        return assigned
+
+    # Slots an expert can never fill are dropped: at most one per candidate
+    # with an edge to it.
+    degree = np.bincount(np.concatenate([edges[index][0] for index in bidders]), minlength=expert_count)
+    group_sizes = np.minimum(degree, capacity).tolist() + [len(bidders)]
+    none_group = expert_count
+    dummy_count = sum(group_sizes[:none_group])
+    max_value = max(edges[index][1].max() for index in bidders)
+
+    # Bidders 0..len(bidders)-1 are candidates, the rest zero-value dummies.
+    # Every group keeps its identical slots in a min-heap of
+    # [price, tie-breaker, holder]; a bidder always takes the cheapest slot.
+    counter = itertools.count()
+    slots = [[[0.0, next(counter), None] for _ in range(size)] for size in group_sizes]
+    prices = np.array([0.0 if size else np.inf for size in group_sizes])  # cheapest slot per group
+    holder_group = [None] * (len(bidders) + dummy_count)
+
+    # Per candidate bidder: the groups it can bid on and their values,
+    # with the "no expert" group (value 0) appended.
+    options = [
+        (np.append(edges[index][0], none_group), np.append(edges[index][1], 0.0))
+        for index in bidders
+    ]
+
+    phase_epsilon = max(max_value / EPSILON_SCALING, epsilon)
+    bids = 0
+    while True:
+        # Every phase restarts the assignment but keeps the prices.
+        for heap in slots:
+            for slot in heap:
+                slot[2] = None
+        holder_group = [None] * len(holder_group)
+        queue = deque(range(len(holder_group)))
+
+        while queue:
+            bids += 1
+            if on_progress and not bids % PROGRESS_EVERY:
+                on_progress()
+            bidder = queue.popleft()
+            if bidder < len(options):
+                groups, values = options[bidder]
+                net = values - prices[groups]
+                best = int(net.argmax())
+                group = int(groups[best])
+            else:
+                net = -prices
+                best = group = int(net.argmax())
+            best_net = float(net[best])
+            net[best] = -np.inf
+            second_net = float(net.max())
+
+            heap = slots[group]
+            # Another slot of the same group is also an alternative.
+            if len(heap) > 1:
+                second_price = heap[1][0] if len(heap) == 2 else min(heap[1][0], heap[2][0])
+                second_net = max(second_net, best_net + heap[0][0] - second_price)
+
+            evicted = heap[0][2]
+            heapq.heapreplace(heap, [heap[0][0] + best_net - second_net + phase_epsilon, next(counter), bidder])
+            prices[group] = heap[0][0]
+            holder_group[bidder] = group
+            if evicted is not None:
+                holder_group[evicted] = None
+                queue.append(evicted)
+
+        if phase_epsilon <= epsilon:
+            break
+        phase_epsilon = max(phase_epsilon / EPSILON_SCALING, epsilon)
+
+    for bidder, index in enumerate(bidders):
+        if holder_group[bidder] != none_group:
+            assigned[index] = holder_group[bidder]
+    return assigned
@@ -0,0 +1,150 @@
+"""
+Synthetic data and measurements for benchmarking matching.
+
+Used by the generate_match_csv and benchmark_matching commands. Skills are
+drawn from a Zipf distribution, so a few skills are very common and most
+are rare, as in real expertise lists; a skew of 0 draws them uniformly.
+"""
+import bisect
+import csv
+import hashlib
+import itertools
+import resource
+import sys
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import transaction
+
+from .ingest import CHUNK_SIZE, content_hash, index_expert_skills, write_scores
+from .matching import best_matches, build_engine
+
+# Pseudo-engine for the original per-pair calculate_relevancy loop.
+BASELINE_ENGINE = 'baseline'
+
+
+def skill_sampler(vocabulary, skew, rng):
+    """
+    Return sample(k): k distinct skills drawn with probability proportional
+    to 1 / rank**skew.
+    """
+    skills = [f"skill{rank}" for rank in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(vocabulary)))
+    total = cumulative[-1]
+
+    def sample(count):
+        count = min(count, vocabulary)
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(bisect.bisect_left(cumulative, rng.random() * total))
+        return [skills[min(rank, vocabulary - 1)] for rank in sorted(chosen)]
+    return sample
+
+
+def synthetic_people(count, skills_per_person, vocabulary, rng, skew=0.0, prefix='person'):
+    """People with `skills_per_person` skills each, as objects with pk, name and expertise."""
+    sample = skill_sampler(vocabulary, skew, rng)
+    return [
+        SimpleNamespace(pk=index, name=f"{prefix}{index}", expertise=",".join(sample(skills_per_person)))
+        for index in range(count)
+    ]
+
+
+def write_people_csv(file, people):
+    """Write people as an upload CSV (name, expertise) to an open text file."""
+    writer = csv.writer(file)
+    writer.writerow(['name', 'expertise'])
+    for person in people:
+        writer.writerow([person.name, person.expertise])
+
+
+def peak_rss_mb(workers=1):
+    """
+    Peak resident set size so far, in MB, of this process plus its `workers`
+    pool processes once they have exited. Only the largest child's peak is
+    known, so it is counted for every worker: an upper bound, as the workers
+    run at the same time and share pages with this process.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if workers > 1:
+        peak += workers * resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def baseline_matches(experts, candidates):
+    """The original nested calculate_relevancy loop, for comparison."""
+    from .views import calculate_relevancy
+
+    matches = []
+    for candidate in candidates:
+        best_expert, best_score = None, 0
+        for expert in experts:
+            score = calculate_relevancy(expert.expertise, candidate.expertise)
+            if score > best_score:
+                best_expert, best_score = expert, score
+        matches.append((best_expert, best_score))
+    return matches
+
+
+def matches_digest(matches):
+    """Short fingerprint of (expert, score) matches, to check engines agree."""
+    text = ";".join(f"{expert.pk if expert else '-'}:{score!r}" for expert, score in matches)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def time_matching(experts, candidates, engine_name, workers=1, **engine_options):
+    """
+    Match candidates with experts using an engine (or the baseline loop).
+    Returns (matches, seconds), engine construction included.
+    """
+    started = time.perf_counter()
+    if engine_name == BASELINE_ENGINE:
+        matches = baseline_matches(experts, candidates)
+    else:
+        engine = build_engine(experts, engine_name, workers=workers, **engine_options)
+        try:
+            matches = best_matches(experts, candidates, engine=engine)
+        finally:
+            if workers > 1:
+                engine.close()
+    return matches, time.perf_counter() - started
+
+
+def time_db_writes(experts, candidates, engine_name, top_k=None, **engine_options):
+    """
+    Run the upload pipeline's database path (bulk insert, skill index,
+    chunked matching with Score and, for top_k > 1, RankedMatch inserts) in a
+    transaction that is rolled back. top_k defaults to MATCHING_TOP_K, as in
+    production. Returns {'ingest_seconds', 'write_scores_seconds'}; the
+    latter covers matching plus the inserts.
+    """
+    if top_k is None:
+        top_k = settings.MATCHING_TOP_K
+    from .models import Candidate, Expert, MatchRun
+
+    with transaction.atomic():
+        started = time.perf_counter()
+        run = MatchRun.objects.create()
+        Expert.objects.bulk_create(
+            [Expert(run=run, name=p.name, expertise=p.expertise, content_hash=content_hash(p.expertise)) for p in experts],
+            batch_size=CHUNK_SIZE,
+        )
+        Candidate.objects.bulk_create(
+            [Candidate(run=run, name=p.name, expertise=p.expertise, content_hash=content_hash(p.expertise)) for p in candidates],
+            batch_size=CHUNK_SIZE,
+        )
+        stored_experts = list(Expert.objects.filter(run=run).order_by('pk'))
+        index_expert_skills(stored_experts)
+        ingest_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine = build_engine(stored_experts, engine_name, **engine_options)
+        write_scores(
+            stored_experts, Candidate.objects.filter(run=run).order_by('pk').iterator(chunk_size=CHUNK_SIZE),
+            engine=engine, top_k=top_k,
+        )
+        write_seconds = time.perf_counter() - started
+        transaction.set_rollback(True)
+    return {'ingest_seconds': ingest_seconds, 'write_scores_seconds': write_seconds}
@@ -0,0 +1,46 @@
+"""
+Machine-readable exports of a run's scores, produced row by row for
+StreamingHttpResponse so memory stays constant however many scores exist.
+"""
+import csv
+import json
+
+# Scores fetched from the database at a time while exporting.
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = ('expert_id', 'expert_name', 'candidate_id', 'candidate_name', 'relevancy_score')
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(scores):
+    """(expert_id, expert_name, candidate_id, candidate_name, score) tuples, joined in SQL."""
+    return (
+        scores.order_by('pk')
+        .values_list('expert_id', 'expert__name', 'candidate_id', 'candidate__name', 'relevancy_score')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def csv_lines(scores):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in export_rows(scores):
+        yield writer.writerow(row)
+
+
+def ndjson_lines(scores):
+    for row in export_rows(scores):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+# Export format -> (line generator, content type)
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
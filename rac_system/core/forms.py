@@ -1,8 +1,58 @@
 from django import forms
 
+from .ingest import CSVFormatError, check_csv_header
+from .models import MatchRun
+
 class UploadCSVForm(forms.Form):
+    ASSIGNMENT_MODES = [
+        ('greedy', 'Best expert for each candidate'),
+        ('capacity', 'Balanced: maximize total relevancy with a per-expert capacity'),
+    ]
+
     expert_csv = forms.FileField(label="Upload Expert CSV")
     candidate_csv = forms.FileField(label="Upload Candidate CSV")
+    assignment_mode = forms.ChoiceField(choices=ASSIGNMENT_MODES, initial='greedy', required=False, label="Assignment mode")
+    scorer = forms.ChoiceField(
+        choices=[
+            (MatchRun.JACCARD, 'Shared skills: every skill counts the same'),
+            (MatchRun.TFIDF, 'Weighted: rare skills count more than common ones (TF-IDF)'),
+        ],
+        initial=MatchRun.JACCARD, required=False, label="Relevancy",
+        help_text="Incremental uploads keep the relevancy of the upload they change.",
+    )
+    expert_capacity = forms.IntegerField(
+        min_value=1, required=False, label="Candidates per expert",
+        help_text="Required for the balanced mode.",
+    )
+    incremental = forms.BooleanField(
+        required=False, label="Only apply changes since the last upload",
+        help_text="Keeps unchanged rows and only re-scores the candidates affected by the changes.",
+    )
+
+    def _clean_csv(self, field):
+        uploaded_file = self.cleaned_data[field]
+        try:
+            check_csv_header(uploaded_file)
+        except CSVFormatError as e:
+            raise forms.ValidationError(str(e))
+        return uploaded_file
+
+    def clean_expert_csv(self):
+        return self._clean_csv('expert_csv')
+
+    def clean_candidate_csv(self):
+        return self._clean_csv('candidate_csv')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cleaned_data['assignment_mode'] = cleaned_data.get('assignment_mode') or 'greedy'
+        cleaned_data['scorer'] = cleaned_data.get('scorer') or MatchRun.JACCARD
+        if cleaned_data['assignment_mode'] == 'capacity' and not cleaned_data.get('expert_capacity'):
+            self.add_error('expert_capacity', "Set how many candidates each expert can take.")
+        if cleaned_data['assignment_mode'] == 'capacity' and cleaned_data.get('incremental'):
+            # One changed row can move every balanced assignment.
+            self.add_error('incremental', "Incremental uploads only work with the best-expert mode.")
+        return cleaned_data
     
 class CandidateForm(forms.Form):
     name = forms.CharField(max_length = 200, label="name")
@@ -0,0 +1,114 @@
+"""
+Incremental uploads: apply only the rows that changed since the last upload.
+
+Rows are keyed by (name, content_hash). Stored rows whose key is still in the
+new CSV are left alone, a changed row with a known name is updated in place
+(so its primary key and scores survive), and only what is left over is
+inserted or deleted. Matching then re-scores just the candidates that changed
+or that share a skill with an expert that changed.
+
+plan_sync() works the changes out without writing anything, so the slow part
+of an upload (reading the files, scoring) runs outside any transaction and
+apply_sync() only has the changed rows to write.
+"""
+from collections import defaultdict, deque, namedtuple
+
+from .ingest import CHUNK_SIZE, content_hash, read_csv_chunks
+from .matching import parse_skills
+
+SyncPlan = namedtuple('SyncPlan', [
+    'inserts',          # unsaved rows
+    'updates',          # stored rows with their new expertise set, not saved yet
+    'deletes',          # pks of stored rows gone from the file
+    'unchanged', 'errors',
+    'changed_skills',   # skills of changed or deleted rows, before and after
+    'positions',        # {pk: line order in the file} of the stored rows kept (unchanged or updated)
+    'insert_positions', # line order in the file of each insert
+])
+
+
+def plan_sync(field_file, model, run, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Work out how to bring the `model` (Expert or Candidate) rows of `run` in
+    line with an uploaded CSV, touching only the rows that differ. The file
+    is read twice, never held in memory, and nothing is written.
+    Returns a SyncPlan.
+    """
+    # Pass 1: the positions of every (name, hash) key in the new file.
+    wanted = defaultdict(deque)
+    errors = []
+    position = 0
+    with field_file.open('rb'):
+        for rows, chunk_errors in read_csv_chunks(field_file, chunk_size):
+            for row in rows:
+                wanted[(row['name'], content_hash(row['expertise']))].append(position)
+                position += 1
+            errors.extend(chunk_errors)
+            if on_chunk:
+                on_chunk(len(rows) + len(chunk_errors))
+
+    # Stored rows whose key is still wanted stay as they are, in the place of
+    # the key's first occurrences.
+    positions = {}
+    leftover = defaultdict(list)  # name -> pks of stored rows no longer wanted
+    stored = model.objects.filter(run=run).order_by('pk').values_list('pk', 'name', 'content_hash')
+    for pk, name, stored_hash in stored.iterator(chunk_size=chunk_size):
+        key = (name, stored_hash)
+        if wanted[key]:
+            positions[pk] = wanted[key].popleft()
+        else:
+            leftover[name].append(pk)
+    unchanged = len(positions)
+
+    # Pass 2: the remaining occurrences update a leftover row of the same
+    # name, or are inserted.
+    changed_skills = set()
+    inserts, insert_positions, updates = [], [], {}
+    position = 0
+    with field_file.open('rb'):
+        for rows, _ in read_csv_chunks(field_file, chunk_size):
+            for row in rows:
+                key = (row['name'], content_hash(row['expertise']))
+                if wanted[key] and wanted[key][0] == position:
+                    wanted[key].popleft()
+                    changed_skills |= parse_skills(row['expertise'])
+                    if leftover[row['name']]:
+                        pk = leftover[row['name']].pop()
+                        updates[pk] = row
+                        positions[pk] = position
+                    else:
+                        inserts.append(model(run=run, content_hash=key[1], **row))
+                        insert_positions.append(position)
+                position += 1
+
+    # Whatever is still left over is gone from the new file.
+    deletes = [pk for pks in leftover.values() for pk in pks]
+    updated = []
+    for pks in batched(list(updates) + deletes, chunk_size):
+        for obj in model.objects.filter(pk__in=pks):
+            changed_skills |= parse_skills(obj.expertise)
+            if obj.pk in updates:
+                obj.expertise = updates[obj.pk]['expertise']
+                obj.content_hash = content_hash(obj.expertise)
+                updated.append(obj)
+
+    return SyncPlan(inserts, updated, deletes, unchanged, errors, changed_skills, positions, insert_positions)
+
+
+def apply_sync(plan, model, chunk_size=CHUNK_SIZE):
+    """
+    Write a SyncPlan: update the changed rows (expertise, content hash and
+    vector), insert the new ones (setting their pks) and delete the rest,
+    which cascades to their scores (and, for experts, skill index rows).
+    """
+    model.objects.bulk_update(plan.updates, ['expertise', 'content_hash', 'vector'], batch_size=chunk_size)
+    model.objects.bulk_create(plan.inserts, batch_size=chunk_size)
+    for pks in batched(plan.deletes, chunk_size):
+        model.objects.filter(pk__in=pks).delete()
+
+
+def batched(items, size):
+    """Yield lists of at most `size` items, for bounded IN (...) queries."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
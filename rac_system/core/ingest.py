@@ -0,0 +1,291 @@
+"""
+Streaming CSV ingestion for the expert/candidate uploads.
+
+Uploads are read in fixed-size chunks and written with bulk_create, so memory
+stays bounded by the chunk size rather than the file size. Malformed rows are
+collected as RowError entries instead of raising.
+"""
+import csv
+import hashlib
+import time
+from collections import namedtuple
+from io import TextIOWrapper
+
+from .matching import best_matches, build_engine, parse_skills
+from .models import ExpertSkill, RankedMatch, Score
+
+# Rows read from the CSV (and rows per INSERT) at a time.
+CHUNK_SIZE = 1000
+
+REQUIRED_COLUMNS = ('name', 'expertise')
+
+RowError = namedtuple('RowError', ['line', 'message'])
+
+# Outcome of a matching pass: scores written, total relevancy and the time
+# spent matching (excluding database writes), for comparing modes.
+MatchStats = namedtuple('MatchStats', ['scores_written', 'objective', 'solve_time'])
+
+
+class CSVFormatError(Exception):
+    """Raised when an upload cannot be read as an expert/candidate CSV at all."""
+
+
+def read_csv_chunks(uploaded_file, chunk_size=CHUNK_SIZE):
+    """
+    Yield (rows, errors) chunks from an uploaded CSV file.
+
+    rows is a list of {'name', 'expertise'} dicts that passed validation,
+    errors a list of RowError for the rows that did not, including rows
+    that are not valid UTF-8 (the rest of the file is still read).
+    """
+    # surrogateescape keeps undecodable bytes instead of failing the whole
+    # read; _decoded_lines() reports them per line.
+    text = TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', errors='surrogateescape', newline='')
+    try:
+        bad_lines = set()
+        reader = csv.DictReader(_decoded_lines(text, bad_lines))
+        try:
+            fieldnames = reader.fieldnames or []
+        except csv.Error as e:
+            raise CSVFormatError(f"Could not read the CSV header: {e}")
+        if bad_lines:
+            raise CSVFormatError("Could not read the CSV header: it is not valid UTF-8 text")
+
+        missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+        if missing:
+            raise CSVFormatError(f"Missing required column(s): {', '.join(missing)}")
+
+        rows, errors = [], []
+        while True:
+            first_line = reader.line_num + 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                # The rest of the stream is unreadable; report it and stop.
+                errors.append(RowError(reader.line_num + 1, f"Unreadable data: {e}"))
+                break
+
+            if any(line in bad_lines for line in range(first_line, reader.line_num + 1)):
+                error = "Not valid UTF-8 text"
+            else:
+                error = validate_row(row)
+            if error:
+                errors.append(RowError(reader.line_num, error))
+            else:
+                rows.append({'name': row['name'].strip(), 'expertise': row['expertise']})
+
+            if len(rows) + len(errors) >= chunk_size:
+                yield rows, errors
+                rows, errors = [], []
+
+        if rows or errors:
+            yield rows, errors
+    finally:
+        # Don't let the wrapper close the underlying upload.
+        text.detach()
+
+
+def _decoded_lines(text, bad_lines):
+    """
+    The lines of a surrogateescape-decoded file, with undecodable bytes
+    replaced; the numbers of the lines that had some are added to bad_lines.
+    """
+    for number, line in enumerate(text, start=1):
+        try:
+            line.encode('utf-8')
+        except UnicodeEncodeError:
+            bad_lines.add(number)
+            line = line.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+        yield line
+
+
+def content_hash(expertise):
+    """SHA-1 of an expertise string, stored to detect changed rows between uploads."""
+    return hashlib.sha1(expertise.encode('utf-8')).hexdigest()
+
+
+def check_csv_header(uploaded_file):
+    """
+    Raise CSVFormatError if the file lacks the required columns. Only the
+    header is read, and the file is rewound afterwards.
+    """
+    for _ in read_csv_chunks(uploaded_file, chunk_size=1):
+        break
+    uploaded_file.seek(0)
+
+
+def validate_row(row):
+    """Return an error message for a malformed CSV row, or None if it is valid."""
+    if None in row:
+        return "Too many fields (quote expertise lists that contain commas)"
+    if row.get('name') is None or row.get('expertise') is None:
+        return "Too few fields"
+    name = row['name'].strip()
+    if not name:
+        return "Name is empty"
+    if len(name) > 100:
+        return "Name is longer than 100 characters"
+    return None
+
+
+def ingest_csv(uploaded_file, model, run, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Stream an uploaded CSV into `model` (Expert or Candidate) rows of `run`
+    with batched bulk_create. on_chunk(rows_read) is called after every chunk.
+    Returns (number of rows saved, list of RowError).
+    """
+    saved, errors = 0, []
+    for rows, chunk_errors in read_csv_chunks(uploaded_file, chunk_size):
+        model.objects.bulk_create(
+            [model(run=run, content_hash=content_hash(row['expertise']), **row) for row in rows], batch_size=chunk_size,
+        )
+        saved += len(rows)
+        errors.extend(chunk_errors)
+        if on_chunk:
+            on_chunk(len(rows) + len(chunk_errors))
+    return saved, errors
+
+
+def index_expert_skills(experts, chunk_size=CHUNK_SIZE):
+    """
+    Persist the inverted skill index (ExpertSkill rows) for the given experts
+    in batches. Returns the number of index rows written.
+    """
+    written = 0
+    batch = []
+    for expert in experts:
+        batch.extend(ExpertSkill(skill=skill, expert=expert) for skill in parse_skills(expert.expertise))
+        if len(batch) >= chunk_size:
+            ExpertSkill.objects.bulk_create(batch, batch_size=chunk_size)
+            written += len(batch)
+            batch = []
+    if batch:
+        ExpertSkill.objects.bulk_create(batch, batch_size=chunk_size)
+        written += len(batch)
+    return written
+
+
+def write_scores(experts, candidates, chunk_size=CHUNK_SIZE, engine=None, on_chunk=None, top_k=1):
+    """
+    Match candidates (any iterable, e.g. a queryset .iterator()) against the
+    expert list chunk by chunk and bulk_create the best-match Score rows,
+    plus RankedMatch rows for the top_k experts when top_k > 1.
+    The matching engine is built once and shared by every chunk, and
+    on_chunk(candidates_scored) is called after every chunk.
+    Returns MatchStats.
+    """
+    experts = list(experts)
+    started = time.perf_counter()
+    if engine is None:
+        engine = build_engine(experts)
+    solve_time = time.perf_counter() - started
+
+    written, objective = 0, 0.0
+    chunk = []
+    for candidate in candidates:
+        chunk.append(candidate)
+        if len(chunk) >= chunk_size:
+            stats = _write_score_chunk(experts, chunk, engine, top_k)
+            chunk = []
+            written += stats.scores_written
+            objective += stats.objective
+            solve_time += stats.solve_time
+            if on_chunk:
+                on_chunk(stats.scores_written)
+    if chunk:
+        stats = _write_score_chunk(experts, chunk, engine, top_k)
+        written += stats.scores_written
+        objective += stats.objective
+        solve_time += stats.solve_time
+        if on_chunk:
+            on_chunk(stats.scores_written)
+    return MatchStats(written, objective, solve_time)
+
+
+def match_candidates(experts, candidates, chunk_size=CHUNK_SIZE, engine=None, on_chunk=None, top_k=1):
+    """
+    write_scores() without the writes: returns (matches, ranked, MatchStats)
+    with the (expert, score) match of every candidate and, when top_k > 1,
+    their ranked (expert row, score) lists (else None).
+    """
+    experts = list(experts)
+    started = time.perf_counter()
+    if engine is None:
+        engine = build_engine(experts)
+    solve_time = time.perf_counter() - started
+
+    matches, ranked = [], [] if top_k > 1 else None
+
+    def match(chunk):
+        started = time.perf_counter()
+        chunk_matches, chunk_ranked = match_chunk(experts, chunk, engine, top_k)
+        matches.extend(chunk_matches)
+        if ranked is not None:
+            ranked.extend(chunk_ranked)
+        elapsed = time.perf_counter() - started
+        if on_chunk:
+            on_chunk(len(chunk))
+        return elapsed
+
+    chunk = []
+    for candidate in candidates:
+        chunk.append(candidate)
+        if len(chunk) >= chunk_size:
+            solve_time += match(chunk)
+            chunk = []
+    if chunk:
+        solve_time += match(chunk)
+    return matches, ranked, MatchStats(len(matches), sum(score for _, score in matches), solve_time)
+
+
+def match_chunk(experts, candidates, engine, top_k=1):
+    """
+    (matches, ranked) for a list of candidates: their (expert, score) best
+    matches and, when top_k > 1, their ranked (expert row, score) lists.
+    """
+    if top_k > 1:
+        # The best match is the head of the ranked list.
+        ranked = engine.top([getattr(candidate, engine.input_field) for candidate in candidates], top_k)
+        return [(experts[rows[0][0]], rows[0][1]) if rows else (None, 0) for rows in ranked], ranked
+    return best_matches(experts, candidates, engine=engine), None
+
+
+def _write_score_chunk(experts, candidates, engine, top_k):
+    started = time.perf_counter()
+    matches, ranked = match_chunk(experts, candidates, engine, top_k)
+    solve_time = time.perf_counter() - started
+    save_scores(candidates, matches)
+    if ranked is not None:
+        save_ranked_matches(experts, candidates, ranked)
+    return MatchStats(len(matches), sum(score for _, score in matches), solve_time)
+
+
+def save_scores(candidates, matches, chunk_size=CHUNK_SIZE):
+    """
+    bulk_create Score rows for candidates and their (expert, score) matches,
+    in the candidates' runs.
+    """
+    scores = [
+        Score(run_id=candidate.run_id, expert=expert, candidate=candidate, relevancy_score=score)
+        for candidate, (expert, score) in zip(candidates, matches)
+    ]
+    Score.objects.bulk_create(scores, batch_size=chunk_size)
+    return len(scores)
+
+
+def save_ranked_matches(experts, candidates, ranked, chunk_size=CHUNK_SIZE):
+    """
+    bulk_create RankedMatch rows from per-candidate ranked lists of
+    (expert row, score), as returned by an engine's top().
+    """
+    matches = [
+        RankedMatch(
+            run_id=candidate.run_id, candidate=candidate, expert=experts[row], rank=rank, relevancy_score=score,
+        )
+        for candidate, rows in zip(candidates, ranked)
+        for rank, (row, score) in enumerate(rows, start=1)
+    ]
+    RankedMatch.objects.bulk_create(matches, batch_size=chunk_size)
+    return len(matches)
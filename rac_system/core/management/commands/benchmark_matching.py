@@ -0,0 +1,187 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+import core
+from core.benchmark import (
+    BASELINE_ENGINE, matches_digest, peak_rss_mb, synthetic_people, time_db_writes, time_matching,
+)
+from core.matching import (
+    APPROXIMATE_ENGINES, DEFAULT_ENGINE, ENGINES, LSH_BANDS, LSH_PERMUTATIONS, build_engine, measure_recall,
+)
+
+# Options that define the workload, recorded in the JSON report.
+PARAMS = (
+    'experts', 'candidates', 'skills', 'vocabulary', 'skew', 'sample', 'lsh_permutations', 'lsh_bands', 'seed',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark matching engines (and the original calculate_relevancy loop) on synthetic data: "
+        "pairs/sec, peak RSS and database write time, optionally as JSON for comparing commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--experts', type=int, default=2000)
+        parser.add_argument('--candidates', type=int, default=20000)
+        parser.add_argument('--skills', type=int, default=6, help="Skills per person.")
+        parser.add_argument('--vocabulary', type=int, default=3000, help="Distinct skills overall.")
+        parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent of skill popularity (0 = uniform).")
+        parser.add_argument('--engines', default=','.join([*ENGINES, BASELINE_ENGINE]),
+                            help=f"Comma-separated engines: {', '.join(ENGINES)} or {BASELINE_ENGINE}.")
+        parser.add_argument('--workers', default='1,2,4,8', help="Comma-separated worker counts.")
+        parser.add_argument('--sample', type=int, default=500,
+                            help="Candidates the baseline loop is timed on; all engines must agree on these.")
+        parser.add_argument('--lsh-permutations', type=int, default=LSH_PERMUTATIONS, help="MinHash signature length for lsh.")
+        parser.add_argument('--lsh-bands', type=int, default=LSH_BANDS, help="LSH bands for lsh.")
+        parser.add_argument('--skip-db', action='store_true',
+                            help="Don't time database writes (done in a rolled-back transaction).")
+        parser.add_argument('--json', dest='json_path', help="Write the results as JSON to this file ('-' for stdout).")
+        parser.add_argument('--compare', help="A previous --json report to compare pairs/sec against.")
+        parser.add_argument('--seed', type=int, default=42)
+        # Internal: measure a single engine/worker count in this process.
+        parser.add_argument('--isolated', action='store_true', help="(internal)")
+
+    def handle(self, *args, **options):
+        try:
+            engines = [name for name in options['engines'].split(',') if name]
+            worker_counts = [int(count) for count in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError("--workers must be a comma-separated list of integers")
+        unknown = [name for name in engines if name not in ENGINES and name != BASELINE_ENGINE]
+        if unknown:
+            raise CommandError(f"Unknown engine(s): {', '.join(unknown)}")
+
+        configs = [
+            (engine, workers)
+            for engine in engines
+            for workers in ([1] if engine == BASELINE_ENGINE else worker_counts)
+        ]
+
+        if options['isolated']:
+            self.stdout.write(json.dumps([self.measure(*config, options) for config in configs]))
+            return
+
+        # Each configuration runs in its own process, so peak RSS is its own.
+        results = [self.measure_isolated(engine, workers, options) for engine, workers in configs]
+
+        # Approximate engines report their recall instead.
+        digests = {result['sample_digest'] for result in results if result['engine'] not in APPROXIMATE_ENGINES}
+        if len(digests) > 1:
+            raise CommandError("Engines disagree on the matches for the sampled candidates")
+
+        for result in results:
+            line = (
+                f"{result['engine']:<9} workers={result['workers']:<3} candidates={result['candidates']:<7} "
+                f"time={result['seconds']:8.3f}s  pairs/sec={result['pairs_per_sec']:14,.0f}  "
+                f"peak RSS={result['peak_rss_mb']:8.1f} MB"
+            )
+            if 'recall' in result:
+                line += f"  recall={result['recall']:.3f}"
+            if 'db' in result:
+                line += f"  ingest={result['db']['ingest_seconds']:.3f}s  match+write={result['db']['write_scores_seconds']:.3f}s"
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS("All exact engines returned identical matches."))
+
+        report = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'params': {name: options[name] for name in PARAMS},
+            'results': results,
+        }
+        if options['compare']:
+            self.compare(report, options['compare'])
+        if options['json_path'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+    def measure(self, engine, workers, options):
+        rng = random.Random(options['seed'])
+        experts = synthetic_people(
+            options['experts'], options['skills'], options['vocabulary'], rng, skew=options['skew'], prefix='expert',
+        )
+        candidates = synthetic_people(
+            options['candidates'], options['skills'], options['vocabulary'], rng, skew=options['skew'], prefix='candidate',
+        )
+        if engine == BASELINE_ENGINE:
+            # Quadratic pure Python; time it on the sample only.
+            candidates = candidates[:options['sample']]
+
+        engine_options = {}
+        if engine in APPROXIMATE_ENGINES:
+            engine_options = {'permutations': options['lsh_permutations'], 'bands': options['lsh_bands']}
+        matches, seconds = time_matching(experts, candidates, engine, workers, **engine_options)
+        pairs = len(experts) * len(candidates)
+        result = {
+            'engine': engine,
+            'workers': workers,
+            'candidates': len(candidates),
+            'seconds': seconds,
+            'pairs': pairs,
+            'pairs_per_sec': pairs / seconds if seconds else 0.0,
+            'sample_digest': matches_digest(matches[:options['sample']]),
+        }
+        if engine in APPROXIMATE_ENGINES:
+            result['recall'] = measure_recall(
+                build_engine(experts, engine, **engine_options), build_engine(experts, DEFAULT_ENGINE),
+                [candidate.expertise for candidate in candidates[:options['sample']]],
+            )
+        if engine != BASELINE_ENGINE and workers == 1 and not options['skip_db']:
+            result['db'] = time_db_writes(experts, candidates, engine, **engine_options)
+        result['peak_rss_mb'] = peak_rss_mb(workers)
+        return result
+
+    def measure_isolated(self, engine, workers, options):
+        args = [
+            sys.executable, '-m', 'django', 'benchmark_matching', '--isolated',
+            '--engines', engine, '--workers', str(workers),
+        ]
+        for name in PARAMS:
+            args += [f"--{name.replace('_', '-')}", str(options[name])]
+        if options['skip_db']:
+            args.append('--skip-db')
+
+        project_dir = str(Path(core.__file__).resolve().parent.parent)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [project_dir, os.environ.get('PYTHONPATH')])))
+        completed = subprocess.run(args, capture_output=True, text=True, cwd=project_dir, env=env)
+        if completed.returncode != 0:
+            raise CommandError(f"Benchmark of {engine} with {workers} workers failed:\n{completed.stderr}")
+        return json.loads(completed.stdout)[0]
+
+    def compare(self, report, previous_path):
+        try:
+            previous = json.loads(Path(previous_path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {previous_path}: {e}")
+        if previous.get('params') != report['params']:
+            self.stdout.write(self.style.WARNING("The previous report used different parameters."))
+
+        before = {(result['engine'], result['workers']): result for result in previous.get('results', [])}
+        self.stdout.write(f"Compared with {previous.get('commit') or previous_path}:")
+        for result in report['results']:
+            old = before.get((result['engine'], result['workers']))
+            if not old or not old['pairs_per_sec']:
+                continue
+            change = (result['pairs_per_sec'] / old['pairs_per_sec'] - 1) * 100
+            style = self.style.ERROR if change < -10 else self.style.SUCCESS
+            self.stdout.write(style(f"  {result['engine']:<9} workers={result['workers']:<3} pairs/sec {change:+6.1f}%"))
+
+
+def git_commit():
+    """The checked-out commit, or None outside a git checkout."""
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=Path(core.__file__).resolve().parent,
+        )
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
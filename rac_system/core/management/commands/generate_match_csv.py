@@ -0,0 +1,36 @@
+import random
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import synthetic_people, write_people_csv
+
+
+class Command(BaseCommand):
+    help = "Write synthetic expert and candidate CSVs for load testing uploads and matching."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--experts', type=int, default=2000)
+        parser.add_argument('--candidates', type=int, default=20000)
+        parser.add_argument('--skills', type=int, default=6, help="Skills per person.")
+        parser.add_argument('--vocabulary', type=int, default=3000, help="Distinct skills overall.")
+        parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent of skill popularity (0 = uniform).")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output-dir', default='.', help="Directory for experts.csv and candidates.csv.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for filename, count, prefix in (
+            ('experts.csv', options['experts'], 'Expert '),
+            ('candidates.csv', options['candidates'], 'Candidate '),
+        ):
+            people = synthetic_people(
+                count, options['skills'], options['vocabulary'], rng, skew=options['skew'], prefix=prefix,
+            )
+            path = output_dir / filename
+            with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+                write_people_csv(csv_file, people)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {count} rows to {path}"))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.pipeline import claim_next_job, recover_stale_jobs, run_match_job
+
+
+class Command(BaseCommand):
+    help = "Worker that processes queued match jobs (uploads from upload_and_match)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process the queued jobs, then exit.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            for stale in recover_stale_jobs():
+                self.stdout.write(self.style.WARNING(f"Match job {stale.pk} stopped responding and was marked failed."))
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Running match job {job.pk}...")
+            run_match_job(job)
+            if job.status == job.COMPLETED:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Match job {job.pk} completed: {job.candidate_count} candidates, {job.expert_count} experts."
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"Match job {job.pk} failed: {job.error}"))
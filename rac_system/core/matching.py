@@ -0,0 +1,532 @@
+"""
+Batch matching engines for core.views.upload_and_match.
+
+Every expertise string is parsed exactly once into a skill set. Two engines
+score candidates against the expert pool, both giving exactly the scores of
+calculate_relevancy():
+
+- SkillMatrix encodes the experts as a bit-packed matrix over their skill
+  vocabulary and scores a whole block of candidates with one matrix product.
+- SkillIndex keeps an inverted index from skill to experts, so a candidate
+  is only scored against the experts it shares at least one skill with.
+
+MinHashLSH is an approximate alternative for very large pools: only experts
+that collide with a candidate in some LSH band are scored (exactly), so a
+candidate's true best expert can occasionally be missed.
+"""
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Candidates scored per NumPy block. Keeps the block x experts score matrix small.
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def parse_skills(expertise):
+    """
+    Parse a comma-separated expertise string into a set of skills, exactly
+    the way calculate_relevancy() does (an empty string means no skills).
+    """
+    expertise = (expertise or '').strip()
+    if not expertise:
+        return frozenset()
+    return frozenset(skill.strip() for skill in expertise.split(","))
+
+
+class SkillMatrix:
+    """
+    The expert pool encoded over a shared skill vocabulary.
+
+    Rows are experts, columns are skills; the matrix is stored bit-packed and
+    only unpacked once, to float32, for the block matrix products.
+    """
+
+    # Candidates are passed to best() by this attribute.
+    input_field = 'expertise'
+
+    def __init__(self, expertise_list):
+        skill_sets = [parse_skills(expertise) for expertise in expertise_list]
+
+        # Only skills some expert has can ever be shared, so the vocabulary is
+        # built from the experts; extra candidate skills just grow the union.
+        self.vocabulary = {}
+        for skills in skill_sets:
+            for skill in skills:
+                self.vocabulary.setdefault(skill, len(self.vocabulary))
+
+        self.sizes = np.array([len(skills) for skills in skill_sets], dtype=np.int64)
+        self.packed = self._encode(skill_sets)
+        self._dense = None
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _encode(self, skill_sets):
+        bits = np.zeros((len(skill_sets), max(len(self.vocabulary), 1)), dtype=bool)
+        for row, skills in enumerate(skill_sets):
+            columns = [self.vocabulary[skill] for skill in skills if skill in self.vocabulary]
+            bits[row, columns] = True
+        return np.packbits(bits, axis=1)
+
+    @property
+    def dense(self):
+        """Unpacked float32 expert matrix, shape (experts, vocabulary)."""
+        if self._dense is None:
+            bits = np.unpackbits(self.packed, axis=1, count=max(len(self.vocabulary), 1))
+            self._dense = bits.astype(np.float32)
+        return self._dense
+
+    def encode_candidates(self, expertise_list):
+        """
+        Encode a block of candidate expertise strings against this vocabulary.
+        Returns (float32 matrix, skill counts).
+        """
+        skill_sets = [parse_skills(expertise) for expertise in expertise_list]
+        matrix = np.zeros((len(skill_sets), max(len(self.vocabulary), 1)), dtype=np.float32)
+        for row, skills in enumerate(skill_sets):
+            columns = [self.vocabulary[skill] for skill in skills if skill in self.vocabulary]
+            matrix[row, columns] = 1.0
+        sizes = np.array([len(skills) for skills in skill_sets], dtype=np.int64)
+        return matrix, sizes
+
+    def scores(self, expertise_list):
+        """
+        Relevancy scores for a block of candidates against every expert,
+        shape (candidates, experts), same values as calculate_relevancy().
+        """
+        matrix, sizes = self.encode_candidates(expertise_list)
+        # Shared-skill counts are small integers, exact in float32.
+        common = (matrix @ self.dense.T).astype(np.int64)
+        union = sizes[:, None] + self.sizes[None, :] - common
+
+        scores = np.zeros(common.shape, dtype=np.float64)
+        # Empty expertise on either side scores 0, as in calculate_relevancy().
+        valid = (sizes[:, None] > 0) & (self.sizes[None, :] > 0)
+        np.divide(common, union, out=scores, where=valid)
+        return scores * 10  # Score out of 10
+
+    def best(self, expertise_list, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Best expert row for each candidate expertise string, as a list of
+        (row, score); (None, 0) when no expert scores above 0.
+        """
+        results = []
+        for start in range(0, len(expertise_list), block_size):
+            block = expertise_list[start:start + block_size]
+            scores = self.scores(block)
+            if not scores.shape[1]:
+                results.extend((None, 0) for _ in block)
+                continue
+            # argmax returns the first index of the maximum, i.e. the first expert.
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(block)), best]
+            for row, score in zip(best.tolist(), best_scores.tolist()):
+                results.append((row, score) if score > 0 else (None, 0))
+        return results
+
+    def top(self, expertise_list, k, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        The k best experts for each candidate expertise string, as lists of
+        (row, score) with score > 0, best first and the first expert first
+        among equals. top(..., 1)[i] holds best(...)[i] unless that is (None, 0).
+        """
+        results = []
+        for start in range(0, len(expertise_list), block_size):
+            for scores in self.scores(expertise_list[start:start + block_size]):
+                rows = np.flatnonzero(scores > 0)
+                results.append(top_k(rows, scores[rows], k))
+        return results
+
+
+class SkillIndex:
+    """
+    Inverted index from skill to the expert rows that have it.
+
+    A candidate's shared-skill counts fall out of the concatenated posting
+    lists of its skills, so the work per candidate is proportional to its
+    actual overlaps instead of the size of the expert pool.
+    """
+
+    input_field = 'expertise'
+
+    def __init__(self, expertise_list=None, skill_sets=None):
+        if skill_sets is None:
+            skill_sets = [parse_skills(expertise) for expertise in expertise_list]
+        self.sizes = np.array([len(skills) for skills in skill_sets], dtype=np.int64)
+
+        postings = defaultdict(list)
+        for row, skills in enumerate(skill_sets):
+            for skill in skills:
+                postings[skill].append(row)
+        self.postings = {skill: np.array(rows, dtype=np.int64) for skill, rows in postings.items()}
+
+    def __len__(self):
+        return len(self.sizes)
+
+    @classmethod
+    def from_expert_skills(cls, experts):
+        """
+        Build the index from the persisted ExpertSkill table instead of
+        re-parsing every expert's expertise. Rows follow the order of `experts`.
+        """
+        from .models import ExpertSkill
+
+        rows = {expert.pk: row for row, expert in enumerate(experts)}
+        skill_sets = [set() for _ in rows]
+        pairs = ExpertSkill.objects.filter(expert__in=list(rows)).values_list('expert_id', 'skill')
+        for expert_id, skill in pairs.iterator(chunk_size=DEFAULT_BLOCK_SIZE * 4):
+            skill_sets[rows[expert_id]].add(skill)
+        return cls(skill_sets=skill_sets)
+
+    def scores(self, expertise):
+        """
+        (rows, scores) for the experts sharing at least one skill with the
+        candidate, rows in ascending order. Experts not returned score 0.
+        """
+        skills = parse_skills(expertise)
+        lists = [self.postings[skill] for skill in skills if skill in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        rows, common = np.unique(np.concatenate(lists), return_counts=True)
+        union = len(skills) + self.sizes[rows] - common
+        return rows, (common / union) * 10  # Score out of 10
+
+    def best(self, expertise_list):
+        """Same contract as SkillMatrix.best()."""
+        results = []
+        for expertise in expertise_list:
+            rows, scores = self.scores(expertise)
+            if not len(rows):
+                results.append((None, 0))
+                continue
+            # Rows are sorted, so the first maximum is the first expert in order.
+            best = scores.argmax()
+            results.append((int(rows[best]), float(scores[best])))
+        return results
+
+    def top(self, expertise_list, k):
+        """Same contract as SkillMatrix.top()."""
+        return [top_k(*self.scores(expertise), k) for expertise in expertise_list]
+
+
+# MinHash signature length and number of LSH bands. A pair of skill sets with
+# Jaccard similarity J shares at least one band with probability
+# 1 - (1 - J**(permutations / bands))**bands.
+LSH_PERMUTATIONS = 64
+LSH_BANDS = 32
+LSH_SEED = 1
+
+
+class MinHashLSH:
+    """
+    Approximate engine: MinHash signatures of the skill sets, bucketed by
+    LSH bands. Candidates are scored exactly, like calculate_relevancy(), but
+    only against the experts they share a band bucket with.
+    """
+
+    input_field = 'expertise'
+
+    def __init__(self, expertise_list, permutations=LSH_PERMUTATIONS, bands=LSH_BANDS, seed=LSH_SEED):
+        if permutations < 1 or bands < 1 or permutations % bands:
+            raise ValueError("permutations must be a positive multiple of bands")
+        self.permutations = permutations
+        self.bands = bands
+        self.rows_per_band = permutations // bands
+
+        # Multiply-shift hash functions over 64-bit skill hashes, plus one
+        # more to fold each band of the signature into a single key.
+        rng = np.random.default_rng(seed)
+        self.multipliers = rng.integers(1, 2 ** 63, size=permutations, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2 ** 63, size=permutations, dtype=np.uint64)
+        self.band_multipliers = rng.integers(1, 2 ** 63, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+        self._skill_hashes = {}
+
+        skill_sets = [parse_skills(expertise) for expertise in expertise_list]
+        keys = np.concatenate([
+            self._band_keys(skill_sets[start:start + DEFAULT_BLOCK_SIZE])
+            for start in range(0, len(skill_sets), DEFAULT_BLOCK_SIZE)
+        ] or [np.empty((0, bands), dtype=np.uint64)])
+
+        # Per band: bucket keys sorted, and the expert rows in the same order.
+        # Experts without skills never score above 0, so they are left out.
+        rows = np.array([row for row, skills in enumerate(skill_sets) if skills], dtype=np.int64)
+        self.buckets = []
+        for band in range(bands):
+            band_keys = keys[rows, band]
+            order = np.argsort(band_keys, kind='stable')
+            self.buckets.append((band_keys[order], rows[order]))
+
+        # For exact scoring of colliding pairs: every (expert row, skill id)
+        # as one sorted key, row * len(vocabulary) + skill id.
+        self.vocabulary = {}
+        for skills in skill_sets:
+            for skill in skills:
+                self.vocabulary.setdefault(skill, len(self.vocabulary))
+        self.sizes = np.array([len(skills) for skills in skill_sets], dtype=np.int64)
+        self.skill_keys = np.sort(np.array([
+            row * len(self.vocabulary) + self.vocabulary[skill]
+            for row, skills in enumerate(skill_sets) for skill in skills
+        ], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _skill_hash(self, skill):
+        value = self._skill_hashes.get(skill)
+        if value is None:
+            digest = hashlib.blake2b(skill.encode('utf-8'), digest_size=8).digest()
+            value = self._skill_hashes[skill] = int.from_bytes(digest, 'little')
+        return value
+
+    def signatures(self, skill_sets):
+        """MinHash signatures, shape (len(skill_sets), permutations)."""
+        lengths = np.array([len(skills) for skills in skill_sets], dtype=np.int64)
+        signatures = np.full((len(skill_sets), self.permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+        nonempty = lengths > 0
+        if not nonempty.any():
+            return signatures
+        hashes = np.array([self._skill_hash(skill) for skills in skill_sets for skill in skills], dtype=np.uint64)
+        hashed = (hashes[:, None] * self.multipliers + self.offsets) >> np.uint64(32)
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        signatures[nonempty] = np.minimum.reduceat(hashed, starts, axis=0)
+        return signatures
+
+    def _band_keys(self, skill_sets):
+        """One bucket key per band, shape (len(skill_sets), bands)."""
+        signatures = self.signatures(skill_sets).reshape(len(skill_sets), self.bands, self.rows_per_band)
+        return (signatures * self.band_multipliers).sum(axis=2, dtype=np.uint64)
+
+    def best(self, expertise_list, block_size=DEFAULT_BLOCK_SIZE):
+        """Same contract as SkillMatrix.best(), but may miss the true best expert."""
+        return [ranked[0] if ranked else (None, 0) for ranked in self.top(expertise_list, 1, block_size)]
+
+    def top(self, expertise_list, k, block_size=DEFAULT_BLOCK_SIZE):
+        """Same contract as SkillMatrix.top(), but may miss some of the true top k."""
+        results = []
+        for start in range(0, len(expertise_list), block_size):
+            skill_sets = [parse_skills(expertise) for expertise in expertise_list[start:start + block_size]]
+            results.extend(ranked_pairs(*self._pair_scores(skill_sets), len(skill_sets), k))
+        return results
+
+    def _pair_scores(self, skill_sets):
+        """(candidates, rows, scores) for the pairs that share an LSH bucket."""
+        keys = self._band_keys(skill_sets)
+        sizes = np.array([len(skills) for skills in skill_sets], dtype=np.int64)
+
+        # (candidate, expert row) pairs sharing a bucket in any band.
+        pair_keys = []
+        for band, (bucket_keys, bucket_rows) in enumerate(self.buckets):
+            left = np.searchsorted(bucket_keys, keys[:, band], 'left')
+            counts = np.where(sizes > 0, np.searchsorted(bucket_keys, keys[:, band], 'right') - left, 0)
+            candidates, positions = _expand_ranges(left, counts)
+            pair_keys.append(candidates * len(self) + bucket_rows[positions])
+
+        pair_keys = np.sort(np.concatenate(pair_keys))
+        if len(pair_keys):
+            pair_keys = pair_keys[np.concatenate(([True], pair_keys[1:] != pair_keys[:-1]))]
+        # Sorted by candidate, then expert row.
+        candidates, rows = np.divmod(pair_keys, len(self))
+
+        # Shared skills per pair: look each of the candidate's skills (that
+        # some expert has) up in the expert's skills.
+        skill_ids = [
+            [self.vocabulary[skill] for skill in skills if skill in self.vocabulary] for skills in skill_sets
+        ]
+        known = np.array([len(ids) for ids in skill_ids], dtype=np.int64)
+        flat_ids = np.array([skill_id for ids in skill_ids for skill_id in ids], dtype=np.int64)
+        pairs, positions = _expand_ranges((np.cumsum(known) - known)[candidates], known[candidates])
+        lookup = rows[pairs] * len(self.vocabulary) + flat_ids[positions]
+        found = np.searchsorted(self.skill_keys, lookup)
+        found = (found < len(self.skill_keys)) & (self.skill_keys[np.minimum(found, len(self.skill_keys) - 1)] == lookup)
+        common = np.bincount(pairs[found], minlength=len(pair_keys))
+
+        union = sizes[candidates] + self.sizes[rows] - common
+        return candidates, rows, (common / union) * 10  # Score out of 10
+
+
+def top_k(rows, scores, k):
+    """
+    The k best (row, score) pairs with score > 0 from one candidate's sparse
+    scores, best first and lower rows first among equals. Only the pairs at
+    or above the k-th best score (found by partitioning) are sorted.
+    """
+    positive = scores > 0
+    rows, scores = rows[positive], scores[positive]
+    if len(scores) > k:
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= threshold
+        rows, scores = rows[keep], scores[keep]
+    order = np.lexsort((rows, -scores))[:k]
+    return list(zip(rows[order].tolist(), scores[order].tolist()))
+
+
+def ranked_pairs(candidates, rows, scores, count, k):
+    """
+    top_k() for a block of `count` candidates at once, from (candidate,
+    expert row, score) pair arrays sorted by candidate. Returns one ranked
+    list per candidate. As in top_k(), only the pairs at or above each
+    candidate's k-th best score (found by partitioning) are sorted.
+    """
+    ranked = [[] for _ in range(count)]
+    positive = scores > 0
+    candidates, rows, scores = candidates[positive], rows[positive], scores[positive]
+    if not len(candidates):
+        return ranked
+    starts = np.flatnonzero(np.concatenate(([True], candidates[1:] != candidates[:-1])))
+    ends = np.append(starts[1:], len(candidates))
+    keep = np.ones(len(candidates), dtype=bool)
+    crowded = ends - starts > k
+    for start, end in zip(starts[crowded].tolist(), ends[crowded].tolist()):
+        group = scores[start:end]
+        threshold = np.partition(group, len(group) - k)[len(group) - k]
+        keep[start:end] = group >= threshold
+    candidates, rows, scores = candidates[keep], rows[keep], scores[keep]
+
+    order = np.lexsort((rows, -scores, candidates))
+    sorted_candidates = candidates[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_candidates[1:] != sorted_candidates[:-1])))
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order))))
+    for pair in order[rank < k].tolist():
+        ranked[candidates[pair]].append((int(rows[pair]), float(scores[pair])))
+    return ranked
+
+
+def _expand_ranges(starts, counts):
+    """
+    For ranges [start, start + count): the index of the range each element
+    belongs to, and the element positions, concatenated.
+    """
+    total = int(counts.sum())
+    owners = np.repeat(np.arange(len(counts)), counts)
+    positions = starts[owners] + np.arange(total) - (np.cumsum(counts) - counts)[owners]
+    return owners, positions
+
+
+# The read-only engine each pool worker process scores its shards against.
+_worker_engine = None
+
+
+def _init_worker(engine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _best_shard(expertise_list):
+    return _worker_engine.best(expertise_list)
+
+
+def _top_shard(expertise_list, k):
+    return _worker_engine.top(expertise_list, k)
+
+
+class ShardedEngine:
+    """
+    Splits candidates into shards and scores them in a process pool.
+
+    Every worker receives one copy of the wrapped engine when it starts and
+    only reads from it. Shards are contiguous and merged back in order, so
+    best() returns exactly what the wrapped engine would. Use as a context
+    manager, or call close(), to shut the pool down.
+    """
+
+    def __init__(self, engine, workers):
+        self.engine = engine
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(engine,))
+
+    def __len__(self):
+        return len(self.engine)
+
+    @property
+    def input_field(self):
+        return self.engine.input_field
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown()
+
+    def best(self, expertise_list):
+        """Same contract as SkillMatrix.best()."""
+        shards = self._shards(expertise_list)
+        results = []
+        for shard in self.pool.map(_best_shard, shards):
+            results.extend(shard)
+        return results
+
+    def top(self, expertise_list, k):
+        """Same contract as SkillMatrix.top()."""
+        shards = self._shards(expertise_list)
+        results = []
+        for shard in self.pool.map(_top_shard, shards, [k] * len(shards)):
+            results.extend(shard)
+        return results
+
+    def _shards(self, expertise_list):
+        shard_size = max(1, -(-len(expertise_list) // self.workers))
+        return [expertise_list[start:start + shard_size] for start in range(0, len(expertise_list), shard_size)]
+
+
+ENGINES = {
+    'index': SkillIndex,
+    'matrix': SkillMatrix,
+    'lsh': MinHashLSH,
+}
+
+DEFAULT_ENGINE = 'index'
+
+# Engines whose best matches may differ from calculate_relevancy()'s.
+APPROXIMATE_ENGINES = {'lsh'}
+
+
+def build_engine(experts, engine=DEFAULT_ENGINE, workers=1, **options):
+    """
+    Build a matching engine ('index', 'matrix' or 'lsh') over a list of
+    experts; options go to the engine (e.g. permutations and bands for
+    'lsh'). With more than one worker it is wrapped in a ShardedEngine,
+    which the caller must close.
+    """
+    built = ENGINES[engine]([expert.expertise for expert in experts], **options)
+    if workers > 1:
+        return ShardedEngine(built, workers)
+    return built
+
+
+def measure_recall(engine, exact_engine, expertise_list):
+    """
+    Fraction of the candidates with a positive exact best score for which
+    `engine` finds an expert with that same score (1.0 if there are none).
+    """
+    exact = exact_engine.best(expertise_list)
+    found = [
+        approximate_score == exact_score
+        for (_, approximate_score), (_, exact_score) in zip(engine.best(expertise_list), exact)
+        if exact_score > 0
+    ]
+    return sum(found) / len(found) if found else 1.0
+
+
+def best_matches(experts, candidates, engine=None):
+    """
+    Find the best expert for every candidate.
+
+    Returns a list of (expert, relevancy_score) in candidate order. Like the
+    original loop, the first expert with the highest score wins and a
+    candidate with no positive score gets (None, 0). Pass an engine built
+    by build_engine() over `experts` to reuse it across calls.
+    """
+    experts = list(experts)
+    candidates = list(candidates)
+    if not experts:
+        return [(None, 0) for _ in candidates]
+
+    if engine is None:
+        engine = build_engine(experts)
+    matches = engine.best([getattr(candidate, engine.input_field) for candidate in candidates])
+    return [(experts[row] if row is not None else None, score) for row, score in matches]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_score_expert_nullable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpertSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.TextField(db_index=True)),
+                ('expert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='core.expert')),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_expertskill'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('expert_csv', models.FileField(blank=True, upload_to='match_jobs/')),
+                ('candidate_csv', models.FileField(blank=True, upload_to='match_jobs/')),
+                ('assignment_mode', models.CharField(default='greedy', max_length=20)),
+                ('expert_capacity', models.PositiveIntegerField(blank=True, null=True)),
+                ('rows_parsed', models.PositiveIntegerField(default=0)),
+                ('expert_count', models.PositiveIntegerField(default=0)),
+                ('candidate_count', models.PositiveIntegerField(default=0)),
+                ('pairs_scored', models.BigIntegerField(default=0)),
+                ('pairs_total', models.BigIntegerField(default=0)),
+                ('row_errors', models.JSONField(blank=True, default=dict, help_text='Malformed rows per file (first few only) and their counts')),
+                ('error', models.TextField(blank=True)),
+                ('objective', models.FloatField(blank=True, null=True)),
+                ('solve_time', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('matching_started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='match_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
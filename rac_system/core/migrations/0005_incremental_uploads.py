@@ -0,0 +1,49 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:32
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_content_hashes(apps, schema_editor):
+    for model_name in ('Expert', 'Candidate'):
+        model = apps.get_model('core', model_name)
+        batch = []
+        for row in model.objects.only('pk', 'expertise').iterator(chunk_size=1000):
+            row.content_hash = hashlib.sha1(row.expertise.encode('utf-8')).hexdigest()
+            batch.append(row)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ['content_hash'])
+                batch = []
+        model.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_matchjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='expert',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='matchjob',
+            name='changes',
+            field=models.JSONField(blank=True, default=dict, help_text='Rows inserted/updated/deleted and candidates re-scored by an incremental upload'),
+        ),
+        migrations.AddField(
+            model_name='matchjob',
+            name='incremental',
+            field=models.BooleanField(default=False, help_text='Only apply the rows that changed since the last upload'),
+        ),
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def adopt_existing_rows(apps, schema_editor):
+    """Put rows uploaded before runs existed into one completed run."""
+    MatchRun = apps.get_model('core', 'MatchRun')
+    models_with_run = [apps.get_model('core', name) for name in ('Expert', 'Candidate', 'Score')]
+    if not any(model.objects.exists() for model in models_with_run):
+        return
+    run = MatchRun.objects.create(status='completed', completed_at=timezone.now())
+    for model in models_with_run:
+        model.objects.update(run=run)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_incremental_uploads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('building', 'Building'), ('completed', 'Completed'), ('failed', 'Failed')], default='building', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='match_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-completed_at'], name='core_matchrun_latest_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='expert',
+            name='run',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='experts', to='core.matchrun'),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='run',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='core.matchrun'),
+        ),
+        migrations.AddField(
+            model_name='score',
+            name='run',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.matchrun'),
+        ),
+        migrations.AddField(
+            model_name='matchjob',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='core.matchrun'),
+        ),
+        migrations.RunPython(adopt_existing_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='expert',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='experts', to='core.matchrun'),
+        ),
+        migrations.AlterField(
+            model_name='candidate',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='core.matchrun'),
+        ),
+        migrations.AlterField(
+            model_name='score',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.matchrun'),
+        ),
+    ]
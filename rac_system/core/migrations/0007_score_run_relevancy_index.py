@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_matchrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['run', '-relevancy_score', 'id'], name='core_score_run_relevancy_idx'),
+        ),
+    ]
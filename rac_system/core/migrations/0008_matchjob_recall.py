@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_score_run_relevancy_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchjob',
+            name='recall',
+            field=models.FloatField(blank=True, help_text='Approximate matching only: share of sampled candidates given their exact best score', null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_matchjob_recall'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='vector',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='expert',
+            name='vector',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='matchjob',
+            name='scorer',
+            field=models.CharField(choices=[('jaccard', 'Shared skills'), ('tfidf', 'TF-IDF weighted skills')], default='jaccard', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='matchrun',
+            name='idf',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='matchrun',
+            name='scorer',
+            field=models.CharField(choices=[('jaccard', 'Shared skills'), ('tfidf', 'TF-IDF weighted skills')], default='jaccard', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tfidf_scorer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankedMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('relevancy_score', models.FloatField()),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranked_matches', to='core.candidate')),
+                ('expert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranked_matches', to='core.expert')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranked_matches', to='core.matchrun')),
+            ],
+            options={
+                'ordering': ['candidate', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'rank'), name='core_rankedmatch_candidate_rank_uniq')],
+            },
+        ),
+    ]
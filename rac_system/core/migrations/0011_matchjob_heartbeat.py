@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_rankedmatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,23 +1,184 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+class MatchRun(models.Model):
+    """
+    One generation of uploaded experts, candidates and scores. An upload
+    builds a new run next to the current one and swaps it in by marking it
+    completed; readers always use the latest completed run.
+    """
+    BUILDING = 'building'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUSES = [
+        (BUILDING, 'Building'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    JACCARD = 'jaccard'
+    TFIDF = 'tfidf'
+    SCORERS = [
+        (JACCARD, 'Shared skills'),
+        (TFIDF, 'TF-IDF weighted skills'),
+    ]
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='match_runs')
+    status = models.CharField(max_length=20, choices=STATUSES, default=BUILDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Bumped whenever the run's rows change (e.g. by an incremental upload)
+    updated_at = models.DateTimeField(auto_now=True)
+    scorer = models.CharField(max_length=20, choices=SCORERS, default=JACCARD)
+    # TF-IDF runs: the IDF weights learned from the run's people (see core.tfidf)
+    idf = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-completed_at'], name='core_matchrun_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"Match run {self.pk} ({self.status})"
+
+    @classmethod
+    def latest(cls):
+        """The run readers should see: the most recently completed one, or None."""
+        return cls.objects.filter(status=cls.COMPLETED).order_by('-completed_at', '-pk').first()
 
 class Expert(models.Model):
+    run = models.ForeignKey(MatchRun, on_delete=models.CASCADE, related_name='experts')
     name = models.CharField(max_length=100)
     expertise = models.TextField(help_text="Comma-separated list of expert's areas of expertise")
+    # SHA-1 of expertise; with name, the key incremental uploads diff on
+    content_hash = models.CharField(max_length=40, blank=True, db_index=True)
+    # Normalized TF-IDF vector {skill: weight}, in TF-IDF runs only
+    vector = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return self.name
 
+class ExpertSkill(models.Model):
+    """
+    Inverted skill index over the Expert pool: one row per (skill, expert).
+    Skills are normalized the same way calculate_relevancy() splits them.
+    """
+    skill = models.TextField(db_index=True)
+    expert = models.ForeignKey(Expert, on_delete=models.CASCADE, related_name='skills')
+
+    def __str__(self):
+        return f"{self.skill} - {self.expert.name}"
+
 class Candidate(models.Model):
+    run = models.ForeignKey(MatchRun, on_delete=models.CASCADE, related_name='candidates')
     name = models.CharField(max_length=100)
     expertise = models.TextField(help_text="Comma-separated list of candidate's areas of expertise")
+    # SHA-1 of expertise; with name, the key incremental uploads diff on
+    content_hash = models.CharField(max_length=40, blank=True, db_index=True)
+    # Normalized TF-IDF vector {skill: weight}, in TF-IDF runs only
+    vector = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return self.name
 
 class Score(models.Model):
-    expert = models.ForeignKey(Expert, on_delete=models.CASCADE)
+    run = models.ForeignKey(MatchRun, on_delete=models.CASCADE, related_name='scores')
+    # No expert when the candidate shares no skill with anyone (score 0).
+    expert = models.ForeignKey(Expert, on_delete=models.CASCADE, null=True, blank=True)
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
     relevancy_score = models.FloatField()
 
+    class Meta:
+        indexes = [
+            # The results page lists a run's scores by relevancy, a page at a time.
+            models.Index(fields=['run', '-relevancy_score', 'id'], name='core_score_run_relevancy_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.expert.name} - {self.candidate.name} ({self.relevancy_score})"
+        expert_name = self.expert.name if self.expert else "No match"
+        return f"{expert_name} - {self.candidate.name} ({self.relevancy_score})"
+
+class RankedMatch(models.Model):
+    """
+    The top-k experts for a candidate, kept alongside its Score so the
+    runners-up are at hand when the matched expert is unavailable.
+    Rank 1 is the most relevant expert.
+    """
+    run = models.ForeignKey(MatchRun, on_delete=models.CASCADE, related_name='ranked_matches')
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='ranked_matches')
+    expert = models.ForeignKey(Expert, on_delete=models.CASCADE, related_name='ranked_matches')
+    rank = models.PositiveSmallIntegerField()
+    relevancy_score = models.FloatField()
+
+    class Meta:
+        ordering = ['candidate', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'rank'], name='core_rankedmatch_candidate_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate.name} #{self.rank}: {self.expert.name} ({self.relevancy_score})"
+
+class MatchJob(models.Model):
+    """
+    An upload queued for matching. The upload view only stores the CSV files
+    and returns; the run_match_jobs worker parses, stores and matches them
+    in the background and records its progress here.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='match_jobs')
+    run = models.ForeignKey(MatchRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUSES, default=QUEUED, db_index=True)
+    expert_csv = models.FileField(upload_to='match_jobs/', blank=True)
+    candidate_csv = models.FileField(upload_to='match_jobs/', blank=True)
+    assignment_mode = models.CharField(max_length=20, default='greedy')
+    scorer = models.CharField(max_length=20, choices=MatchRun.SCORERS, default=MatchRun.JACCARD)
+    expert_capacity = models.PositiveIntegerField(null=True, blank=True)
+    incremental = models.BooleanField(default=False, help_text="Only apply the rows that changed since the last upload")
+
+    # Progress, updated by the worker as it goes
+    rows_parsed = models.PositiveIntegerField(default=0)
+    expert_count = models.PositiveIntegerField(default=0)
+    candidate_count = models.PositiveIntegerField(default=0)
+    pairs_scored = models.BigIntegerField(default=0)
+    pairs_total = models.BigIntegerField(default=0)
+    row_errors = models.JSONField(default=dict, blank=True, help_text="Malformed rows per file (first few only) and their counts")
+    changes = models.JSONField(default=dict, blank=True, help_text="Rows inserted/updated/deleted and candidates re-scored by an incremental upload")
+    error = models.TextField(blank=True)
+
+    # Outcome
+    objective = models.FloatField(null=True, blank=True)
+    solve_time = models.FloatField(null=True, blank=True)
+    recall = models.FloatField(null=True, blank=True, help_text="Approximate matching only: share of sampled candidates given their exact best score")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last progress write by the worker; running jobs silent for too long are failed
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    matching_started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Match job {self.pk} ({self.status})"
+
+    @property
+    def eta_seconds(self):
+        """Estimated seconds left while scoring, from the pairs/sec so far."""
+        if self.status != self.RUNNING or not self.matching_started_at or not self.pairs_scored:
+            return None
+        elapsed = (timezone.now() - self.matching_started_at).total_seconds()
+        return elapsed * (self.pairs_total - self.pairs_scored) / self.pairs_scored
@@ -0,0 +1,204 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page starts right after the last row of the page
+before it: WHERE (created_at, id) < (cursor's created_at, cursor's id)
+ORDER BY created_at DESC, id DESC LIMIT n. With an index on the ordering
+that is one index seek whatever the page, so page N costs the same as
+page 1. Cursors are opaque strings carrying the key of the first or last
+row shown and the direction.
+
+The total is an approximate_count(): counted only up to a limit and cached
+briefly, instead of a full COUNT(*) on every page view.
+"""
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+# Newest first, ties broken by id
+DEFAULT_KEYS = ('-created_at', '-id')
+
+# Rows counted at most for a page's total, and how long a total is cached (seconds)
+COUNT_LIMIT = 10000
+COUNT_CACHE_TIMEOUT = 60
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor()."""
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps([direction, list(values)], default=_json_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _json_value(value):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def decode_cursor(cursor, keys, model):
+    """
+    (values, direction) of a cursor over `model` ordered by `keys`, each
+    value converted by its field's to_python(); raises InvalidCursor.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(payload, parse_constant=_reject_constant)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor(cursor)
+    return [_key_value(model, key, value, cursor) for key, value in zip(keys, values)], direction
+
+
+def _reject_constant(name):
+    raise ValueError(name)  # NaN and +/-Infinity
+
+
+def _key_value(model, key, value, cursor):
+    """A cursor's JSON value for `key` as its field's Python value; raises InvalidCursor."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise InvalidCursor(cursor)
+    field = _key_field(model, key)
+    try:
+        value = field.to_python(value)
+        field.run_validators(value)
+    except (ValidationError, TypeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+    if value is None or (isinstance(value, datetime.datetime) and settings.USE_TZ and timezone.is_naive(value)):
+        raise InvalidCursor(cursor)
+    return value
+
+
+def _key_field(model, key):
+    """The concrete field a `keys` entry orders by, following relations (a__b) to the target field."""
+    field = None
+    for part in key.lstrip('-').split('__'):
+        if field is not None:
+            model = field.related_model
+        field = model._meta.get_field(part)
+    return field.target_field if field.is_relation else field
+
+
+def approximate_count(queryset, limit=COUNT_LIMIT, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    (count, exact): the number of rows counted up to `limit` (exact is False
+    when there are more), cached for `timeout` seconds per query.
+    """
+    key = f'approximate_count:{limit}:' + hashlib.sha1(str(queryset.query).encode()).hexdigest()
+    cached = cache.get(key)
+    if cached is None:
+        # COUNT(*) over a LIMITed subquery stops after `limit` + 1 rows
+        count = queryset.order_by()[:limit + 1].count()
+        cached = (min(count, limit), count <= limit)
+        cache.set(key, cached, timeout)
+    return tuple(cached)
+
+
+class KeysetPage:
+    """One page of rows, with cursors to the pages on either side."""
+
+    def __init__(self, object_list, keys, has_next, has_previous, count, count_is_exact):
+        self.object_list = object_list
+        self.keys = keys
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.count = count
+        self.count_is_exact = count_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if self.has_next:
+            return encode_cursor(_key_values(self.object_list[-1], self.keys), NEXT)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous:
+            return encode_cursor(_key_values(self.object_list[0], self.keys), PREVIOUS)
+        return None
+
+
+def paginate(queryset, cursor, per_page, keys=DEFAULT_KEYS, count=True):
+    """
+    The page of `queryset` after (or before) `cursor`, ordered by `keys`
+    (field names, '-' for descending; the last must be unique, e.g. id).
+    A missing or invalid cursor, tampered ones included, gives the first page. With count=False the
+    page's count is None.
+    """
+    values, direction = None, NEXT
+    if cursor:
+        try:
+            values, direction = decode_cursor(cursor, keys, queryset.model)
+        except InvalidCursor:
+            pass
+
+    total, exact = approximate_count(queryset) if count else (None, True)
+    if direction == PREVIOUS:
+        # Walk backwards from the cursor, then put the rows back in order
+        reversed_keys = [_reverse(key) for key in keys]
+        rows = list(queryset.filter(_after(reversed_keys, values)).order_by(*reversed_keys)[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(rows, keys, True, has_previous, total, exact)
+
+    if values is not None:
+        queryset = queryset.filter(_after(keys, values))
+    rows = list(queryset.order_by(*keys)[:per_page + 1])
+    return KeysetPage(rows[:per_page], keys, len(rows) > per_page, values is not None, total, exact)
+
+
+def _after(keys, values):
+    """
+    Rows strictly after `values` in `keys` order:
+    a > x OR (a = x AND b > y) OR ..., plus a >= x up front so the
+    database can seek on the leading column of the index.
+    """
+    fields = [(key.lstrip('-'), key.startswith('-')) for key in keys]
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(fields, values):
+        condition |= equal & Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        equal &= Q(**{field: value})
+    first_field, first_descending = fields[0]
+    return Q(**{f"{first_field}__{'lte' if first_descending else 'gte'}": values[0]}) & condition
+
+
+def _reverse(key):
+    return key[1:] if key.startswith('-') else '-' + key
+
+
+def _key_values(row, keys):
+    values = []
+    for key in keys:
+        value = row
+        for part in key.lstrip('-').split('__'):
+            value = getattr(value, part)
+        values.append(value)
+    return values
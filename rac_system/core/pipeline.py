@@ -0,0 +1,439 @@
+"""
+Runs a MatchJob: parse and store the uploaded CSVs, match, record progress.
+
+Called by the run_match_jobs worker, never from a request.
+"""
+import datetime
+import logging
+import random
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, QuerySet, Sum
+from django.utils import timezone
+
+from .assignment import assign_with_capacity
+from .ingest import (
+    CHUNK_SIZE, MatchStats, index_expert_skills, ingest_csv, match_candidates, save_ranked_matches, save_scores,
+    write_scores,
+)
+from .incremental import apply_sync, batched, plan_sync
+from .matching import (
+    APPROXIMATE_ENGINES, DEFAULT_ENGINE, ShardedEngine, SkillIndex, build_engine, measure_recall, parse_skills,
+)
+from .models import Candidate, Expert, ExpertSkill, MatchJob, MatchRun, RankedMatch, Score
+from .runs import complete_run, drop_run, fail_run, prune_runs
+from .tfidf import TfidfIndex, learn_idf, vectorize_changed, vectorize_rows
+
+logger = logging.getLogger(__name__)
+
+# Malformed rows kept per file on the job for display; the rest are only counted.
+MAX_STORED_ERRORS = 50
+
+# Candidates an approximate engine's recall is measured on.
+RECALL_SAMPLE_SIZE = 500
+
+# Times an incremental upload is worked out again when another upload changed the run first.
+INCREMENTAL_ATTEMPTS = 3
+
+
+# Seconds between the heartbeats a long solve writes (see _heartbeat()).
+HEARTBEAT_INTERVAL = 10
+
+
+class JobLost(Exception):
+    """Raised when a job stopped being RUNNING under its worker: recover_stale_jobs() failed it."""
+
+
+class RunChanged(Exception):
+    """Raised when a run changed between preparing and applying an incremental upload."""
+
+
+# An incremental upload worked out but not written yet: the row changes, the
+# run's experts as they will be, and the affected candidates with their matches.
+IncrementalChange = namedtuple('IncrementalChange', [
+    'experts_plan', 'candidates_plan', 'experts', 'candidates', 'matches', 'ranked', 'stats',
+])
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return it, or None.
+    Safe with several workers: only one of them wins the update.
+    """
+    for job in MatchJob.objects.filter(status=MatchJob.QUEUED).order_by('created_at', 'pk')[:10]:
+        now = timezone.now()
+        claimed = MatchJob.objects.filter(pk=job.pk, status=MatchJob.QUEUED).update(
+            status=MatchJob.RUNNING, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def recover_stale_jobs(stale_after=None, now=None):
+    """
+    Fail the running jobs that have reported no progress for `stale_after`
+    seconds (MATCH_JOB_STALE_AFTER by default), whose worker must have been
+    killed, and drop the runs they left half built. Returns the failed jobs.
+    """
+    if stale_after is None:
+        stale_after = settings.MATCH_JOB_STALE_AFTER
+    now = now or timezone.now()
+    cutoff = now - datetime.timedelta(seconds=stale_after)
+    stale = Q(status=MatchJob.RUNNING) & (
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    recovered = []
+    for job in MatchJob.objects.filter(stale).select_related('run'):
+        # Only one worker fails a given job, and only if it is still silent.
+        failed = MatchJob.objects.filter(stale, pk=job.pk).update(
+            status=MatchJob.FAILED, error="The worker stopped before finishing the job.", finished_at=now,
+        )
+        if not failed:
+            continue
+        # (An incremental job's changes were rolled back with its transaction.)
+        if job.run is not None and job.run.status == MatchRun.BUILDING:
+            fail_run(job.run)
+            drop_run(job.run)
+        recovered.append(job)
+    return recovered
+
+
+def run_match_job(job):
+    """
+    Process a claimed job to completion, marking it completed or failed.
+    A job recover_stale_jobs() failed in the meantime is left failed.
+    """
+    try:
+        stats = _run(job)
+    except JobLost:
+        logger.warning("Match job %s was failed as stale while running; its results are discarded", job.pk)
+        job.refresh_from_db()
+        return job
+    except Exception as e:
+        logger.exception("Match job %s failed", job.pk)
+        # Readers never saw a half-built run, so just throw it away.
+        # (An incremental job's changes were rolled back instead.)
+        if _finish(job, status=MatchJob.FAILED, error=str(e), finished_at=timezone.now()):
+            if job.run is not None and job.run.status == MatchRun.BUILDING:
+                fail_run(job.run)
+                drop_run(job.run)
+        return job
+
+    with transaction.atomic():
+        finished = _finish(
+            job, status=MatchJob.COMPLETED, objective=stats.objective, solve_time=stats.solve_time,
+            pairs_scored=job.pairs_total, finished_at=timezone.now(),
+        )
+        if finished and job.run.status == MatchRun.BUILDING:
+            complete_run(job.run)
+    if not finished:
+        logger.warning("Match job %s was failed as stale before it finished; its results are discarded", job.pk)
+        job.refresh_from_db()
+        return job
+    # The uploads are no longer needed once they are in the database.
+    job.expert_csv.delete(save=False)
+    job.candidate_csv.delete(save=False)
+    try:
+        prune_runs()
+    except Exception:
+        # Left for the next job to clean up; this one did succeed.
+        logger.exception("Pruning old match runs after job %s failed", job.pk)
+    return job
+
+
+def _run(job):
+    if job.incremental:
+        stats = _run_incremental(job)
+        if stats is not None:
+            return stats
+        # Nothing uploaded yet to apply changes to: do a full upload.
+
+    run = MatchRun.objects.create(created_by=job.created_by, scorer=job.scorer)
+    _update(job, run=run)
+
+    # Stream experts and candidates into the new run in batches
+    with job.expert_csv.open('rb') as expert_csv:
+        expert_count, expert_errors = ingest_csv(expert_csv, Expert, run, on_chunk=_rows_read(job))
+    with job.candidate_csv.open('rb') as candidate_csv:
+        candidate_count, candidate_errors = ingest_csv(candidate_csv, Candidate, run, on_chunk=_rows_read(job))
+
+    _update(
+        job, expert_count=expert_count, candidate_count=candidate_count,
+        pairs_total=expert_count * candidate_count, matching_started_at=timezone.now(),
+        row_errors=_row_errors(expert_errors, candidate_errors),
+    )
+
+    if run.scorer == MatchRun.TFIDF:
+        # Learn the IDF weights from everyone in the run, then store vectors
+        run.idf = learn_idf(
+            expertise
+            for model in (Expert, Candidate)
+            for expertise in model.objects.filter(run=run).values_list('expertise', flat=True).iterator(chunk_size=CHUNK_SIZE)
+        )
+        MatchRun.objects.filter(pk=run.pk).update(idf=run.idf)
+        vectorize_rows(run, run.idf, (Expert, Candidate))
+
+    # Persist the skill index, then match candidates with experts
+    experts = list(Expert.objects.filter(run=run).order_by('pk'))
+    index_expert_skills(experts)
+    candidates = Candidate.objects.filter(run=run).order_by('pk')
+
+    if job.assignment_mode == 'capacity':
+        # The assignment is global, so all candidates are needed at once
+        candidates = list(candidates)
+        if run.scorer == MatchRun.TFIDF:
+            engine = TfidfIndex([expert.vector for expert in experts])
+        else:
+            engine = SkillIndex([expert.expertise for expert in experts])
+        result = assign_with_capacity(
+            experts, candidates, job.expert_capacity, engine=engine, on_progress=_heartbeat(job),
+        )
+        save_scores(candidates, result.matches)
+        if settings.MATCHING_TOP_K > 1:
+            # Alternates by relevancy; the assigned expert need not be first.
+            inputs = [getattr(candidate, engine.input_field) for candidate in candidates]
+            save_ranked_matches(experts, candidates, engine.top(inputs, settings.MATCHING_TOP_K))
+        return MatchStats(len(candidates), result.objective, result.solve_time)
+
+    return _write_scores(job, run, experts, candidates)
+
+
+def _run_incremental(job):
+    """
+    Apply only the changed rows to the latest run in place and re-score only
+    the affected candidates. Returns MatchStats, or None if there is no run.
+
+    Reading the files and scoring happen first, against the run as it will
+    be and with progress reported as usual. Then the changes and new scores
+    are written in one short transaction, so readers see the run either
+    before or after the whole change. If another upload changed the run in
+    the meantime, the changes are worked out again.
+    """
+    for _ in range(INCREMENTAL_ATTEMPTS):
+        run = MatchRun.latest()
+        if run is None:
+            return None
+        # Changes are scored the way the run was scored.
+        _update(job, run=run, scorer=run.scorer, rows_parsed=0, pairs_scored=0)
+        change = _prepare_incremental(job, run)
+        try:
+            return _apply_incremental(run, change)
+        except RunChanged:
+            logger.info("Match run %s changed while job %s was being prepared; retrying", run.pk, job.pk)
+    raise RunChanged("The latest match run kept changing during this upload; upload the files again.")
+
+
+
+def _prepare_incremental(job, run):
+    """Plan the row changes and score the affected candidates, without writing to the run."""
+    experts_plan = plan_sync(job.expert_csv, Expert, run, on_chunk=_rows_read(job))
+    candidates_plan = plan_sync(job.candidate_csv, Candidate, run, on_chunk=_rows_read(job))
+    if run.scorer == MatchRun.TFIDF:
+        # Only the new and changed rows need vectors, with the run's IDF weights
+        for plan in (experts_plan, candidates_plan):
+            vectorize_changed(plan.updates + plan.inserts, run.idf)
+
+    # The experts as they will be, in the order of the new file, so ties go
+    # to the same expert as after a full upload.
+    updated = {expert.pk: expert for expert in experts_plan.updates}
+    deleted = set(experts_plan.deletes)
+    placed = [
+        (experts_plan.positions[expert.pk], updated.get(expert.pk, expert))
+        for expert in Expert.objects.filter(run=run).order_by('pk') if expert.pk not in deleted
+    ]
+    placed.extend(zip(experts_plan.insert_positions, experts_plan.inserts))
+    experts = [expert for _, expert in sorted(placed, key=lambda pair: pair[0])]
+
+    # Re-score candidates that changed themselves, that share a skill (old or
+    # new) with a changed expert, or that have no score. If unchanged experts
+    # swapped places, ties may now go the other way for anyone: re-score all.
+    unchanged = [experts_plan.positions[pk] for pk in sorted(experts_plan.positions) if pk not in updated]
+    reordered = any(before > after for before, after in zip(unchanged, unchanged[1:]))
+    run_candidates = Candidate.objects.filter(run=run)
+    changed = {candidate.pk: candidate for candidate in candidates_plan.updates}
+    gone = set(candidates_plan.deletes)
+    unscored = set(run_candidates.filter(score__isnull=True).values_list('pk', flat=True))
+    affected = [
+        pk
+        for pk, expertise in run_candidates.order_by('pk').values_list('pk', 'expertise').iterator(chunk_size=CHUNK_SIZE)
+        if pk not in gone and (
+            reordered or pk in changed or pk in unscored or parse_skills(expertise) & experts_plan.changed_skills
+        )
+    ]
+    candidates = [
+        changed.get(candidate.pk, candidate)
+        for pks in batched(affected, CHUNK_SIZE)
+        for candidate in Candidate.objects.filter(pk__in=pks).order_by('pk')
+    ] + candidates_plan.inserts
+
+    _update(
+        job, expert_count=len(experts),
+        candidate_count=run_candidates.count() - len(gone) + len(candidates_plan.inserts),
+        pairs_total=len(experts) * len(candidates), matching_started_at=timezone.now(),
+        row_errors=_row_errors(experts_plan.errors, candidates_plan.errors),
+        changes={
+            'experts': _plan_counts(experts_plan),
+            'candidates': _plan_counts(candidates_plan),
+            'rescored': len(candidates),
+        },
+    )
+    matches, ranked, stats = _score(job, run, experts, candidates, match_candidates)
+    return IncrementalChange(experts_plan, candidates_plan, experts, candidates, matches, ranked, stats)
+
+
+def _apply_incremental(run, change):
+    """Write a prepared change to `run` in one transaction; raises RunChanged if the run moved on."""
+    with transaction.atomic():
+        current = MatchRun.objects.select_for_update().filter(pk=run.pk).first()
+        if current is None or current.status != MatchRun.COMPLETED or current.updated_at != run.updated_at:
+            raise RunChanged(f"Match run {run.pk} changed")
+
+        # The re-scored candidates' old scores go first; deleted rows take
+        # theirs (and deleted experts their skill index rows) with them.
+        for pks in batched([candidate.pk for candidate in change.candidates if candidate.pk is not None], CHUNK_SIZE):
+            Score.objects.filter(candidate_id__in=pks).delete()
+            RankedMatch.objects.filter(candidate_id__in=pks).delete()
+        apply_sync(change.experts_plan, Expert)
+        apply_sync(change.candidates_plan, Candidate)
+
+        # Keep the persisted skill index in step with the changed experts
+        for pks in batched([expert.pk for expert in change.experts_plan.updates], CHUNK_SIZE):
+            ExpertSkill.objects.filter(expert_id__in=pks).delete()
+        index_expert_skills(change.experts_plan.updates + change.experts_plan.inserts)
+
+        save_scores(change.candidates, change.matches)
+        if change.ranked is not None:
+            save_ranked_matches(change.experts, change.candidates, change.ranked)
+        objective = Score.objects.filter(run=run).aggregate(total=Sum('relevancy_score'))['total'] or 0.0
+        # Readers cache by run version; this run's contents just changed.
+        MatchRun.objects.filter(pk=run.pk).update(updated_at=timezone.now())
+    return MatchStats(change.stats.scores_written, objective, change.stats.solve_time)
+
+
+def _plan_counts(plan):
+    return {
+        'inserted': len(plan.inserts), 'updated': len(plan.updates), 'deleted': len(plan.deletes),
+        'unchanged': plan.unchanged,
+    }
+
+
+def _write_scores(job, run, experts, candidates):
+    """Greedy matching that writes the Score (and RankedMatch) rows as it goes; see _score()."""
+    return _score(job, run, experts, candidates, write_scores)
+
+
+def _score(job, run, experts, candidates, scorer):
+    """
+    Greedy best-expert matching with progress, sharded if MATCHING_WORKERS > 1,
+    by `scorer` (write_scores or match_candidates), whose result is returned.
+    TF-IDF runs use the experts' stored vectors; otherwise MATCHING_ENGINE
+    is used, and an approximate engine's recall is measured on a random
+    sample of the candidates and stored on the job.
+    """
+    def candidates_scored(count):
+        MatchJob.objects.filter(pk=job.pk).update(
+            pairs_scored=F('pairs_scored') + count * len(experts), heartbeat_at=timezone.now(),
+        )
+
+    if isinstance(candidates, QuerySet):
+        candidates = candidates.iterator(chunk_size=CHUNK_SIZE)
+
+    workers = settings.MATCHING_WORKERS
+    sample = None
+    if run.scorer == MatchRun.TFIDF:
+        engine = TfidfIndex([expert.vector for expert in experts])
+        if workers > 1:
+            engine = ShardedEngine(engine, workers)
+    else:
+        engine_name = settings.MATCHING_ENGINE
+        options = {}
+        if engine_name in APPROXIMATE_ENGINES:
+            options = {'permutations': settings.MATCHING_LSH_PERMUTATIONS, 'bands': settings.MATCHING_LSH_BANDS}
+            sample = []
+            candidates = _reservoir_sample(candidates, sample, RECALL_SAMPLE_SIZE)
+        engine = build_engine(experts, engine_name, workers=workers, **options)
+
+    # Each chunk is split into one shard per worker process.
+    try:
+        result = scorer(
+            experts, candidates, chunk_size=CHUNK_SIZE * workers, engine=engine, on_chunk=candidates_scored,
+            top_k=settings.MATCHING_TOP_K,
+        )
+        if sample is not None:
+            exact_engine = build_engine(experts, DEFAULT_ENGINE)
+            expertise_list = [candidate.expertise for candidate in sample]
+            _update(job, recall=measure_recall(engine, exact_engine, expertise_list))
+    finally:
+        if workers > 1:
+            engine.close()
+    return result
+
+
+def _reservoir_sample(items, sample, size):
+    """Yield items unchanged while keeping a uniform random sample of `size` of them in `sample`."""
+    rng = random.Random()
+    for seen, item in enumerate(items):
+        if seen < size:
+            sample.append(item)
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < size:
+                sample[slot] = item
+        yield item
+
+
+def _rows_read(job):
+    def rows_read(count):
+        MatchJob.objects.filter(pk=job.pk).update(rows_parsed=F('rows_parsed') + count, heartbeat_at=timezone.now())
+    return rows_read
+
+
+def _row_errors(expert_errors, candidate_errors):
+    return {
+        'expert': [list(error) for error in expert_errors[:MAX_STORED_ERRORS]],
+        'expert_count': len(expert_errors),
+        'candidate': [list(error) for error in candidate_errors[:MAX_STORED_ERRORS]],
+        'candidate_count': len(candidate_errors),
+    }
+
+
+def _heartbeat(job):
+    """
+    An on_progress() callback for solves that write nothing for a long
+    time: writes heartbeat_at at most every HEARTBEAT_INTERVAL seconds, so
+    recover_stale_jobs() leaves the job alone, and raises JobLost if the
+    job was failed as stale anyway.
+    """
+    last = time.monotonic()
+
+    def heartbeat():
+        nonlocal last
+        if time.monotonic() - last < HEARTBEAT_INTERVAL:
+            return
+        last = time.monotonic()
+        if not MatchJob.objects.filter(pk=job.pk, status=MatchJob.RUNNING).update(heartbeat_at=timezone.now()):
+            raise JobLost(job.pk)
+    return heartbeat
+
+
+def _finish(job, **fields):
+    """_update() for the final status, only while the job is RUNNING. Returns whether it was."""
+    fields.setdefault('heartbeat_at', timezone.now())
+    if not MatchJob.objects.filter(pk=job.pk, status=MatchJob.RUNNING).update(**fields):
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
+
+
+def _update(job, **fields):
+    """Write progress fields straight to the row and mirror them on `job`."""
+    fields.setdefault('heartbeat_at', timezone.now())
+    MatchJob.objects.filter(pk=job.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
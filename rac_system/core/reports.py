@@ -0,0 +1,127 @@
+"""
+The interview assignments PDF.
+
+A report is rendered once per match-run version and kept under
+MEDIA_ROOT/reports; later downloads stream the cached file. Rows are read
+from the database in chunks with their expert and candidate names joined in,
+and the finished document is written straight to disk rather than built up
+as one string in memory.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from fpdf import FPDF, FPDF_VERSION
+
+from .models import Score
+
+REPORTS_DIR = 'reports'
+
+# Scores fetched from the database at a time while rendering.
+REPORT_CHUNK_SIZE = 2000
+
+COLUMNS = (('Expert', 60), ('Candidate', 60), ('Relevancy Score', 60))
+
+
+class FileBuffer:
+    """
+    Stands in for FPDF's document buffer (a str it appends to and measures for
+    object offsets) and writes the document straight to a binary file, instead
+    of growing one big string with quadratic copying.
+
+    This relies on the internals of fpdf 1.7 (pinned in requirements.txt);
+    AssignmentsPDF.save() refuses to run on any other version.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.length = 0
+
+    def __iadd__(self, text):
+        data = text.encode('latin-1')
+        self.file.write(data)
+        self.length += len(data)
+        return self
+
+    def __len__(self):
+        return self.length
+
+
+class AssignmentsPDF(FPDF):
+    """Title on the first page, the table header repeated on every page."""
+
+    def save(self, file):
+        """Finish the document, writing it to the open binary `file`."""
+        if not FPDF_VERSION.startswith('1.7.') or not isinstance(getattr(self, 'buffer', None), str):
+            raise RuntimeError(f"Streaming reports needs fpdf 1.7 (see requirements.txt), not fpdf {FPDF_VERSION}")
+        self.buffer = FileBuffer(file)
+        self.close()
+
+    def header(self):
+        if self.page_no() == 1:
+            self.set_font("Arial", size=12)
+            self.cell(200, 10, txt="Interview Assignments", ln=True, align='C')
+        self.set_font("Arial", 'B', size=12)
+        for title, width in COLUMNS:
+            self.cell(width, 10, title, 1)
+        self.ln()
+        self.set_font("Arial", size=12)
+
+    def row(self, *values):
+        for value, (_, width) in zip(values, COLUMNS):
+            # The built-in fonts are latin-1 only.
+            self.cell(width, 10, value.encode('latin-1', 'replace').decode('latin-1'), 1)
+        self.ln()
+
+
+def report_path(run):
+    """Where the report for the current version of `run` is cached."""
+    version = run.updated_at.strftime('%Y%m%d%H%M%S%f')
+    return Path(settings.MEDIA_ROOT) / REPORTS_DIR / f"interview_assignments_run{run.pk}_{version}.pdf"
+
+
+def assignments_report(run):
+    """
+    Return the path of the PDF report for `run`, rendering it first if this
+    version of the run has no cached report yet.
+    """
+    path = report_path(run)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pdf = render_report(Score.objects.filter(run=run))
+    # Write under a temporary name and rename, so a concurrent download never
+    # sees a half-written file.
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            pdf.save(tmp_file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    # Reports of older runs and versions are no longer reachable.
+    for stale in path.parent.glob('interview_assignments_run*.pdf'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def render_report(scores):
+    """Lay out the given Score queryset as an AssignmentsPDF."""
+    pdf = AssignmentsPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    # Expert and candidate names come joined into each row; no model
+    # instances are built.
+    rows = (
+        scores.order_by('pk')
+        .values_list('expert__name', 'candidate__name', 'relevancy_score')
+        .iterator(chunk_size=REPORT_CHUNK_SIZE)
+    )
+    for expert_name, candidate_name, relevancy_score in rows:
+        pdf.row(expert_name or "No match", candidate_name, f"{relevancy_score:.2f}")
+    return pdf
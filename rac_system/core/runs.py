@@ -0,0 +1,66 @@
+"""
+MatchRun lifecycle: swapping a finished run in and dropping old ones.
+
+Every upload writes its experts, candidates and scores into its own MatchRun,
+so concurrent uploads never touch each other's rows and readers keep seeing
+the previous run until the new one is complete. Old runs are deleted in small
+batches afterwards, each in its own short transaction, so the cleanup never
+holds a long lock on the tables readers and other uploads use.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .ingest import CHUNK_SIZE
+from .models import Candidate, Expert, ExpertSkill, MatchRun, RankedMatch, Score
+
+
+def complete_run(run):
+    """Make `run` the one readers see. A single UPDATE, so the swap is atomic."""
+    completed_at = timezone.now()
+    MatchRun.objects.filter(pk=run.pk).update(
+        status=MatchRun.COMPLETED, completed_at=completed_at, updated_at=completed_at,
+    )
+    run.status, run.completed_at, run.updated_at = MatchRun.COMPLETED, completed_at, completed_at
+
+
+def fail_run(run):
+    MatchRun.objects.filter(pk=run.pk).update(status=MatchRun.FAILED, updated_at=timezone.now())
+    run.status = MatchRun.FAILED
+
+
+def drop_run(run, batch_size=CHUNK_SIZE):
+    """
+    Delete a run and everything in it, children first and `batch_size` rows
+    per transaction.
+    """
+    for queryset in (
+        Score.objects.filter(run=run),
+        RankedMatch.objects.filter(run=run),
+        ExpertSkill.objects.filter(expert__run=run),
+        Candidate.objects.filter(run=run),
+        Expert.objects.filter(run=run),
+    ):
+        model = queryset.model
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                model.objects.filter(pk__in=pks).delete()
+    MatchRun.objects.filter(pk=run.pk).delete()
+
+
+def prune_runs(batch_size=CHUNK_SIZE):
+    """
+    Drop failed runs and completed runs older than the latest one. Runs still
+    being built by other uploads are left alone. Returns the number dropped.
+    """
+    latest = MatchRun.latest()
+    stale = MatchRun.objects.filter(status__in=[MatchRun.COMPLETED, MatchRun.FAILED])
+    if latest is not None:
+        stale = stale.exclude(pk=latest.pk)
+    dropped = 0
+    for run in stale.order_by('pk'):
+        drop_run(run, batch_size)
+        dropped += 1
+    return dropped
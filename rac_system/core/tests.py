@@ -1,3 +1,869 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import itertools
+import json
+import random
+import shutil
+import tempfile
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import pipeline
+from .assignment import EPSILON, assign_with_capacity
+from .benchmark import synthetic_people
+from .ingest import CSVFormatError, MatchStats, RowError, index_expert_skills, read_csv_chunks
+from .matching import MinHashLSH, ShardedEngine, SkillIndex, SkillMatrix, measure_recall, ranked_pairs, top_k
+from .models import Candidate, Expert, MatchJob, MatchRun, RankedMatch, Score
+from .pagination import approximate_count, paginate
+from .pipeline import claim_next_job, recover_stale_jobs, run_match_job
+from .reports import assignments_report, render_report
+from .runs import complete_run, fail_run, prune_runs
+from .tfidf import vectorize
+from .views import RESULTS_PER_PAGE, calculate_relevancy
+
+
+def relevancy_loop(experts, candidates):
+    """The original nested calculate_relevancy() loop: (expert row, score) per candidate."""
+    matches = []
+    for candidate in candidates:
+        best_row, best_score = None, 0
+        for row, expert in enumerate(experts):
+            score = calculate_relevancy(expert, candidate)
+            if score > best_score:
+                best_row, best_score = row, score
+        matches.append((best_row, best_score))
+    return matches
+
+
+def random_expertise(rng, count, vocabulary=12):
+    """Expertise strings with duplicate, blank and padded skills and some empty ones."""
+    skills = [f"skill{index}" for index in range(vocabulary)] + ['', ' skill0 ', 'skill1']
+    return [
+        ",".join(rng.choice(skills) for _ in range(rng.randint(1, 5))) if rng.random() > 0.1 else rng.choice(['', '  '])
+        for _ in range(count)
+    ]
+
+
+class CSVReadingTests(TestCase):
+    """Uploads are read in chunks, malformed and undecodable rows reported with their line numbers."""
+
+    def read(self, data, chunk_size=1000):
+        return list(read_csv_chunks(SimpleUploadedFile('people.csv', data), chunk_size))
+
+    def test_malformed_rows(self):
+        data = (
+            'name,expertise\n'
+            'Ann,python\n'
+            'Bob,python,sql\n'    # Unquoted comma
+            'Cat\n'               # No expertise
+            ' ,python\n'
+            f'{"x" * 101},go\n'
+            '"Dan","python,\nsql"\n'  # Quoted, over two lines
+            'Eve,rust\n'
+        ).encode()
+        [(rows, errors)] = self.read(data)
+        self.assertEqual(rows, [
+            {'name': 'Ann', 'expertise': 'python'}, {'name': 'Dan', 'expertise': 'python,\nsql'},
+            {'name': 'Eve', 'expertise': 'rust'},
+        ])
+        self.assertEqual([error.line for error in errors], [3, 4, 5, 6])
+        self.assertIn("Too many fields", errors[0].message)
+
+    def test_encoding_errors_are_reported_per_row(self):
+        # Latin-1 bytes in Bob's row and in Cat's (a row over two lines)
+        data = b'\xef\xbb\xbfname,expertise\nAnn,python\nB\xf6b,sql\n"Cat","go,\nr\xfcst"\nDan,caf\xc3\xa9\n'
+        [(rows, errors)] = self.read(data)
+        self.assertEqual(rows, [{'name': 'Ann', 'expertise': 'python'}, {'name': 'Dan', 'expertise': 'caf\u00e9'}])
+        self.assertEqual(errors, [RowError(3, "Not valid UTF-8 text"), RowError(5, "Not valid UTF-8 text")])
+
+        # In a file spanning many read blocks, only the bad row is lost
+        lines = [f'Person {index},skill {index}'.encode() for index in range(3000)]
+        lines[2500] = b'Person \xff,go'
+        chunks = self.read(b'name,expertise\n' + b'\n'.join(lines) + b'\n', chunk_size=700)
+        rows = [row for chunk_rows, _ in chunks for row in chunk_rows]
+        self.assertEqual(len(rows), 2999)
+        self.assertEqual([error for _, chunk_errors in chunks for error in chunk_errors], [RowError(2502, "Not valid UTF-8 text")])
+
+        with self.assertRaisesMessage(CSVFormatError, "not valid UTF-8"):
+            self.read(b'n\xe4me,expertise\nAnn,python\n')
+
+    def test_batch_boundaries(self):
+        people = [(f'Person {index}', 'python') for index in range(7)]
+        people[3] = ('', 'python')
+        lines = ['name,expertise'] + [f'{name},{expertise}' for name, expertise in people]
+        for chunk_size in (1, 3, 7, 8):
+            chunks = self.read('\n'.join(lines).encode(), chunk_size)
+            self.assertEqual([len(rows) + len(errors) for rows, errors in chunks][:-1], [chunk_size] * (len(chunks) - 1))
+            self.assertEqual(
+                [row['name'] for rows, _ in chunks for row in rows], [name for name, _ in people if name],
+            )
+            self.assertEqual([error.line for _, errors in chunks for error in errors], [5])
+
+    def test_missing_column(self):
+        with self.assertRaisesMessage(CSVFormatError, "Missing required column(s): expertise"):
+            self.read(b'name,skills\nAnn,python\n')
+
+
+class ExactEngineTests(TestCase):
+    """The exact engines give the calculate_relevancy() loop's matches, ties and all."""
+
+    experts = [
+        "python, django",
+        "django,python",       # Same skills as the first: ties go to the first
+        "python,python, sql",  # Duplicate skill
+        "",
+        "   ",
+        "java,,go",            # Blank skill
+        "rust",
+    ]
+    candidates = [
+        "python,django",
+        "sql,python",
+        "",
+        "  ",
+        "cobol",               # No overlap
+        "go,java,",
+        ",",
+        "rust, rust",
+    ]
+
+    def assertMatchesLoop(self, engine_class, experts, candidates):
+        self.assertEqual(engine_class(experts).best(candidates), relevancy_loop(experts, candidates))
+
+    def test_matrix_edge_cases(self):
+        matches = SkillMatrix(self.experts).best(self.candidates)
+        self.assertEqual(matches, relevancy_loop(self.experts, self.candidates))
+        self.assertEqual(matches[0], (0, 10.0))
+        self.assertEqual(matches[2:5], [(None, 0)] * 3)
+
+    def test_matrix_random(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            self.assertMatchesLoop(SkillMatrix, random_expertise(rng, 30), random_expertise(rng, 60))
+
+    def test_matrix_blocks(self):
+        rng = random.Random(2)
+        experts, candidates = random_expertise(rng, 20), random_expertise(rng, 50)
+        self.assertEqual(SkillMatrix(experts).best(candidates, block_size=7), relevancy_loop(experts, candidates))
+
+    def test_matrix_without_experts(self):
+        self.assertEqual(SkillMatrix([]).best(["python", ""]), [(None, 0), (None, 0)])
+        self.assertEqual(SkillMatrix(["", " "]).best(["python"]), [(None, 0)])
+
+    def test_index_edge_cases(self):
+        self.assertEqual(SkillIndex(self.experts).best(self.candidates), relevancy_loop(self.experts, self.candidates))
+
+    def test_index_random(self):
+        rng = random.Random(3)
+        for _ in range(20):
+            self.assertMatchesLoop(SkillIndex, random_expertise(rng, 30), random_expertise(rng, 60))
+
+    def test_index_from_expert_skills(self):
+        run = MatchRun.objects.create()
+        experts = Expert.objects.bulk_create(
+            [Expert(run=run, name=f"Expert {row}", expertise=expertise) for row, expertise in enumerate(self.experts)]
+        )
+        index_expert_skills(experts)
+        self.assertEqual(
+            SkillIndex.from_expert_skills(experts).best(self.candidates), relevancy_loop(self.experts, self.candidates),
+        )
+
+
+
+    def test_sharded_engine_matches_single_process(self):
+        rng = random.Random(5)
+        experts = ["python,sql", "sql,python", *random_expertise(rng, 40, vocabulary=8)]
+        # Tied candidates (same expertise, tied experts) straddle the boundary
+        # between the two shards of a 7-candidate chunk.
+        candidates = [*random_expertise(rng, 3, vocabulary=8), "python,sql", "python,sql", *random_expertise(rng, 58, vocabulary=8)]
+        for engine_class in (SkillIndex, SkillMatrix):
+            engine = engine_class(experts)
+            with ShardedEngine(engine, workers=2) as sharded:
+                for start in range(0, len(candidates), 7):  # Chunks as write_scores passes them
+                    chunk = candidates[start:start + 7]
+                    self.assertEqual(sharded.best(chunk), engine.best(chunk))
+                    self.assertEqual(sharded.top(chunk, 3), engine.top(chunk, 3))
+                self.assertEqual(sharded.best(candidates), relevancy_loop(experts, candidates))
+                self.assertEqual(sharded.top(candidates, 3), engine.top(candidates, 3))
+            self.assertEqual(engine.best(candidates)[3:5], [(0, 10.0), (0, 10.0)])
+
+
+
+class MinHashLSHTests(TestCase):
+    """The approximate engine scores exactly what it finds and finds nearly every best match."""
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.experts = [person.expertise for person in synthetic_people(300, 6, 200, rng, skew=1.0)]
+        self.candidates = [person.expertise for person in synthetic_people(300, 6, 200, rng, skew=1.0)]
+
+    def test_recall(self):
+        recall = measure_recall(MinHashLSH(self.experts), SkillIndex(self.experts), self.candidates)
+        self.assertGreater(recall, 0.95)
+        # Fewer, wider bands collide less often
+        self.assertLess(measure_recall(MinHashLSH(self.experts, 64, 4), SkillIndex(self.experts), self.candidates), recall)
+
+    def test_scores_are_exact(self):
+        ranked = MinHashLSH(self.experts).top(self.candidates, 5, block_size=64)
+        self.assertTrue(any(ranked))
+        for candidate, matches in zip(self.candidates, ranked):
+            for row, score in matches:
+                self.assertEqual(score, calculate_relevancy(self.experts[row], candidate))
+
+    def test_identical_skill_sets_always_collide(self):
+        lsh = MinHashLSH(["python,sql", "", "go"])
+        self.assertEqual(lsh.best(["sql, python", "", "rust"]), [(0, 10.0), (None, 0), (None, 0)])
+
+
+def people(expertise_list):
+    return [SimpleNamespace(pk=row, expertise=expertise) for row, expertise in enumerate(expertise_list)]
+
+
+def brute_force_objective(experts, candidates, capacity):
+    """Best total relevancy over every assignment respecting the capacity."""
+    scores = [[calculate_relevancy(expert.expertise, candidate.expertise) for expert in experts] for candidate in candidates]
+    best = 0
+    for choice in itertools.product([None, *range(len(experts))], repeat=len(candidates)):
+        loads = Counter(row for row in choice if row is not None)
+        if all(load <= capacity for load in loads.values()):
+            best = max(best, sum(scores[index][row] for index, row in enumerate(choice) if row is not None))
+    return best
+
+
+class CapacityAssignmentTests(TestCase):
+    """Capacity-constrained assignment respects capacities and finds the optimal total."""
+
+    def assertValid(self, result, experts, candidates, capacity):
+        loads = Counter(expert.pk for expert, _ in result.matches if expert is not None)
+        self.assertTrue(all(load <= capacity for load in loads.values()), loads)
+        for (expert, score), candidate in zip(result.matches, candidates):
+            expected = calculate_relevancy(expert.expertise, candidate.expertise) if expert else 0
+            self.assertAlmostEqual(score, expected)
+        self.assertAlmostEqual(result.objective, sum(score for _, score in result.matches))
+
+    def test_capacity_and_unassignable_candidates(self):
+        experts = people(["python", "java"])
+        candidates = people(["python", "python,sql", "python,django", "cobol", ""])
+        result = assign_with_capacity(experts, candidates, 1)
+        self.assertValid(result, experts, candidates, 1)
+        # Only one of the Python candidates gets the Python expert, the best fit
+        self.assertEqual([expert.pk if expert else None for expert, _ in result.matches], [0, None, None, None, None])
+        self.assertEqual(result.matches[3], (None, 0))
+
+        result = assign_with_capacity(experts, candidates, 2)
+        self.assertEqual(sum(expert is not None for expert, _ in result.matches), 2)
+        self.assertEqual(assign_with_capacity(experts, candidates, 0).matches, [(None, 0)] * len(candidates))
+        self.assertEqual(assign_with_capacity([], candidates, 1).matches, [(None, 0)] * len(candidates))
+
+    def test_objective_equals_brute_force(self):
+        rng = random.Random(4)
+        for _ in range(40):
+            experts = people(random_expertise(rng, rng.randint(2, 4), vocabulary=5))
+            candidates = people(random_expertise(rng, rng.randint(3, 6), vocabulary=5))
+            capacity = rng.randint(1, 2)
+            result = assign_with_capacity(experts, candidates, capacity)
+            self.assertValid(result, experts, candidates, capacity)
+            slots = len(experts) * capacity
+            self.assertAlmostEqual(
+                result.objective, brute_force_objective(experts, candidates, capacity),
+                delta=(len(candidates) + slots) * EPSILON + 1e-9,
+            )
+
+
+
+class UploadTestCase(TestCase):
+    """Uploaded CSVs are stored under a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MATCHING_TOP_K=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = get_user_model().objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.client.force_login(self.user)
+
+    def queue_job(self, experts, candidates, **fields):
+        """A queued job for CSVs given as lists of (name, expertise)."""
+        return MatchJob.objects.create(
+            created_by=self.user, expert_csv=self.csv('experts.csv', experts),
+            candidate_csv=self.csv('candidates.csv', candidates), **fields,
+        )
+
+    def csv(self, name, rows, header='name,expertise'):
+        lines = [header] + [f'{person},"{expertise}"' for person, expertise in rows]
+        return SimpleUploadedFile(name, ('\n'.join(lines) + '\n').encode())
+
+
+class MatchJobTests(UploadTestCase):
+    """Match jobs are claimed once, finish completed or failed, and are only shown to their owner."""
+
+    experts = [('Ann', 'python,django'), ('Bob', 'java')]
+    candidates = [('Cid', 'python'), ('Dee', 'java,sql'), ('Eve', 'cobol')]
+
+    def test_claim_has_a_single_winner(self):
+        first = self.queue_job(self.experts, self.candidates)
+        second = self.queue_job(self.experts, self.candidates)
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(MatchJob.objects.filter(status=MatchJob.RUNNING).count(), 2)
+
+    def test_completed_job(self):
+        job = self.queue_job(self.experts, self.candidates)
+        job = run_match_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, MatchJob.COMPLETED)
+        self.assertEqual((job.expert_count, job.candidate_count, job.rows_parsed), (2, 3, 5))
+        self.assertEqual(job.pairs_scored, job.pairs_total)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.run.status, MatchRun.COMPLETED)
+        self.assertEqual(MatchRun.latest(), job.run)
+        self.assertEqual(
+            set(Score.objects.values_list('candidate__name', 'expert__name')),
+            {('Cid', 'Ann'), ('Dee', 'Bob'), ('Eve', None)},
+        )
+
+        data = self.client.get(reverse('match_job_status', args=[job.pk])).json()
+        self.assertEqual(data['status'], MatchJob.COMPLETED)
+        self.assertEqual(data['pairs_scored'], 6)
+        self.assertIsNone(data['eta_seconds'])
+        self.assertEqual(data['results_url'], reverse('match_job_results', args=[job.pk]))
+        self.assertRedirects(self.client.get(reverse('match_job', args=[job.pk])), data['results_url'])
+
+    def test_failed_job_drops_its_partial_run(self):
+        previous = self.queue_job(self.experts, self.candidates)
+        run_match_job(claim_next_job())
+        # The experts file is read into a new run before the candidates file fails
+        job = MatchJob.objects.create(
+            created_by=self.user, expert_csv=self.csv('experts.csv', self.experts),
+            candidate_csv=self.csv('candidates.csv', [('Cid', 'python')], header='name,skills'),
+        )
+        with self.assertLogs('core.pipeline', 'ERROR'):
+            job = run_match_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, MatchJob.FAILED)
+        self.assertIn("Missing required column(s): expertise", job.error)
+        self.assertIsNotNone(job.finished_at)
+        previous.refresh_from_db()
+        self.assertEqual(list(MatchRun.objects.all()), [previous.run])
+        self.assertEqual(Expert.objects.exclude(run=previous.run).count(), 0)
+
+        data = self.client.get(reverse('match_job_status', args=[job.pk])).json()
+        self.assertEqual((data['status'], data['results_url']), (MatchJob.FAILED, None))
+        self.assertIn("expertise", data['error'])
+
+    def test_stale_running_job_is_failed_and_its_run_dropped(self):
+        stale = self.queue_job(self.experts, self.candidates)
+        live = self.queue_job(self.experts, self.candidates)
+        claim_next_job()
+        claim_next_job()
+        run = MatchRun.objects.create()
+        Expert.objects.create(run=run, name="Ann", expertise="python")
+        long_ago = timezone.now() - datetime.timedelta(hours=2)
+        MatchJob.objects.filter(pk=stale.pk).update(run=run, heartbeat_at=long_ago)
+
+        self.assertEqual([job.pk for job in recover_stale_jobs(stale_after=3600)], [stale.pk])
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual((stale.status, live.status), (MatchJob.FAILED, MatchJob.RUNNING))
+        self.assertFalse(MatchRun.objects.filter(pk=run.pk).exists())
+        self.assertEqual(recover_stale_jobs(stale_after=3600), [])
+
+    def solve(self, before=None):
+        """Run a capacity job, calling before(job) as its auction starts; heartbeats are written at every bid."""
+        def assign(experts, candidates, *args, **kwargs):
+            if before:
+                before(MatchJob.objects.get())
+            return assign_with_capacity(experts, candidates, *args, **kwargs)
+
+        self.queue_job(self.experts * 3, self.candidates * 3, assignment_mode='capacity', expert_capacity=1)
+        with mock.patch.object(pipeline, 'HEARTBEAT_INTERVAL', 0), mock.patch('core.assignment.PROGRESS_EVERY', 1), \
+                mock.patch.object(pipeline, 'assign_with_capacity', side_effect=assign):
+            return run_match_job(claim_next_job())
+
+    def test_long_solve_writes_heartbeats(self):
+        long_ago = timezone.now() - datetime.timedelta(hours=2)
+        job = self.solve(before=lambda job: MatchJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago))
+        self.assertEqual(job.status, MatchJob.COMPLETED, job.error)
+        self.assertGreater(MatchJob.objects.get().heartbeat_at, long_ago)
+
+    def test_job_failed_as_stale_during_the_solve_stays_failed(self):
+        def fail_as_stale(job):
+            MatchJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(hours=2))
+            recover_stale_jobs(stale_after=3600)
+
+        with self.assertLogs('core.pipeline', 'WARNING'):
+            job = self.solve(before=fail_as_stale)
+        self.assertEqual(job.status, MatchJob.FAILED)
+        self.assertFalse(MatchRun.objects.exists())
+
+    def test_completion_only_overwrites_a_running_job(self):
+        def fail_as_stale(job):
+            MatchJob.objects.filter(pk=job.pk).update(status=MatchJob.FAILED, error="Stale")
+            return MatchStats(0, 0.0, 0.0)
+
+        self.queue_job(self.experts, self.candidates)
+        with mock.patch.object(pipeline, '_run', side_effect=fail_as_stale), self.assertLogs('core.pipeline', 'WARNING'):
+            job = run_match_job(claim_next_job())
+        self.assertEqual((job.status, job.error), (MatchJob.FAILED, "Stale"))
+
+    def test_jobs_only_visible_to_their_owner(self):
+        job = self.queue_job(self.experts, self.candidates)
+        run_match_job(claim_next_job())
+        other = get_user_model().objects.create_user('other@example.com', 'password', name='Other', role='COMPANY')
+        self.client.force_login(other)
+        for name in ('match_job', 'match_job_status', 'match_job_results'):
+            self.assertEqual(self.client.get(reverse(name, args=[job.pk])).status_code, 404)
+
+
+
+class IncrementalUploadTests(UploadTestCase):
+    """An incremental upload leaves the same scores and rankings as uploading the files in full."""
+
+    experts = [('Ann', 'python,django'), ('Bob', 'java'), ('Cat', 'sql,python'), ('Dan', 'go')]
+    candidates = [('Cid', 'python'), ('Dee', 'java,sql'), ('Eve', 'go'), ('Fay', 'python,django'), ('Gus', 'rust')]
+
+    def upload(self, experts, candidates, incremental=False):
+        self.queue_job(experts, candidates, incremental=incremental)
+        job = run_match_job(claim_next_job())
+        self.assertEqual(job.status, MatchJob.COMPLETED, job.error)
+        return job
+
+    def results(self):
+        run = MatchRun.latest()
+        scores = Score.objects.filter(run=run).values_list('candidate__name', 'expert__name', 'relevancy_score')
+        ranked = RankedMatch.objects.filter(run=run).values_list('candidate__name', 'rank', 'expert__name', 'relevancy_score')
+        return sorted(scores, key=str), sorted(ranked, key=str)
+
+    def assertIncrementalMatchesFull(self, experts, candidates):
+        self.upload(self.experts, self.candidates)
+        job = self.upload(experts, candidates, incremental=True)
+        incremental = self.results()
+        self.upload(experts, candidates)
+        self.assertEqual(incremental, self.results())
+        return job
+
+    def test_changed_files(self):
+        experts = [
+            ('Zed', 'python,django'),  # Added, tied with Ann and ahead of her in the file
+            ('Ann', 'python,django'),
+            ('Cat', 'sql,java'),       # Changed
+            ('Dan', 'go'),             # Bob deleted
+        ]
+        candidates = [('Cid', 'python'), ('Dee', 'java,sql'), ('Eve', 'go,python'), ('Fay', 'python,django'), ('Hal', 'java')]
+        job = self.assertIncrementalMatchesFull(experts, candidates)
+        self.assertEqual(job.changes['experts'], {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 2})
+        self.assertEqual(job.changes['candidates'], {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 3})
+        self.assertEqual(Score.objects.get(candidate__name='Fay').expert.name, 'Zed')
+
+    def test_reordered_experts(self):
+        job = self.assertIncrementalMatchesFull(list(reversed(self.experts)), self.candidates)
+        self.assertEqual(job.changes['experts']['unchanged'], 4)
+
+    def test_unchanged_rows_keep_their_scores(self):
+        self.upload(self.experts, self.candidates)
+        gus = Score.objects.get(candidate__name='Gus')
+        job = self.upload(self.experts, [*self.candidates, ('Ivy', 'go')], incremental=True)
+        self.assertEqual(job.changes['rescored'], 1)
+        self.assertTrue(Score.objects.filter(pk=gus.pk).exists())
+        self.assertEqual(Score.objects.get(candidate__name='Ivy').expert.name, 'Dan')
+
+
+
+
+class TfidfTests(UploadTestCase):
+    """TF-IDF relevancy is the cosine of the stored vectors; incremental uploads keep the run's IDF."""
+
+    experts = [('Ann', 'python,django'), ('Bob', 'python,haskell'), ('Cat', 'python,sql')]
+    candidates = [('Cid', 'python,haskell'), ('Dee', 'python,django,sql'), ('Eve', 'python'), ('Fay', 'cobol')]
+
+    def upload(self, experts, candidates, incremental=False):
+        self.queue_job(experts, candidates, scorer=MatchRun.TFIDF, incremental=incremental)
+        job = run_match_job(claim_next_job())
+        self.assertEqual(job.status, MatchJob.COMPLETED, job.error)
+        return MatchRun.latest()
+
+    def cosine(self, first, second):
+        return sum(weight * second.get(skill, 0) for skill, weight in first.items()) * 10
+
+    def assertScoresAreCosines(self, run):
+        experts = list(Expert.objects.filter(run=run).order_by('pk'))
+        for score in Score.objects.filter(run=run).select_related('candidate', 'expert'):
+            cosines = [self.cosine(score.candidate.vector, expert.vector) for expert in experts]
+            if score.expert is None:
+                self.assertEqual(max(cosines), 0)
+            else:
+                self.assertAlmostEqual(score.relevancy_score, self.cosine(score.candidate.vector, score.expert.vector))
+                self.assertAlmostEqual(score.relevancy_score, max(cosines))
+        for match in RankedMatch.objects.filter(run=run).select_related('candidate', 'expert'):
+            self.assertAlmostEqual(match.relevancy_score, self.cosine(match.candidate.vector, match.expert.vector))
+
+    def test_scores_are_cosines_of_stored_vectors(self):
+        run = self.upload(self.experts, self.candidates)
+        self.assertEqual(run.scorer, MatchRun.TFIDF)
+        self.assertEqual(run.idf['documents'], 7)
+        for vector in Candidate.objects.filter(run=run).values_list('vector', flat=True):
+            self.assertAlmostEqual(sum(weight * weight for weight in vector.values()), 1)
+        self.assertScoresAreCosines(run)
+        # The rare skill outweighs the common one
+        self.assertEqual(Score.objects.get(candidate__name='Cid').expert.name, 'Bob')
+        self.assertEqual(Score.objects.get(candidate__name='Fay').expert, None)
+
+    def test_incremental_upload_reuses_the_idf(self):
+        run = self.upload(self.experts, self.candidates)
+        before = dict(Candidate.objects.filter(run=run).values_list('name', 'vector'))
+        with mock.patch('core.tfidf.vectorize', wraps=vectorize) as vectorized:
+            run = self.upload(
+                [*self.experts[:2], ('Cat', 'sql,rust')],
+                [*self.candidates[:3], ('Gil', 'rust'), ('Hal', 'rust')], incremental=True,
+            )
+        # Cat's new expertise, and Gil's and Hal's (the same, so once)
+        self.assertEqual(vectorized.call_count, 2)
+        self.assertEqual(run.idf['documents'], 7)
+        after = dict(Candidate.objects.filter(run=run).values_list('name', 'vector'))
+        self.assertEqual({name: after[name] for name in ('Cid', 'Dee', 'Eve')}, {name: before[name] for name in ('Cid', 'Dee', 'Eve')})
+        # A skill unknown to the run's IDF gets the rarest weight
+        self.assertEqual(after['Gil'], {'rust': 1.0})
+        self.assertScoresAreCosines(run)
+
+
+
+class RankedMatchTests(UploadTestCase):
+    """The top_k experts of each candidate are stored ranked, best first and in file order among ties."""
+
+    experts = [('Ann', 'python,django'), ('Bob', 'python'), ('Cat', 'python,django'), ('Dan', 'java')]
+    candidates = [('Cid', 'python,django'), ('Dee', 'python'), ('Eve', 'java,sql'), ('Fay', 'cobol')]
+    expected = {
+        'Cid': [(1, 'Ann'), (2, 'Cat')],  # Bob scores lower
+        'Dee': [(1, 'Bob'), (2, 'Ann')],  # Ann and Cat tie
+        'Eve': [(1, 'Dan')],
+    }
+
+    def assertRanked(self, **fields):
+        self.queue_job(self.experts, self.candidates, **fields)
+        job = run_match_job(claim_next_job())
+        self.assertEqual(job.status, MatchJob.COMPLETED, job.error)
+        ranked = RankedMatch.objects.filter(run=job.run).order_by('candidate__name', 'rank')
+        stored = {}
+        for match in ranked.select_related('candidate', 'expert'):
+            stored.setdefault(match.candidate.name, []).append((match.rank, match.expert.name))
+        self.assertEqual(stored, self.expected)
+        for score in Score.objects.filter(run=job.run).exclude(expert=None):
+            self.assertEqual(ranked.get(candidate=score.candidate, rank=1).expert_id, score.expert_id)
+
+        response = self.client.get(reverse('match_job_results', args=[job.pk]))
+        shown = {
+            score.candidate.name: [(match.rank, match.expert.name) for match in score.candidate.ranked]
+            for score in response.context['scores']
+        }
+        self.assertEqual(shown, {**self.expected, 'Fay': []})
+
+    def test_skill_index(self):
+        self.assertRanked()
+
+    @override_settings(MATCHING_ENGINE='lsh')
+    def test_lsh(self):
+        self.assertRanked()
+
+    def test_tfidf(self):
+        self.assertRanked(scorer=MatchRun.TFIDF)
+
+    def test_ranked_pairs_sorts_only_the_top_k(self):
+        rng = np.random.default_rng(3)
+        count = 40
+        candidates = np.repeat(np.arange(count), rng.integers(0, 30, count))
+        rows = np.concatenate([rng.permutation(30)[:size] for size in np.bincount(candidates, minlength=count)])
+        scores = rng.integers(0, 4, len(candidates)) * 2.5  # Plenty of ties, and zeros
+        for k in (1, 2, 5):
+            with mock.patch('numpy.lexsort', wraps=np.lexsort) as lexsort:
+                ranked = ranked_pairs(candidates, rows, scores, count, k)
+            self.assertLess(len(lexsort.call_args.args[0][0]), len(candidates) / 2)
+            for candidate in range(count):
+                mine = candidates == candidate
+                self.assertEqual(ranked[candidate], top_k(rows[mine], scores[mine], k))
+
+
+class MatchRunTests(TestCase):
+    """Readers keep seeing the last completed run until a new one is swapped in; old runs are pruned."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.client.force_login(self.user)
+
+    def add_run(self, name, status=MatchRun.BUILDING):
+        run = MatchRun.objects.create(created_by=self.user)
+        expert = Expert.objects.create(run=run, name=f"{name} expert", expertise="python")
+        candidate = Candidate.objects.create(run=run, name=f"{name} candidate", expertise="python")
+        Score.objects.create(run=run, expert=expert, candidate=candidate, relevancy_score=10)
+        if status == MatchRun.COMPLETED:
+            complete_run(run)
+        elif status == MatchRun.FAILED:
+            fail_run(run)
+        return run
+
+    def shown_candidates(self, job):
+        response = self.client.get(reverse('match_job_results', args=[job.pk]))
+        return [score.candidate.name for score in response.context['scores']], response.context['superseded']
+
+    def test_readers_see_the_previous_run_while_a_new_one_builds(self):
+        first = self.add_run("First", MatchRun.COMPLETED)
+        job = MatchJob.objects.create(created_by=self.user, run=first, status=MatchJob.COMPLETED)
+        second = self.add_run("Second")
+        self.assertEqual(MatchRun.latest(), first)
+        self.assertEqual(self.shown_candidates(job), (["First candidate"], False))
+
+        complete_run(second)
+        self.assertEqual(MatchRun.latest(), second)
+        self.assertEqual(self.shown_candidates(job), (["Second candidate"], True))
+
+    def test_prune_keeps_the_latest_and_building_runs(self):
+        self.add_run("Old", MatchRun.COMPLETED)
+        self.add_run("Failed", MatchRun.FAILED)
+        building = self.add_run("Building")
+        latest = self.add_run("Latest", MatchRun.COMPLETED)
+        self.assertEqual(prune_runs(batch_size=1), 2)
+        self.assertEqual(set(MatchRun.objects.all()), {building, latest})
+        self.assertEqual(set(Candidate.objects.values_list('name', flat=True)), {"Building candidate", "Latest candidate"})
+        self.assertEqual(Score.objects.count(), 2)
+        self.assertEqual(prune_runs(), 0)
+
+    def test_failed_run_is_dropped(self):
+        latest = self.add_run("Latest", MatchRun.COMPLETED)
+        self.add_run("Failed", MatchRun.FAILED)
+        self.assertEqual(MatchRun.latest(), latest)
+        prune_runs()
+        self.assertEqual(list(MatchRun.objects.all()), [latest])
+
+
+
+class AssignmentsReportTests(UploadTestCase):
+    """The assignments PDF is rendered once per run version and streamed from disk."""
+
+    def setUp(self):
+        super().setUp()
+        self.run = MatchRun.objects.create()
+        expert = Expert.objects.create(run=self.run, name="Ann", expertise="python")
+        for index in range(120):  # Several pages
+            candidate = Candidate.objects.create(run=self.run, name=f"Candidate {index}", expertise="python")
+            Score.objects.create(run=self.run, expert=expert, candidate=candidate, relevancy_score=10)
+        Score.objects.create(
+            run=self.run, expert=None, relevancy_score=0,
+            candidate=Candidate.objects.create(run=self.run, name="Zoë", expertise="cobol"),
+        )
+        complete_run(self.run)
+
+    def assertValidPDF(self, content):
+        self.assertTrue(content.startswith(b'%PDF-1.3'))
+        self.assertTrue(content.endswith(b'%%EOF\n'))
+        # The cross-reference table is where the trailer says, so offsets were counted right
+        offset = int(content[content.rindex(b'startxref') + len(b'startxref'):].split()[0])
+        self.assertEqual(content[offset:offset + 4], b'xref')
+
+    def test_rendered_once_per_run_version(self):
+        with mock.patch('core.reports.render_report', wraps=render_report) as render:
+            path = assignments_report(self.run)
+            self.assertEqual(assignments_report(self.run), path)
+            self.assertEqual(render.call_count, 1)
+            self.assertValidPDF(path.read_bytes())
+
+            # An incremental upload changed the run: a new report replaces the old one
+            MatchRun.objects.filter(pk=self.run.pk).update(updated_at=timezone.now() + datetime.timedelta(seconds=1))
+            self.run.refresh_from_db()
+            new_path = assignments_report(self.run)
+            self.assertEqual(render.call_count, 2)
+        self.assertNotEqual(new_path, path)
+        self.assertFalse(path.exists())
+        self.assertEqual(list(new_path.parent.iterdir()), [new_path])
+
+    def test_download(self):
+        response = self.client.get(reverse('download_pdf'))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertValidPDF(b''.join(response.streaming_content))
+        response.close()
+
+    def test_other_fpdf_versions_refused(self):
+        with mock.patch('core.reports.FPDF_VERSION', '2.7.0'), self.assertRaisesMessage(RuntimeError, "fpdf 1.7"):
+            assignments_report(self.run)
+
+
+
+class ScoreExportTests(TestCase):
+    """Scores of the latest run export as CSV or NDJSON, optionally filtered."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.client.force_login(user)
+        self.run = MatchRun.objects.create()
+        self.ann = Expert.objects.create(run=self.run, name="Ann", expertise="python")
+        bob = Expert.objects.create(run=self.run, name="Bob, Jr.", expertise="java")
+        for name, expert, score in [("Cid", self.ann, 10.0), ("Dee", bob, 5.0), ("Eve", self.ann, 2.5), ("Fay", None, 0.0)]:
+            candidate = Candidate.objects.create(run=self.run, name=name, expertise="")
+            Score.objects.create(run=self.run, expert=expert, candidate=candidate, relevancy_score=score)
+        complete_run(self.run)
+        # An older run's scores are never exported
+        MatchRun.objects.create(status=MatchRun.COMPLETED, completed_at=timezone.now() - datetime.timedelta(days=1))
+
+    def export(self, export_format, **params):
+        response = self.client.get(reverse('export_scores', args=[export_format]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'filename="scores_run{self.run.pk}.{export_format}"', response['Content-Disposition'])
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(rows[0], ['expert_id', 'expert_name', 'candidate_id', 'candidate_name', 'relevancy_score'])
+        self.assertEqual([(row[1], row[3], row[4]) for row in rows[1:]], [
+            ("Ann", "Cid", "10.0"), ("Bob, Jr.", "Dee", "5.0"), ("Ann", "Eve", "2.5"), ("", "Fay", "0.0"),
+        ])
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(rows[0], {
+            'expert_id': self.ann.pk, 'expert_name': "Ann", 'candidate_id': rows[0]['candidate_id'],
+            'candidate_name': "Cid", 'relevancy_score': 10.0,
+        })
+        self.assertEqual(rows[-1]['expert_id'], None)
+
+    def test_filters(self):
+        rows = [json.loads(line) for line in self.export('ndjson', min_score='5').splitlines()]
+        self.assertEqual([row['candidate_name'] for row in rows], ["Cid", "Dee"])
+        rows = [json.loads(line) for line in self.export('ndjson', expert=self.ann.pk, min_score='2.5').splitlines()]
+        self.assertEqual([row['candidate_name'] for row in rows], ["Cid", "Eve"])
+        rows = list(csv.reader(io.StringIO(self.export('csv', expert='none'))))
+        self.assertEqual([row[3] for row in rows[1:]], ["Fay"])
+
+    def test_bad_requests(self):
+        url = reverse('export_scores', args=['csv'])
+        self.assertEqual(self.client.get(url, {'min_score': 'high'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_scores', args=['xml'])).status_code, 404)
+
+
+class MatchResultsQueryBudgetTests(TestCase):
+    """The results page must not issue per-row queries for experts or candidates."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user('company@example.com', 'password', name='Company', role='COMPANY')
+        self.client.force_login(user)
+        self.run = MatchRun.objects.create(status=MatchRun.COMPLETED, completed_at=timezone.now())
+        self.experts = Expert.objects.bulk_create(
+            [Expert(run=self.run, name=f"Expert {index}", expertise="python") for index in range(3)]
+        )
+        self.job = MatchJob.objects.create(created_by=user, run=self.run, status=MatchJob.COMPLETED)
+        self.url = reverse('match_job_results', args=[self.job.pk])
+
+    def add_scores(self, count):
+        start = Candidate.objects.count()
+        candidates = Candidate.objects.bulk_create(
+            [Candidate(run=self.run, name=f"Candidate {start + index}", expertise="python") for index in range(count)]
+        )
+        Score.objects.bulk_create([
+            Score(run=self.run, expert=self.experts[index % len(self.experts)], candidate=candidate,
+                  relevancy_score=index % 10)
+            for index, candidate in enumerate(candidates)
+        ])
+        RankedMatch.objects.bulk_create([
+            RankedMatch(run=self.run, candidate=candidate, expert=expert, rank=rank, relevancy_score=10 - rank)
+            for candidate in candidates
+            for rank, expert in enumerate(self.experts, start=1)
+        ])
+
+    def test_query_count_does_not_grow_with_scores(self):
+        # Session, user, job, latest run, score count, page of scores,
+        # alternates of the page's candidates, expert filter options
+        self.add_scores(5)
+        with self.assertNumQueries(8):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['scores']), 5)
+
+        self.add_scores(RESULTS_PER_PAGE * 3)
+        with self.assertNumQueries(8):
+            response = self.client.get(self.url, {'page': 2, 'sort': 'score_asc'})
+        self.assertEqual(len(response.context['scores']), RESULTS_PER_PAGE)
+
+    def test_sorted_by_relevancy_and_filtered_by_expert(self):
+        self.add_scores(30)
+        response = self.client.get(self.url, {'expert': self.experts[1].pk})
+        scores = list(response.context['scores'])
+        self.assertEqual({score.expert_id for score in scores}, {self.experts[1].pk})
+        self.assertEqual(
+            [score.relevancy_score for score in scores],
+            sorted((score.relevancy_score for score in scores), reverse=True),
+        )
+
+    def test_alternates_shown_from_stored_ranking(self):
+        self.add_scores(1)
+        score = Score.objects.get()
+        response = self.client.get(self.url)
+        alternates = [match.expert_id for match in response.context['scores'][0].candidate.ranked]
+        self.assertEqual(alternates, [expert.pk for expert in self.experts])
+        for expert in self.experts:
+            if expert.pk != score.expert_id:
+                self.assertContains(response, f"{expert.name} (")
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages cover every row once, in order, with a constant number of queries."""
+
+    def setUp(self):
+        cache.clear()
+        # Runs sharing created_at values, so the id tie-break matters
+        start = timezone.now()
+        for index in range(23):
+            MatchRun.objects.create()
+        for index, run in enumerate(MatchRun.objects.order_by('pk')):
+            MatchRun.objects.filter(pk=run.pk).update(created_at=start - datetime.timedelta(seconds=index // 3))
+        self.expected = list(MatchRun.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def walk(self, per_page):
+        pages, cursor = [], None
+        while True:
+            page = paginate(MatchRun.objects.all(), cursor, per_page)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_forward_and_back(self):
+        pages = self.walk(5)
+        self.assertEqual([run.pk for page in pages for run in page], self.expected)
+        self.assertEqual([page.has_previous for page in pages], [False, True, True, True, True])
+
+        page = pages[-1]
+        backwards = [[run.pk for run in page]]
+        while page.has_previous:
+            page = paginate(MatchRun.objects.all(), page.previous_cursor, 5)
+            backwards.insert(0, [run.pk for run in page])
+        self.assertEqual(backwards, [[run.pk for run in page] for page in pages])
+
+    def test_deep_page_costs_the_same(self):
+        pages = self.walk(5)
+        # The count is cached by the walk, so only the page is queried
+        with self.assertNumQueries(1):
+            paginate(MatchRun.objects.all(), None, 5)
+        with self.assertNumQueries(1):
+            paginate(MatchRun.objects.all(), pages[-2].next_cursor, 5)
+
+    def test_invalid_cursor_gives_first_page(self):
+        tampered = [
+            base64.urlsafe_b64encode(payload.encode()).decode()
+            for payload in ('["n",["notadate","x"]]', '["p",[null,null]]', '["n",[{"a":1},1]]', '["n",["now",1.5]]')
+        ]
+        for cursor in ('garbage', 'e30', '', *tampered):
+            page = paginate(MatchRun.objects.all(), cursor, 5)
+            self.assertEqual([run.pk for run in page], self.expected[:5])
+
+    def test_approximate_count(self):
+        self.assertEqual(approximate_count(MatchRun.objects.all(), limit=50), (23, True))
+        self.assertEqual(approximate_count(MatchRun.objects.all(), limit=10), (10, False))
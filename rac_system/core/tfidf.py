@@ -0,0 +1,168 @@
+"""
+Weighted (TF-IDF) relevancy, an alternative to calculate_relevancy().
+
+Each skill is weighted by its inverse document frequency over the run's
+experts and candidates, so rare skills count for more than ones nearly
+everybody lists. Every person is stored as an L2-normalized sparse vector
+({skill: weight}, on Expert.vector / Candidate.vector) and relevancy is the
+cosine similarity of two vectors, out of 10.
+
+The IDF weights are learned once, when a run is uploaded in full, and kept
+on the run; incremental uploads reuse them, so unchanged rows keep their
+stored vectors and only new or changed rows are vectorized.
+"""
+import math
+
+import numpy as np
+
+from .ingest import CHUNK_SIZE
+from .matching import DEFAULT_BLOCK_SIZE, parse_skills, ranked_pairs
+
+
+def learn_idf(expertise_strings):
+    """
+    Smoothed IDF weights from an iterable of expertise strings:
+    {'documents': N, 'weights': {skill: ln((1 + N) / (1 + df)) + 1}}.
+    """
+    documents = 0
+    frequencies = {}
+    for expertise in expertise_strings:
+        documents += 1
+        for skill in parse_skills(expertise):
+            frequencies[skill] = frequencies.get(skill, 0) + 1
+    return {
+        'documents': documents,
+        'weights': {skill: _idf(documents, frequency) for skill, frequency in frequencies.items()},
+    }
+
+
+def _idf(documents, frequency):
+    return math.log((1 + documents) / (1 + frequency)) + 1
+
+
+def vectorize(expertise, idf):
+    """The normalized {skill: weight} vector of an expertise string."""
+    skills = parse_skills(expertise)
+    # Skills first seen after the IDF was learned get the rarest weight.
+    unseen = _idf(idf['documents'], 0)
+    weights = {skill: idf['weights'].get(skill, unseen) for skill in sorted(skills)}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {skill: weight / norm for skill, weight in weights.items()} if norm else {}
+
+
+def vectorize_rows(run, idf, models, chunk_size=CHUNK_SIZE):
+    """
+    Store the vector of every row of `run` in each of `models` (Expert,
+    Candidate). Rows with the same expertise (same content_hash) share one
+    computation. Returns the number of vectors computed.
+    """
+    cache = {}
+    computed = 0
+    for model in models:
+        rows = model.objects.filter(run=run).only('pk', 'expertise', 'content_hash').order_by('pk')
+        batch = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            if row.content_hash not in cache:
+                cache[row.content_hash] = vectorize(row.expertise, idf)
+                computed += 1
+            row.vector = cache[row.content_hash]
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                model.objects.bulk_update(batch, ['vector'], batch_size=chunk_size)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['vector'], batch_size=chunk_size)
+    return computed
+
+
+def vectorize_changed(rows, idf):
+    """
+    Set the vector of new or changed (unsaved) rows, one computation per
+    distinct expertise. Returns the number of vectors computed.
+    """
+    cache = {}
+    for row in rows:
+        if row.content_hash not in cache:
+            cache[row.content_hash] = vectorize(row.expertise, idf)
+        row.vector = cache[row.content_hash]
+    return len(cache)
+
+
+class TfidfIndex:
+    """
+    Engine over the experts' stored vectors: an inverted index from skill to
+    (expert rows, weights). Same best() contract as the Jaccard engines, but
+    fed candidate vectors instead of expertise strings.
+    """
+
+    input_field = 'vector'
+
+    def __init__(self, vectors):
+        self.expert_count = len(vectors)
+        postings = {}
+        for row, vector in enumerate(vectors):
+            for skill, weight in (vector or {}).items():
+                rows, weights = postings.setdefault(skill, ([], []))
+                rows.append(row)
+                weights.append(weight)
+        self.postings = {
+            skill: (np.array(rows, dtype=np.int64), np.array(weights, dtype=np.float64))
+            for skill, (rows, weights) in postings.items()
+        }
+
+    def __len__(self):
+        return self.expert_count
+
+    def scores(self, vector):
+        """
+        (rows, scores) for the experts sharing at least one skill with the
+        candidate vector, rows in ascending order. Experts not returned score 0.
+        """
+        pairs = [
+            (self.postings[skill][0], self.postings[skill][1] * weight)
+            for skill, weight in (vector or {}).items() if skill in self.postings
+        ]
+        if not pairs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        rows, inverse = np.unique(np.concatenate([rows for rows, _ in pairs]), return_inverse=True)
+        dots = np.bincount(inverse, weights=np.concatenate([products for _, products in pairs]), minlength=len(rows))
+        return rows, dots * 10  # Score out of 10
+
+    def best(self, vectors, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Best expert row per candidate vector as (row, score), (None, 0) when
+        no expert scores above 0. Dot products are computed a block of
+        candidates at a time.
+        """
+        return [ranked[0] if ranked else (None, 0) for ranked in self.top(vectors, 1, block_size)]
+
+    def top(self, vectors, k, block_size=DEFAULT_BLOCK_SIZE):
+        """Same contract as SkillMatrix.top(), for candidate vectors."""
+        results = []
+        for start in range(0, len(vectors), block_size):
+            block = vectors[start:start + block_size]
+            results.extend(ranked_pairs(*self._pair_scores(block), len(block), k))
+        return results
+
+    def _pair_scores(self, vectors):
+        """(candidates, rows, scores) for the pairs sharing a skill."""
+        candidates, rows, products = [], [], []
+        for candidate, vector in enumerate(vectors):
+            for skill, weight in (vector or {}).items():
+                if skill in self.postings:
+                    skill_rows, skill_weights = self.postings[skill]
+                    candidates.append(np.full(len(skill_rows), candidate, dtype=np.int64))
+                    rows.append(skill_rows)
+                    products.append(skill_weights * weight)
+
+        if not rows:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float64)
+        # Sum the products per (candidate, expert row) pair: one sparse
+        # matrix product for the whole block.
+        keys = np.concatenate(candidates) * self.expert_count + np.concatenate(rows)
+        order = np.argsort(keys, kind='stable')
+        keys, products = keys[order], np.concatenate(products)[order]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        pair_candidates, pair_rows = np.divmod(keys[starts], self.expert_count)
+        return pair_candidates, pair_rows, np.add.reduceat(products, starts) * 10  # Score out of 10
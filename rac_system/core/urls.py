@@ -5,5 +5,9 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('home/', views.home, name='home'),
     path('upload/', views.upload_and_match, name='upload_and_match'),
+    path('match-jobs/<int:job_id>/', views.match_job, name='match_job'),
+    path('match-jobs/<int:job_id>/status/', views.match_job_status, name='match_job_status'),
+    path('match-jobs/<int:job_id>/results/', views.match_job_results, name='match_job_results'),
     path('download_pdf/', views.download_pdf, name='download_pdf'),  
+    path('export/scores.<str:export_format>', views.export_scores, name='export_scores'),
 ]
@@ -1,13 +1,35 @@
-import csv
-from django.shortcuts import render
-from .models import Expert, Candidate, Score
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from .models import Expert, MatchJob, MatchRun, RankedMatch, Score
 from .forms import UploadCSVForm
-from io import TextIOWrapper
-from django.http import HttpResponse
-from django.template.loader import get_template, render_to_string
-from fpdf import FPDF
+from .exports import EXPORT_FORMATS
+from .ingest import MatchStats, RowError
+from .reports import assignments_report, render_report
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.db.models import Prefetch
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.decorators import login_required
 
+# Scores shown per page of match results
+RESULTS_PER_PAGE = 50
+
+# ?sort= values for the match results and their ordering
+RESULT_ORDERINGS = {
+    'score': ('-relevancy_score', 'id'),
+    'score_asc': ('relevancy_score', 'id'),
+}
+
+def filter_by_expert(scores, expert_filter):
+    """
+    Narrow scores to one expert (an id) or to unmatched candidates ('none').
+    Returns the scores and the filter value, '' if it was not recognised.
+    """
+    if expert_filter == 'none':
+        return scores.filter(expert__isnull=True), expert_filter
+    if expert_filter.isdigit():
+        return scores.filter(expert_id=int(expert_filter)), expert_filter
+    return scores, ''
+
 # Home Page
 def home(request):
     return render(request, 'core/home.html')
@@ -38,90 +60,143 @@ def calculate_relevancy(expert_expertise, candidate_expertise):
 
 @login_required(login_url='login')
 def upload_and_match(request):
+    """
+    Queue the uploaded CSVs as a MatchJob and return straight away; the
+    run_match_jobs worker does the parsing and matching in the background.
+    """
     if request.method == 'POST':
         form = UploadCSVForm(request.POST, request.FILES)
         if form.is_valid():
-            expert_csv = request.FILES['expert_csv']
-            candidate_csv = request.FILES['candidate_csv']
-
-            # Clear old records
-            Expert.objects.all().delete()
-            Candidate.objects.all().delete()
-            Score.objects.all().delete()
-
-            # Read and save experts
-            experts = []
-            expert_file = TextIOWrapper(expert_csv.file, encoding='utf-8')
-            reader = csv.DictReader(expert_file)
-            for row in reader:
-                expert = Expert.objects.create(
-                    name=row['name'],
-                    expertise=row['expertise']
-                )
-                experts.append(expert)
-
-            # Read and save candidates
-            candidates = []
-            candidate_file = TextIOWrapper(candidate_csv.file, encoding='utf-8')
-            reader = csv.DictReader(candidate_file)
-            for row in reader:
-                candidate = Candidate.objects.create(
-                    name=row['name'],
-                    expertise=row['expertise']
-                )
-                candidates.append(candidate)
-
-            # Match candidates with experts
-            for candidate in candidates:
-                best_expert = None
-                best_score = 0
-                for expert in experts:
-                    relevancy_score = calculate_relevancy(expert.expertise, candidate.expertise)
-                    if relevancy_score > best_score:  # Assign only if current score is better
-                        best_score = relevancy_score
-                        best_expert = expert
-                # Save the best match
-                Score.objects.create(expert=best_expert, candidate=candidate, relevancy_score=best_score)
-
-            return render(request, 'core/results.html', {'scores': Score.objects.all()})
+            job = MatchJob.objects.create(
+                created_by=request.user,
+                expert_csv=form.cleaned_data['expert_csv'],
+                candidate_csv=form.cleaned_data['candidate_csv'],
+                assignment_mode=form.cleaned_data['assignment_mode'],
+                scorer=form.cleaned_data['scorer'],
+                expert_capacity=form.cleaned_data['expert_capacity'],
+                incremental=form.cleaned_data['incremental'],
+            )
+            return redirect('match_job', job_id=job.id)
     else:
         form = UploadCSVForm()
 
     return render(request, 'core/upload.html', {'form': form})
 
+
+@login_required(login_url='login')
+def match_job(request, job_id):
+    """Progress page for a match job; polls match_job_status until it is done."""
+    job = get_object_or_404(MatchJob, pk=job_id, created_by=request.user)
+    if job.status == MatchJob.COMPLETED:
+        return redirect('match_job_results', job_id=job.id)
+    return render(request, 'core/match_job.html', {'job': job})
+
+
+@login_required(login_url='login')
+def match_job_status(request, job_id):
+    """JSON progress of a match job: rows parsed, pairs scored and ETA."""
+    job = get_object_or_404(MatchJob, pk=job_id, created_by=request.user)
+    eta = job.eta_seconds
+    return JsonResponse({
+        'id': job.id,
+        'status': job.status,
+        'rows_parsed': job.rows_parsed,
+        'pairs_scored': job.pairs_scored,
+        'pairs_total': job.pairs_total,
+        'eta_seconds': round(eta, 1) if eta is not None else None,
+        'error': job.error,
+        'results_url': reverse('match_job_results', args=[job.id]) if job.status == MatchJob.COMPLETED else None,
+    })
+
+
+@login_required(login_url='login')
+def match_job_results(request, job_id):
+    job = get_object_or_404(MatchJob, pk=job_id, created_by=request.user, status=MatchJob.COMPLETED)
+    row_errors = job.row_errors or {}
+    # Always show the latest completed run; a later upload may have replaced this job's.
+    run = MatchRun.latest()
+
+    # One query for the page of scores with their expert and candidate, one
+    # for the count and one for the candidates' stored alternates, whatever
+    # the number of scores.
+    alternates = RankedMatch.objects.select_related('expert').order_by('rank')
+    scores = Score.objects.filter(run=run).select_related('expert', 'candidate').prefetch_related(
+        Prefetch('candidate__ranked_matches', queryset=alternates, to_attr='ranked'),
+    )
+    scores, expert_filter = filter_by_expert(scores, request.GET.get('expert', ''))
+    sort = request.GET.get('sort', 'score')
+    if sort not in RESULT_ORDERINGS:
+        sort = 'score'
+    scores = scores.order_by(*RESULT_ORDERINGS[sort])
+
+    paginator = Paginator(scores, RESULTS_PER_PAGE)
+    page = request.GET.get('page')
+    try:
+        scores_page = paginator.page(page)
+    except PageNotAnInteger:
+        scores_page = paginator.page(1)
+    except EmptyPage:
+        scores_page = paginator.page(paginator.num_pages)
+
+    context = {
+        'scores': scores_page,
+        'page_range': paginator.get_elided_page_range(scores_page.number),
+        'experts': Expert.objects.filter(run=run).order_by('name').values_list('id', 'name'),
+        'expert_filter': expert_filter,
+        'sort': sort,
+        'superseded': run is not None and run.pk != job.run_id,
+        'expert_count': job.expert_count,
+        'candidate_count': job.candidate_count,
+        'expert_errors': [RowError(*error) for error in row_errors.get('expert', [])],
+        'expert_error_count': row_errors.get('expert_count', 0),
+        'candidate_errors': [RowError(*error) for error in row_errors.get('candidate', [])],
+        'candidate_error_count': row_errors.get('candidate_count', 0),
+        'assignment_mode': job.assignment_mode,
+        'scorer': job.get_scorer_display(),
+        'expert_capacity': job.expert_capacity,
+        'stats': MatchStats(job.candidate_count, job.objective, job.solve_time),
+        'recall': job.recall * 100 if job.recall is not None else None,
+        'changes': job.changes if job.incremental else None,
+    }
+    return render(request, 'core/results.html', context)
+
 @login_required(login_url='login')
 def download_pdf(request):
-    # Query all scores for the PDF
-    scores = Score.objects.all()
-
-    # Create a PDF object
-    pdf = FPDF()
-    pdf.add_page()
-
-    # Set font
-    pdf.set_font("Arial", size=12)
-
-    # Add a title
-    pdf.cell(200, 10, txt="Interview Assignments", ln=True, align='C')
-
-    # Add header for the table
-    pdf.set_font("Arial", 'B', size=12)
-    pdf.cell(60, 10, 'Expert', 1)
-    pdf.cell(60, 10, 'Candidate', 1)
-    pdf.cell(60, 10, 'Relevancy Score', 1)
-    pdf.ln()
-
-    # Add data to the table
-    pdf.set_font("Arial", size=12)
-    for score in scores:
-        pdf.cell(60, 10, score.expert.name, 1)
-        pdf.cell(60, 10, score.candidate.name, 1)
-        pdf.cell(60, 10, f"{score.relevancy_score:.2f}", 1)
-        pdf.ln()
-
-    # Set the response
-    response = HttpResponse(pdf.output(dest='S').encode('latin1'), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="interview_assignments.pdf"'
-    return response
+    run = MatchRun.latest()
+    if run is None:
+        # Nothing uploaded yet: an empty report, not worth caching
+        content = render_report(Score.objects.none()).output(dest='S').encode('latin1')
+        response = HttpResponse(content, content_type='application/pdf')
+        response['Content-Disposition'] = 'attachment; filename="interview_assignments.pdf"'
+        return response
 
+    # Rendered once per run version, then streamed from disk
+    path = assignments_report(run)
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True, filename='interview_assignments.pdf', content_type='application/pdf',
+    )
 
+
+@login_required(login_url='login')
+def export_scores(request, export_format):
+    """
+    Stream the latest run's scores as CSV or NDJSON. Optional filters:
+    ?min_score= (relevancy threshold) and ?expert= (an expert id or 'none').
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+    lines, content_type = EXPORT_FORMATS[export_format]
+
+    run = MatchRun.latest()
+    scores, _ = filter_by_expert(Score.objects.filter(run=run), request.GET.get('expert', ''))
+    min_score = request.GET.get('min_score', '')
+    if min_score:
+        try:
+            scores = scores.filter(relevancy_score__gte=float(min_score))
+        except ValueError:
+            return HttpResponseBadRequest("min_score must be a number")
+
+    response = StreamingHttpResponse(lines(scores), content_type=content_type)
+    filename = f"scores_run{run.pk}.{export_format}" if run else f"scores.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -22,6 +22,7 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 CORS_ALLOW_ALL_ORIGINS = True
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -59,6 +60,50 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Matching (core.upload_and_match)
+# Worker processes that score candidate shards; 1 keeps matching in-process.
+MATCHING_WORKERS = int(os.getenv('MATCHING_WORKERS', 1))
+# Greedy matching engine: 'index' (exact), 'matrix' (exact) or 'lsh' (approximate, for very large pools).
+MATCHING_ENGINE = os.getenv('MATCHING_ENGINE', 'index')
+# MinHash signature length and LSH bands for the 'lsh' engine; permutations must be a multiple of bands.
+MATCHING_LSH_PERMUTATIONS = int(os.getenv('MATCHING_LSH_PERMUTATIONS', 64))
+MATCHING_LSH_BANDS = int(os.getenv('MATCHING_LSH_BANDS', 32))
+# Ranked experts kept per candidate (the match and its alternates); 1 keeps only the match.
+MATCHING_TOP_K = int(os.getenv('MATCHING_TOP_K', 5))
+# Seconds without progress after which a running match job's worker is presumed dead and the job failed.
+MATCH_JOB_STALE_AFTER = int(os.getenv('MATCH_JOB_STALE_AFTER', 3600))
+
+# Cache (rendered job listing results and posting cards, listing counts)
+# CACHE_BACKEND: 'locmem' (per process), 'file' (CACHE_LOCATION is a directory)
+# or 'db' (CACHE_LOCATION is a table; create it with `manage.py createcachetable`).
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'equihire'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(tempfile.gettempdir(), 'equihire_cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, not {CACHE_BACKEND!r}")
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000))},
+    }
+}
+# Seconds a cached job page fragment is kept; changes invalidate it sooner.
+JOB_CACHE_TIMEOUT = int(os.getenv('JOB_CACHE_TIMEOUT', 300))
+
+# Job recommendations (candidate_dashboard.recommendations)
+# Best-scoring postings stored per candidate; the dashboard pages through these.
+RECOMMENDATIONS_PER_CANDIDATE = int(os.getenv('RECOMMENDATIONS_PER_CANDIDATE', 50))
+
+# Archival (company_dashboard.archive, run by the archive_job_postings command)
+# Closed postings not edited for this many days are archived; 0 disables the rule.
+JOB_ARCHIVE_INACTIVE_DAYS = int(os.getenv('JOB_ARCHIVE_INACTIVE_DAYS', 90))
+# Postings created this many days ago are archived even when still open; 0 disables the rule.
+JOB_ARCHIVE_MAX_AGE_DAYS = int(os.getenv('JOB_ARCHIVE_MAX_AGE_DAYS', 0))
+
 
 
 # Quick-start development settings - unsuitable for production
@@ -85,6 +130,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'core',
     'authentication_usertype',
     'company_dashboard',
@@ -24,4 +24,5 @@ urlpatterns = [
     path('', include('company_dashboard.urls')),
     path('', include('candidate_dashboard.urls')),
     path('assessment/', include('candidate_test.urls')),
+    path('api/v1/', include('candidate_dashboard.api_urls')),
 ]